@@ -2,17 +2,49 @@ const express = require("express");
 const router = express.Router();
 const {
   runScalpingStrategyWithData,
+  runScalpingFanout,
+  runPairsStrategy,
+  watchScalpingStrategy,
   stopScalpingScript,
+  sendStrategyCommand,
+  profileStrategy,
+  warmupStrategies,
+  getClusterStatus,
   getAllStrategies,
   createStrategy,
   updateStrategy,
   deleteStrategy
 } = require("../controllers/scalpingController");
+const {
+  getStrategyRuns,
+  getRunFills,
+  getStrategyMetrics,
+  getStrategyPerformance,
+} = require("../controllers/strategyMetricsController");
+const {
+  getLinkedAccounts,
+  linkAccount,
+  unlinkAccount,
+} = require("../controllers/linkedAccountsController");
 const authenticateToken = require("../middleware/authMiddleware");
 
 router.get("/start/:id", runScalpingStrategyWithData); // ✅ Use POST for starting the strategy
+router.get("/fanout/:id", authenticateToken, runScalpingFanout);
+router.get("/pairs/:id", authenticateToken, runPairsStrategy);
+router.get("/stream/:id", authenticateToken, watchScalpingStrategy); // EventSource: ?token=
 router.post("/stop-script", authenticateToken, stopScalpingScript);
+router.post("/:id/command", authenticateToken, sendStrategyCommand);
+router.post("/:id/profile", authenticateToken, profileStrategy);
+router.post("/warmup", authenticateToken, warmupStrategies);
+router.get("/cluster", authenticateToken, getClusterStatus);
 router.get("/all", authenticateToken, getAllStrategies);
+router.get("/linked-accounts", authenticateToken, getLinkedAccounts);
+router.post("/linked-accounts", authenticateToken, linkAccount);
+router.delete("/linked-accounts/:ownerId", authenticateToken, unlinkAccount);
+router.get("/runs/:runId/fills", authenticateToken, getRunFills);
+router.get("/:id/runs", authenticateToken, getStrategyRuns);
+router.get("/:id/metrics", authenticateToken, getStrategyMetrics);
+router.get("/:id/performance", authenticateToken, getStrategyPerformance);
 router.post("/", authenticateToken, createStrategy);
 router.put("/:id", authenticateToken, updateStrategy);
 router.delete("/:id", authenticateToken, deleteStrategy);
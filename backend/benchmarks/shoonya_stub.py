@@ -0,0 +1,468 @@
+"""Local stand-in for the Shoonya (Noren) REST and websocket API.
+
+Serves just enough of the NorenWClientTP routes and the touchline websocket
+for scalping_strategy.py to run unmodified against it, with every price and
+fill generated locally. Used by strategyLoad.js; point a strategy at it with
+
+    SHOONYA_HOST=http://127.0.0.1:<port>/NorenWClientTP/
+    SHOONYA_WEBSOCKET=ws://127.0.0.1:<ws-port>/NorenWSTP/
+
+Each instrument's price is a random walk in tick-size steps. The stub
+records when each price last changed, so the gap between a price change and
+the order it triggered (tick-to-order latency) is measured on the broker's
+side of the wire. `GET /stats` returns per-route call counts and those
+latency samples; `POST /reset` clears them at the start of a measurement window.
+"""
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote_plus
+
+TICK_SIZE = 0.05
+START_PRICE = 100.0
+CIRCUIT = 0.2   # daily band around the previous close
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+# Market
+class Instrument:
+    def __init__(self, exch, token, price):
+        self.exch = exch
+        self.token = token
+        self.price = price
+        self.changed_at = time.monotonic()
+        self.volume = 0
+        # Circuits are fixed for the day from the previous close
+        self.lower = round(round(price * (1 - CIRCUIT) / TICK_SIZE) * TICK_SIZE, 2)
+        self.upper = round(round(price * (1 + CIRCUIT) / TICK_SIZE) * TICK_SIZE, 2)
+
+    def rejects(self, prctyp, prc):
+        """Broker-side price check for limit orders: the reason, or None."""
+        if prctyp != "LMT":
+            return None
+        price = float(prc)
+        if not self.lower <= price <= self.upper:
+            return f"Price {price:.2f} outside circuit {self.lower:.2f}-{self.upper:.2f}"
+        if abs(price / TICK_SIZE - round(price / TICK_SIZE)) > 1e-6:
+            return f"Price {price} not a multiple of tick {TICK_SIZE}"
+        return None
+
+    def touchline(self):
+        return {
+            "e": self.exch,
+            "tk": self.token,
+            "ts": self.token,
+            "lp": f"{self.price:.2f}",
+            "bp1": f"{self.price - TICK_SIZE:.2f}",
+            "sp1": f"{self.price + TICK_SIZE:.2f}",
+            "v": str(self.volume),
+            "ti": f"{TICK_SIZE:.2f}",
+            "uc": f"{self.upper:.2f}",
+            "lc": f"{self.lower:.2f}",
+        }
+
+
+class Market:
+    """Instruments, accounts and order matching, all behind one lock."""
+
+    def __init__(self, volatility, seed=None):
+        self.volatility = volatility  # max ticks per step
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.instruments = {}   # token -> Instrument
+        self.orders = {}        # norenordno -> order dict
+        self.positions = {}     # (uid, tsym) -> position dict
+        self.order_ids = itertools.count(25010100000001)
+        self.calls = {}         # route -> count
+        self.order_latency_ms = []
+        self.listeners = []     # callables taking a list of changed Instruments
+
+    def count(self, route):
+        with self.lock:
+            self.calls[route] = self.calls.get(route, 0) + 1
+
+    def instrument(self, exch, token):
+        instrument = self.instruments.get(token)
+        if instrument is None:
+            instrument = self.instruments[token] = Instrument(exch, token, START_PRICE)
+        return instrument
+
+    def step(self):
+        """Move every instrument by a random number of ticks and fill crossed orders."""
+        now = time.monotonic()
+        with self.lock:
+            changed = []
+            for instrument in self.instruments.values():
+                ticks = self.random.randint(-self.volatility, self.volatility)
+                if ticks == 0:
+                    continue
+                instrument.price = min(instrument.upper, max(instrument.lower, round(instrument.price + ticks * TICK_SIZE, 2)))
+                instrument.changed_at = now
+                instrument.volume += self.random.randint(1, 500)
+                changed.append(instrument)
+            for order in self.orders.values():
+                if order["status"] == "OPEN":
+                    self._try_fill(order)
+        for listener in list(self.listeners):
+            listener(changed)
+
+    def _try_fill(self, order):
+        price = self.instruments[order["tsym"]].price
+        limit = float(order["prc"])
+        if order["prctyp"] == "LMT":
+            if order["trantype"] == "B" and price > limit:
+                return
+            if order["trantype"] == "S" and price < limit:
+                return
+        order["status"] = "COMPLETE"
+        order["avgprc"] = f"{price:.2f}"
+        order["fillshares"] = order["qty"]
+        position = self.positions.setdefault((order["uid"], order["tsym"]), {
+            "exch": order["exch"], "tsym": order["tsym"], "prd": order["prd"],
+            "netqty": 0, "daybuyqty": 0, "daybuyamt": 0.0, "daysellqty": 0, "daysellamt": 0.0,
+        })
+        qty = int(order["qty"])
+        if order["trantype"] == "B":
+            position["daybuyqty"] += qty
+            position["daybuyamt"] += qty * price
+            position["netqty"] += qty
+        else:
+            position["daysellqty"] += qty
+            position["daysellamt"] += qty * price
+            position["netqty"] -= qty
+
+    def place(self, uid, data):
+        with self.lock:
+            instrument = self.instrument(data["exch"], data["tsym"])
+            self.order_latency_ms.append((time.monotonic() - instrument.changed_at) * 1000)
+            order = {
+                "norenordno": str(next(self.order_ids)),
+                "uid": uid,
+                "exch": data["exch"],
+                "tsym": data["tsym"],
+                "trantype": data["trantype"],
+                "prd": data.get("prd", "C"),
+                "prctyp": data["prctyp"],
+                "prc": data.get("prc", "0"),
+                "qty": data["qty"],
+                "status": "OPEN",
+                "avgprc": "0.00",
+            }
+            self.orders[order["norenordno"]] = order
+            reason = instrument.rejects(order["prctyp"], order["prc"])
+            if reason:
+                order.update(status="REJECTED", rejreason=reason)
+                return order["norenordno"]
+            self._try_fill(order)
+            return order["norenordno"]
+
+    def modify(self, data):
+        with self.lock:
+            order = self.orders.get(data["norenordno"])
+            if order is None or order["status"] != "OPEN":
+                return False
+            instrument = self.instrument(order["exch"], order["tsym"])
+            if instrument.rejects(data["prctyp"], data.get("prc", order["prc"])):
+                return False
+            order.update(prctyp=data["prctyp"], prc=data.get("prc", order["prc"]), qty=data["qty"])
+            self._try_fill(order)
+            return True
+
+    def cancel(self, orderno):
+        with self.lock:
+            order = self.orders.get(orderno)
+            if order is None or order["status"] != "OPEN":
+                return False
+            order["status"] = "CANCELED"
+            return True
+
+    def position_book(self, uid):
+        with self.lock:
+            book = []
+            for (owner, tsym), position in self.positions.items():
+                if owner != uid:
+                    continue
+                buyqty = position["daybuyqty"]
+                sellqty = position["daysellqty"]
+                book.append({
+                    **position,
+                    "stat": "Ok",
+                    "uid": uid,
+                    "netqty": str(position["netqty"]),
+                    "daybuyqty": str(buyqty),
+                    "daysellqty": str(sellqty),
+                    "daybuyavgprc": f"{position['daybuyamt'] / buyqty:.2f}" if buyqty else "0.00",
+                    "daysellavgprc": f"{position['daysellamt'] / sellqty:.2f}" if sellqty else "0.00",
+                    "lp": f"{self.instruments[tsym].price:.2f}",
+                })
+            return book
+
+    def order_book(self, uid):
+        with self.lock:
+            return [dict(order, stat="Ok") for order in self.orders.values() if order["uid"] == uid]
+
+    def order_history(self, orderno):
+        with self.lock:
+            order = self.orders.get(orderno)
+            return [dict(order, stat="Ok")] if order else None
+
+    def quote(self, exch, token):
+        with self.lock:
+            instrument = self.instrument(exch, token)
+            price = instrument.price
+            return {
+                "stat": "Ok",
+                "exch": exch,
+                "tsym": token,
+                "token": token,
+                "lp": f"{price:.2f}",
+                "ti": f"{TICK_SIZE:.2f}",
+                "ls": "1",
+                "uc": f"{instrument.upper:.2f}",
+                "lc": f"{instrument.lower:.2f}",
+            }
+
+    def stats(self):
+        with self.lock:
+            return {
+                "calls": dict(self.calls),
+                "orderLatencyMs": [round(sample, 3) for sample in self.order_latency_ms],
+                "instruments": len(self.instruments),
+            }
+
+    def reset(self):
+        # Counters only: strategies still running keep their orders and positions
+        with self.lock:
+            self.calls.clear()
+            self.order_latency_ms.clear()
+
+
+# REST
+def make_handler(market):
+    def ok(**fields):
+        return {"stat": "Ok", "request_time": time.strftime("%H:%M:%S %d-%m-%Y"), **fields}
+
+    def not_ok(reason):
+        return {"stat": "Not_Ok", "emsg": reason}
+
+    routes = {
+        "QuickAuth": lambda d: ok(susertoken=f"stub-{d['uid']}", uname=d["uid"], actid=d["uid"]),
+        "Logout": lambda d: ok(),
+        "PlaceOrder": lambda d: ok(norenordno=market.place(d["uid"], d)),
+        "ModifyOrder": lambda d: ok(result=d["norenordno"]) if market.modify(d) else not_ok("Order not open"),
+        "CancelOrder": lambda d: ok(result=d["norenordno"]) if market.cancel(d["norenordno"]) else not_ok("Order not open"),
+        "OrderBook": lambda d: market.order_book(d["uid"]) or not_ok("no data"),
+        "SingleOrdHist": lambda d: market.order_history(d["norenordno"]) or not_ok("no data"),
+        "PositionBook": lambda d: market.position_book(d["uid"]) or not_ok("no data"),
+        "Limits": lambda d: ok(cash="1000000.00", payin="0.00", marginused="0.00"),
+        "GetQuotes": lambda d: market.quote(d["exch"], d["token"]),
+        "GetSecurityInfo": lambda d: market.quote(d["exch"], d["token"]),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def reply(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                return self.reply(market.stats())
+            self.send_error(404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode()
+            route = self.path.rstrip("/").rsplit("/", 1)[-1]
+            if route == "reset":
+                market.reset()
+                return self.reply(ok())
+            handler = routes.get(route)
+            if handler is None:
+                return self.reply(not_ok(f"Unknown route {route}"))
+            market.count(route)
+            # NorenApi posts `jData=<json>&jKey=<token>` without form-encoding the JSON
+            raw = body.split("&jKey=", 1)[0]
+            data = json.loads(raw[len("jData="):] if raw.startswith("jData=") else raw)
+            if "tsym" in data:
+                data["tsym"] = unquote_plus(data["tsym"])
+            try:
+                self.reply(handler(data))
+            except KeyError as e:
+                self.reply(not_ok(f"Missing field {e}"))
+
+    return Handler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512  # hundreds of strategies connect at once
+
+
+# Websocket
+def ws_recv(conn):
+    """Read one client frame; returns (opcode, payload) or None on close."""
+    header = conn.recv(2, socket.MSG_WAITALL)
+    if len(header) < 2:
+        return None
+    opcode = header[0] & 0x0F
+    length = header[1] & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", conn.recv(2, socket.MSG_WAITALL))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", conn.recv(8, socket.MSG_WAITALL))[0]
+    mask = conn.recv(4, socket.MSG_WAITALL) if header[1] & 0x80 else b"\0\0\0\0"
+    payload = bytearray(conn.recv(length, socket.MSG_WAITALL)) if length else bytearray()
+    for i in range(len(payload)):
+        payload[i] ^= mask[i % 4]
+    return opcode, bytes(payload)
+
+
+def ws_frame(payload, opcode=0x1):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack(">BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class TouchlineSession:
+    """One websocket client: `c` login, `t`/`u` touchline (un)subscribe, pushes `tf` on change."""
+
+    def __init__(self, market, conn):
+        self.market = market
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.tokens = set()
+
+    def send(self, message, opcode=0x1):
+        data = message if isinstance(message, bytes) else json.dumps(message).encode()
+        with self.send_lock:
+            self.conn.sendall(ws_frame(data, opcode))
+
+    def on_prices(self, changed):
+        for instrument in changed:
+            if instrument.token in self.tokens:
+                try:
+                    self.send({"t": "tf", "e": instrument.exch, "tk": instrument.token,
+                               "lp": f"{instrument.price:.2f}", "v": str(instrument.volume)})
+                except OSError:
+                    return
+
+    def handshake(self):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = self.conn.recv(4096)
+            if not chunk:
+                return False
+            request += chunk
+        key = ""
+        for line in request.decode().split("\r\n"):
+            if line.lower().startswith("sec-websocket-key:"):
+                key = line.split(":", 1)[1].strip()
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.conn.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        return True
+
+    def run(self):
+        if not self.handshake():
+            return
+        self.market.listeners.append(self.on_prices)
+        try:
+            while True:
+                frame = ws_recv(self.conn)
+                if frame is None or frame[0] == 0x8:
+                    break
+                opcode, payload = frame
+                if opcode == 0x9:
+                    self.send(payload, opcode=0xA)
+                    continue
+                if opcode != 0x1:
+                    continue
+                self.on_message(json.loads(payload))
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.market.listeners.remove(self.on_prices)
+            self.conn.close()
+
+    def on_message(self, message):
+        kind = message.get("t")
+        if kind == "c":
+            self.market.count("ws:connect")
+            self.send({"t": "ck", "s": "OK", "uid": message.get("uid")})
+        elif kind == "t":
+            self.market.count("ws:subscribe")
+            for key in message["k"].split("#"):
+                exch, token = key.split("|", 1)
+                with self.market.lock:
+                    touchline = self.market.instrument(exch, token).touchline()
+                self.tokens.add(token)
+                self.send({"t": "tk", **touchline})
+        elif kind == "u":
+            self.market.count("ws:unsubscribe")
+            for key in message["k"].split("#"):
+                self.tokens.discard(key.split("|", 1)[-1])
+
+
+def serve_websocket(market, port):
+    server = socket.create_server(("127.0.0.1", port), backlog=512)
+    while True:
+        conn, _ = server.accept()
+        session = TouchlineSession(market, conn)
+        threading.Thread(target=session.run, daemon=True).start()
+
+
+# Entrypoint
+def main():
+    parser = argparse.ArgumentParser(description="Local Shoonya REST/websocket stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ws-port", type=int, default=8766)
+    parser.add_argument("--tick-ms", type=float, default=200, help="price step interval")
+    parser.add_argument("--volatility", type=int, default=2, help="max ticks moved per step")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    market = Market(args.volatility, args.seed)
+    http = StubServer(("127.0.0.1", args.port), make_handler(market))
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    threading.Thread(target=serve_websocket, args=(market, args.ws_port), daemon=True).start()
+
+    print(json.dumps({"type": "listening", "port": args.port, "wsPort": args.ws_port}), flush=True)
+    interval = args.tick_ms / 1000
+    next_step = time.monotonic()
+    try:
+        while True:
+            next_step += interval
+            time.sleep(max(0.0, next_step - time.monotonic()))
+            market.step()
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+// Load benchmark for the strategy runtime against a local Shoonya stub
+// (shoonya_stub.py). For each concurrency level it starts N scalping
+// strategies on the worker pool, lets them warm up, then measures over a
+// fixed window:
+//
+//   decisionsPerSecPerStrategy  main-loop passes ("Current Position" events)
+//   tickToOrderMs               price change -> order arrival, seen by the stub
+//   brokerCallsPerMin           REST calls the stub served, total and per strategy
+//   rssMbPerStrategy            resident memory of the Python hosts / strategies
+//   startupMs                   start -> first decision
+//
+// Results are written as JSON (with the git revision) so two runs can be
+// diffed for regressions:
+//
+//   node benchmarks/strategyLoad.js [--levels 1,10,50,100,250,500] [--duration 30]
+//                                   [--warmup 60] [--pacing 0.1] [--symbols 20] [--out file]
+//   node benchmarks/strategyLoad.js --compare baseline.json current.json [--tolerance 0.1]
+const { spawn, execSync } = require("child_process");
+const fs = require("fs");
+const path = require("path");
+
+const parseArgs = (argv) => {
+  const args = { _: [] };
+  for (let i = 0; i < argv.length; i++) {
+    if (argv[i].startsWith("--")) args[argv[i].slice(2)] = argv[++i];
+    else args._.push(argv[i]);
+  }
+  return args;
+};
+
+const args = parseArgs(process.argv.slice(2));
+const LEVELS = (args.levels || "1,10,50,100,250,500").split(",").map(Number);
+const DURATION_S = Number(args.duration || 30);
+const WARMUP_S = Number(args.warmup || 60);
+const PACING = args.pacing || "0.1";
+const SYMBOLS = Number(args.symbols || 20);
+const STUB_PORT = Number(args.port || 8765);
+const TOLERANCE = Number(args.tolerance || 0.1);
+const RESULTS_DIR = path.join(__dirname, "results");
+const STUB_SCRIPT = path.join(__dirname, "shoonya_stub.py");
+
+// Metrics compared between runs, and which direction is better
+const METRICS = {
+  decisionsPerSecPerStrategy: "higher",
+  "tickToOrderMs.p50": "lower",
+  "tickToOrderMs.p99": "lower",
+  brokerCallsPerMinPerStrategy: "lower",
+  rssMbPerStrategy: "lower",
+  "startupMs.p50": "lower",
+  "startupMs.p99": "lower",
+};
+
+const STUB_URL = `http://127.0.0.1:${STUB_PORT}`;
+
+const percentiles = (samples) => {
+  if (!samples.length) return { count: 0, p50: null, p99: null, max: null };
+  const sorted = [...samples].sort((a, b) => a - b);
+  const pick = (q) => sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))];
+  return {
+    count: sorted.length,
+    p50: +pick(0.5).toFixed(2),
+    p99: +pick(0.99).toFixed(2),
+    max: +sorted[sorted.length - 1].toFixed(2),
+  };
+};
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const gitRevision = () => {
+  try {
+    const rev = execSync("git rev-parse --short HEAD", { cwd: __dirname }).toString().trim();
+    const dirty = execSync("git status --porcelain", { cwd: __dirname }).toString().trim();
+    return dirty ? `${rev}-dirty` : rev;
+  } catch (err) {
+    return "unknown";
+  }
+};
+
+const rssMb = (pid) => {
+  try {
+    const status = fs.readFileSync(`/proc/${pid}/status`, "utf8");
+    const match = status.match(/VmRSS:\s+(\d+) kB/);
+    return match ? Number(match[1]) / 1024 : 0;
+  } catch (err) {
+    return 0;
+  }
+};
+
+const startStub = () =>
+  new Promise((resolve, reject) => {
+    const stub = spawn("python3", [
+      "-u", STUB_SCRIPT, "--port", String(STUB_PORT), "--ws-port", String(STUB_PORT + 1), "--seed", "1",
+    ]);
+    stub.stderr.on("data", (data) => process.stderr.write(`[stub] ${data}`));
+    stub.stdout.once("data", () => resolve(stub));
+    stub.once("exit", (code) => reject(new Error(`stub exited with code ${code}`)));
+  });
+
+const stubStats = async () => (await fetch(`${STUB_URL}/stats`)).json();
+const resetStub = () => fetch(`${STUB_URL}/reset`, { method: "POST" });
+
+// Closing time far enough out that no strategy starts its end-of-day exit
+const closingTime = () => {
+  const later = new Date(Date.now() + 2 * 60 * 60 * 1000);
+  if (later.getDate() !== new Date().getDate()) return "23:59:59";
+  return later.toTimeString().slice(0, 8);
+};
+
+// Distinct accounts per level so positions from an earlier level don't leak in
+const strategyParams = (level, index) => ({
+  token: "JBSWY3DPEHPK3PXP",
+  user: `bench-${level}-${index}`,
+  password: "bench",
+  vc: "bench",
+  app_key: "bench",
+  imei: "bench",
+  exch: "NSE",
+  stock_name: `BENCH${index % SYMBOLS}-EQ`,
+  price_type: "LMT",
+  initial_buy_price: 1000,
+  target_price_diff: 0.1,
+  entry_diff_price: 0.1,
+  lot_size: 1,
+  max_open_position: 5,
+  duration: 600,
+  market_closing_time: closingTime(),
+  debug_on: "False",
+  params_version: 0,
+});
+
+const runLevel = async (pool, level) => {
+  const runs = [];
+  for (let i = 0; i < level; i++) {
+    const run = { startedAt: Date.now(), firstDecisionAt: null, decisions: 0, exited: false, errors: 0 };
+    run.session = pool.startStrategyProcess(`load-${level}-${i}`, strategyParams(level, i));
+    run.session.on("frame", (frame) => {
+      if (frame.tag === "Current Position") {
+        run.decisions += 1;
+        if (run.firstDecisionAt === null) run.firstDecisionAt = Date.now();
+      } else if (frame.tag === "Strategy Error" || frame.tag === "API Error") {
+        run.errors += 1;
+      }
+    });
+    run.session.once("exit", () => {
+      run.exited = true;
+    });
+    runs.push(run);
+  }
+
+  // Warm up until every strategy has made its first decision
+  const warmupEnds = Date.now() + WARMUP_S * 1000;
+  while (Date.now() < warmupEnds && runs.some((run) => run.firstDecisionAt === null && !run.exited)) {
+    await sleep(100);
+  }
+
+  await resetStub();
+  const baseline = runs.map((run) => run.decisions);
+  const windowStart = Date.now();
+  await sleep(DURATION_S * 1000);
+  const windowS = (Date.now() - windowStart) / 1000;
+  const stats = await stubStats();
+  const hosts = pool.poolStats().hosts;
+  const totalRss = hosts.reduce((sum, host) => sum + rssMb(host.pid), 0);
+
+  for (const run of runs) run.session.stop();
+  const stopDeadline = Date.now() + 15000;
+  while (Date.now() < stopDeadline && runs.some((run) => !run.exited)) await sleep(100);
+
+  const decisionRates = runs.map((run, i) => (run.decisions - baseline[i]) / windowS);
+  const restCalls = Object.entries(stats.calls)
+    .filter(([route]) => !route.startsWith("ws:"))
+    .reduce((sum, [, count]) => sum + count, 0);
+
+  return {
+    strategies: level,
+    hosts: hosts.length,
+    windowS: +windowS.toFixed(2),
+    decisionsPerSecPerStrategy: +(decisionRates.reduce((a, b) => a + b, 0) / level).toFixed(3),
+    minDecisionsPerSec: +Math.min(...decisionRates).toFixed(3),
+    tickToOrderMs: percentiles(stats.orderLatencyMs),
+    brokerCallsPerMin: +((restCalls / windowS) * 60).toFixed(1),
+    brokerCallsPerMinPerStrategy: +((restCalls / windowS) * 60 / level).toFixed(2),
+    brokerCalls: stats.calls,
+    rssMbTotal: +totalRss.toFixed(1),
+    rssMbPerStrategy: +(totalRss / level).toFixed(2),
+    startupMs: percentiles(
+      runs.filter((run) => run.firstDecisionAt !== null).map((run) => run.firstDecisionAt - run.startedAt)
+    ),
+    notStarted: runs.filter((run) => run.firstDecisionAt === null).length,
+    errors: runs.reduce((sum, run) => sum + run.errors, 0),
+  };
+};
+
+const runBenchmark = async () => {
+  // The pool reads its config and the strategies inherit these at spawn
+  process.env.SHOONYA_HOST = `${STUB_URL}/NorenWClientTP/`;
+  process.env.SHOONYA_WEBSOCKET = `ws://127.0.0.1:${STUB_PORT + 1}/NorenWSTP/`;
+  process.env.STRATEGY_PACING_SCALE = PACING;
+  const pool = require("../services/strategyWorkerPool");
+  pool.startPool();
+
+  const stub = await startStub();
+  const levels = [];
+  try {
+    await pool.whenPoolReady();
+    for (const level of LEVELS) {
+      console.error(`Running ${level} strategies...`);
+      const result = await runLevel(pool, level);
+      console.error(JSON.stringify(result));
+      levels.push(result);
+    }
+  } finally {
+    pool.shutdownPool();
+    stub.kill();
+  }
+
+  const report = {
+    benchmark: "strategyLoad",
+    revision: gitRevision(),
+    recordedAt: new Date().toISOString(),
+    node: process.version,
+    config: { levels: LEVELS, durationS: DURATION_S, pacingScale: Number(PACING), symbols: SYMBOLS },
+    levels,
+  };
+  const out =
+    args.out || path.join(RESULTS_DIR, `strategy-load-${report.revision}-${Date.now()}.json`);
+  fs.mkdirSync(path.dirname(out), { recursive: true });
+  fs.writeFileSync(out, JSON.stringify(report, null, 2) + "\n");
+  console.log(out);
+};
+
+const metricValue = (level, metric) =>
+  metric.split(".").reduce((value, key) => (value == null ? null : value[key]), level);
+
+// Flags every metric that moved the wrong way by more than the tolerance
+const compareReports = (baselineFile, currentFile) => {
+  const baseline = JSON.parse(fs.readFileSync(baselineFile, "utf8"));
+  const current = JSON.parse(fs.readFileSync(currentFile, "utf8"));
+  const rows = [];
+  for (const level of current.levels) {
+    const before = baseline.levels.find((item) => item.strategies === level.strategies);
+    if (!before) continue;
+    for (const [metric, better] of Object.entries(METRICS)) {
+      const from = metricValue(before, metric);
+      const to = metricValue(level, metric);
+      if (from == null || to == null || from === 0) continue;
+      const change = (to - from) / Math.abs(from);
+      const regression = better === "higher" ? change < -TOLERANCE : change > TOLERANCE;
+      rows.push({ strategies: level.strategies, metric, from, to, change: +(change * 100).toFixed(1), regression });
+    }
+  }
+  console.log(JSON.stringify({ baseline: baseline.revision, current: current.revision, tolerance: TOLERANCE, rows }, null, 2));
+  return rows.some((row) => row.regression);
+};
+
+if (args.compare) {
+  const regressed = compareReports(args.compare, args._[0]);
+  process.exit(regressed ? 1 : 0);
+} else {
+  runBenchmark().catch((err) => {
+    console.error(err);
+    process.exit(1);
+  });
+}
@@ -0,0 +1,105 @@
+// Cold vs. warm strategy start: time from "start" to the strategy code
+// receiving its params (the "Received Params" log line), which is the last
+// step before login and the first quote.
+//
+//   node benchmarks/workerStartup.js [runs]
+process.env.STRATEGY_POOL_SIZE = process.env.STRATEGY_POOL_SIZE || "4";
+
+const { spawn } = require("child_process");
+const path = require("path");
+const {
+  startPool,
+  startStrategyProcess,
+  whenPoolReady,
+  shutdownPool,
+} = require("../services/strategyWorkerPool");
+
+const RUNS = parseInt(process.argv[2] || "10", 10);
+const SCRIPT = path.join(__dirname, "../strategies/scalping_strategy.py");
+
+// Dummy credentials: the run is killed as soon as params are received
+const PARAMS = {
+  token: "BENCHMARK",
+  user: "bench",
+  password: "bench",
+  vc: "bench",
+  app_key: "bench",
+  imei: "bench",
+  exch: "NSE",
+  stock_name: "BENCH-EQ",
+  price_type: "MKT",
+  initial_buy_price: 100,
+  target_price_diff: 1,
+  entry_diff_price: 1,
+  lot_size: 1,
+  max_open_position: 1,
+  duration: 1,
+  market_closing_time: "15:30:00",
+  debug_on: "False",
+};
+
+const waitForOutput = (child, startedAt) =>
+  new Promise((resolve, reject) => {
+    let output = "";
+    child.stdout.on("data", (data) => {
+      output += data.toString();
+      if (output.includes('"Received Params"')) {
+        const elapsedMs = Number(process.hrtime.bigint() - startedAt) / 1e6;
+        child.kill();
+        resolve(elapsedMs);
+      }
+    });
+    child.once("exit", (code) => reject(new Error(`worker exited with code ${code}`)));
+  });
+
+const coldStart = () => {
+  const startedAt = process.hrtime.bigint();
+  const python = spawn("python3", ["-u", SCRIPT]);
+  python.stdin.write(JSON.stringify(PARAMS));
+  python.stdin.end();
+  return waitForOutput(python, startedAt);
+};
+
+const warmStart = async (run) => {
+  await whenPoolReady();
+  const startedAt = process.hrtime.bigint();
+  const session = startStrategyProcess(`bench-${run}`, PARAMS);
+  return new Promise((resolve, reject) => {
+    session.on("frame", (frame) => {
+      if (frame.tag !== "Received Params") return;
+      resolve(Number(process.hrtime.bigint() - startedAt) / 1e6);
+      session.stop();
+    });
+    session.once("exit", (code) => reject(new Error(`strategy exited with code ${code}`)));
+  });
+};
+
+const summarize = (samples) => {
+  const sorted = [...samples].sort((a, b) => a - b);
+  const pick = (q) => sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))];
+  return {
+    runs: sorted.length,
+    minMs: +sorted[0].toFixed(2),
+    p50Ms: +pick(0.5).toFixed(2),
+    p95Ms: +pick(0.95).toFixed(2),
+    maxMs: +sorted[sorted.length - 1].toFixed(2),
+  };
+};
+
+const main = async () => {
+  startPool();
+  const cold = [];
+  const warm = [];
+  for (let i = 0; i < RUNS; i++) {
+    cold.push(await coldStart());
+    warm.push(await warmStart(i));
+  }
+  shutdownPool();
+  console.log(JSON.stringify({ cold: summarize(cold), warm: summarize(warm) }, null, 2));
+};
+
+main().catch((err) => {
+  console.error(err);
+  shutdownPool();
+  process.exit(1);
+});
@@ -0,0 +1,64 @@
+const pool = require("../config/db");
+
+// Accounts the authenticated user may fan out onto, and the users allowed
+// to fan out onto the authenticated user's account
+const getLinkedAccounts = async (req, res) => {
+  try {
+    const [accounts] = await pool.query(
+      "SELECT account_user_id, created_at FROM linked_accounts WHERE owner_user_id = ?",
+      [req.user.id]
+    );
+    const [owners] = await pool.query(
+      "SELECT owner_user_id, created_at FROM linked_accounts WHERE account_user_id = ?",
+      [req.user.id]
+    );
+    res.json({ accounts, owners });
+  } catch (err) {
+    console.error(err);
+    res.status(500).json({ error: "Failed to fetch linked accounts" });
+  }
+};
+
+// The account holder lets body.owner_user_id mirror strategies onto their account
+const linkAccount = async (req, res) => {
+  const ownerId = Number(req.body.owner_user_id);
+  if (!Number.isInteger(ownerId) || ownerId <= 0) {
+    return res.status(400).json({ error: "owner_user_id is required" });
+  }
+  if (ownerId === req.user.id) {
+    return res.status(400).json({ error: "Your own account is always traded by your strategies" });
+  }
+
+  try {
+    await pool.query(
+      "INSERT IGNORE INTO linked_accounts (owner_user_id, account_user_id) VALUES (?, ?)",
+      [ownerId, req.user.id]
+    );
+    res.status(201).json({ message: "Account linked", owner_user_id: ownerId });
+  } catch (err) {
+    console.error(err);
+    res.status(500).json({ error: "Failed to link account" });
+  }
+};
+
+// The account holder withdraws :ownerId's access; running fan-outs keep
+// their sessions until they stop
+const unlinkAccount = async (req, res) => {
+  try {
+    const [result] = await pool.query(
+      "DELETE FROM linked_accounts WHERE owner_user_id = ? AND account_user_id = ?",
+      [req.params.ownerId, req.user.id]
+    );
+    if (result.affectedRows === 0) return res.status(404).json({ error: "Link not found" });
+    res.json({ message: "Account unlinked" });
+  } catch (err) {
+    console.error(err);
+    res.status(500).json({ error: "Failed to unlink account" });
+  }
+};
+
+module.exports = {
+  getLinkedAccounts,
+  linkAccount,
+  unlinkAccount,
+};
@@ -1,9 +1,227 @@
-const { spawn } = require("child_process");
-const path = require("path");
 const pool = require("../config/db");
+const { startStrategy, profileSession, clusterStats } = require("../services/strategyCluster");
+const { createEventStream } = require("../services/strategyIpc");
+const { feedFor } = require("../services/strategyFeed");
+const { recordRun } = require("../services/runRecorder");
+const { MARKET_OPEN_AT } = require("../services/warmupScheduler");
+const { findOwnedStrategy } = require("../services/strategyOwnership");
 
 const runningProcesses = new Map();
 
+const STRATEGY_COMMANDS = new Set(["pause", "resume", "square_off", "stop"]);
+// Gap between armed starts, so a warmup does not log every account in at once
+const WARMUP_STAGGER_MS = parseInt(process.env.STRATEGY_WARMUP_STAGGER_MS || "200", 10);
+// How long an edit waits for a running strategy to apply (or reject) it
+const PARAMS_ACK_MS = parseInt(process.env.STRATEGY_PARAMS_ACK_MS || "5000", 10);
+
+// The browser's time input sends "HH:MM"; the strategy parses "HH:MM:SS"
+const toClockTime = (value) => {
+  const time = String(value ?? "");
+  return /^\d{1,2}:\d{2}$/.test(time) ? `${time}:00` : time;
+};
+
+// scalping_strategy row -> params understood by scalping_strategy.py
+const toStrategyParams = (strategy) => ({
+  exch: strategy.exch,
+  stock_name: strategy.StocksName,
+  price_type: strategy.price_type,
+  initial_buy_price: strategy.initialBuyPrice,
+  target_price_diff: strategy.targetPriceDiff,
+  entry_diff_price: strategy.entryDiffPrice,
+  lot_size: strategy.lotSize,
+  max_open_position: strategy.maxOpenPosition,
+  duration: strategy.duration,
+  market_closing_time: toClockTime(strategy.marketClosingTime),
+  debug_on: Number(strategy.debugOn) === 1 ? "True" : "False",
+  // Optional order-working knobs; left undefined (dropped from the JSON) the
+  // strategy uses its defaults, so NULL columns become undefined too
+  chase_ticks: strategy.chaseTicks ?? undefined,
+  order_timeout: strategy.orderTimeout ?? undefined,
+  // Ladder direction ("long" | "short") and product ("C" delivery | "I"
+  // intraday); a short ladder defaults to, and requires, "I"
+  side: strategy.side ?? undefined,
+  product_type: strategy.productType ?? undefined,
+  intraday_margin: strategy.intradayMargin ?? undefined,
+});
+
+const LADDER_SIDES = ["long", "short"];
+const PRODUCT_TYPES = ["C", "I"]; // CNC (delivery), MIS (intraday)
+
+const isBlank = (value) => value === undefined || value === null || value === "";
+
+// Optional strategy columns from a create/update body -> { values } with
+// blanks as NULL, or { error } naming the first invalid one
+const optionalStrategyFields = (body) => {
+  const values = {
+    chaseTicks: isBlank(body.chaseTicks) ? null : Number(body.chaseTicks),
+    orderTimeout: isBlank(body.orderTimeout) ? null : Number(body.orderTimeout),
+    side: isBlank(body.side) ? null : String(body.side),
+    productType: isBlank(body.productType) ? null : String(body.productType),
+    intradayMargin: isBlank(body.intradayMargin) ? null : Number(body.intradayMargin),
+  };
+  if (values.chaseTicks !== null && !(Number.isInteger(values.chaseTicks) && values.chaseTicks >= 0)) {
+    return { error: "chaseTicks must be a whole number of ticks (0 or more)" };
+  }
+  if (values.orderTimeout !== null && !(values.orderTimeout > 0)) {
+    return { error: "orderTimeout must be a positive number of seconds" };
+  }
+  if (values.side !== null && !LADDER_SIDES.includes(values.side)) {
+    return { error: `side must be one of ${LADDER_SIDES.join(", ")}` };
+  }
+  if (values.productType !== null && !PRODUCT_TYPES.includes(values.productType)) {
+    return { error: `productType must be one of ${PRODUCT_TYPES.join(", ")}` };
+  }
+  // Shorts are intraday only; a blank productType defaults to "I" for them
+  if (values.side === "short" && values.productType === "C") {
+    return { error: "A short ladder must use productType I (intraday)" };
+  }
+  if (values.intradayMargin !== null && !(values.intradayMargin > 0 && values.intradayMargin <= 1)) {
+    return { error: "intradayMargin must be a fraction of notional between 0 and 1" };
+  }
+  // The strategy cannot size an intraday ladder without it (see scalping_strategy.py)
+  const intraday = values.productType === "I" || (values.productType === null && values.side === "short");
+  if (intraday && values.intradayMargin === null) {
+    return { error: "intradayMargin is required for intraday (productType I) ladders" };
+  }
+  return { values };
+};
+
+const isPositiveInt = (value) => /^\d+$/.test(String(value)) && Number(value) > 0;
+
+// The pairs query (see toPairsParams) -> an error naming the first invalid
+// field, or null. Numbers arrive as strings and go to the strategy as such,
+// so anything it could not parse is turned away here.
+const pairsQueryError = (query) => {
+  if (!/^[^|]+\|[^|]+$/.test(String(query.leg || ""))) return "leg is required as EXCH|SYMBOL";
+  if (!isBlank(query.qty) && !isPositiveInt(query.qty)) return "qty must be a positive whole number";
+  if (!isBlank(query.lookback) && !(isPositiveInt(query.lookback) && Number(query.lookback) >= 2)) {
+    return "lookback must be a whole number of samples (2 or more)";
+  }
+  for (const knob of ["hedge_ratio", "entry_z", "stop_z"]) {
+    if (!isBlank(query[knob]) && !(Number(query[knob]) > 0)) return `${knob} must be a positive number`;
+  }
+  if (!isBlank(query.exit_z) && !(Number(query.exit_z) >= 0)) return "exit_z must be 0 or more";
+  if (!isBlank(query.product_type) && !PRODUCT_TYPES.includes(query.product_type)) {
+    return `product_type must be one of ${PRODUCT_TYPES.join(", ")}`;
+  }
+  return null;
+};
+
+// scalping_strategy row (leg A) plus ?leg=EXCH|SYMBOL&qty= (leg B) and the
+// spread knobs -> params understood by pairs_strategy.py. Knobs left out of
+// the query fall back to the strategy's defaults.
+const toPairsParams = (strategy, query) => {
+  const [exch, stockName] = String(query.leg || "").split("|");
+  return {
+    ...toStrategyParams(strategy),
+    strategy_type: "pairs",
+    legs: [
+      { exch: strategy.exch, stock_name: strategy.StocksName, quantity: strategy.lotSize },
+      { exch, stock_name: stockName, quantity: query.qty || strategy.lotSize },
+    ],
+    hedge_ratio: query.hedge_ratio,
+    lookback: query.lookback,
+    entry_z: query.entry_z,
+    exit_z: query.exit_z,
+    stop_z: query.stop_z,
+    product_type: query.product_type,
+  };
+};
+
+// shoonya_settings row -> login fields understood by scalping_strategy.py
+const toCredentials = (creds) => ({
+  token: creds.token,
+  user: creds.user_code,
+  password: creds.password,
+  vc: creds.vc,
+  app_key: creds.app_key,
+  imei: creds.imei,
+});
+
+// Attach the browser to a session's shared feed as an SSE viewer at the
+// ?level= (trades | state | debug) and ?fps= (quote rate) it asked for.
+// Returns a function that detaches it. The feed sends "exit" and ends the
+// stream when the strategy finishes (or its host dies).
+const attachViewer = (req, res, session) => {
+  res.writeHead(200, {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    Connection: "keep-alive",
+  });
+  res.flushHeaders();
+
+  // A slow browser only ever delays (or drops) status frames, never the
+  // strategy's stdout pipe or other viewers.
+  const stream = createEventStream(res);
+  const detach = feedFor(session).addViewer(stream, {
+    level: req.query.level,
+    fps: req.query.fps,
+  });
+
+  // Keep-alive ping every 15 seconds
+  const keepAliveInterval = setInterval(stream.ping, 15000);
+  session.once("exit", () => clearInterval(keepAliveInterval));
+
+  return () => {
+    clearInterval(keepAliveInterval);
+    detach();
+  };
+};
+
+// Make a freshly started session reachable for commands, updates and viewers
+// Resolves with the strategy's Params Updated / Params Rejected frame for
+// `version`, or { tag: null } if none arrives within PARAMS_ACK_MS or the
+// session ends first. cancel() stops waiting.
+const awaitParamsAck = (session, version) => {
+  let done;
+  const ack = new Promise((resolve) => {
+    const onFrame = (frame) => {
+      if (frame.tag !== "Params Updated" && frame.tag !== "Params Rejected") return;
+      if (!frame.data || Number(frame.data.version) !== version) return;
+      done(frame);
+    };
+    const timer = setTimeout(() => done({ tag: null }), PARAMS_ACK_MS);
+    done = (frame) => {
+      clearTimeout(timer);
+      session.off("frame", onFrame);
+      session.off("exit", onExit);
+      resolve(frame);
+    };
+    const onExit = () => done({ tag: null });
+    session.on("frame", onFrame);
+    session.once("exit", onExit);
+  });
+  ack.cancel = () => done({ tag: null });
+  return ack;
+};
+
+const registerSession = (strategyId, session) => {
+  session.paramsVersion = 0;
+  runningProcesses.set(String(strategyId), session);
+
+  session.on("frame", (frame) => {
+    if (frame.tag) console.log(`[${strategyId}] ${frame.tag}`);
+  });
+  session.on("exit", () => {
+    if (runningProcesses.get(String(strategyId)) === session) {
+      runningProcesses.delete(String(strategyId));
+    }
+  });
+};
+
+// Register a freshly started session and stream it to the browser that
+// started it; the strategy is stopped if that browser goes away first.
+const streamStrategySession = (req, res, strategyId, session) => {
+  registerSession(strategyId, session);
+
+  const detach = attachViewer(req, res, session);
+  req.on("close", () => {
+    detach();
+    session.stop();
+    console.log(`Client disconnected. Stopping strategy ${strategyId}`);
+  });
+};
+
 const getAllStrategies = async (req, res) => {
   const { user_id } = req.query;
   if (!user_id) return res.status(400).json({ error: "User ID is required" });
@@ -37,14 +255,16 @@ const createStrategy = async (req, res) => {
     debugOn = 0,
     user_id,
   } = req.body;
+  const { values: optional, error } = optionalStrategyFields(req.body);
+  if (error) return res.status(400).json({ error });
 
   try {
     const [result] = await pool.query(
       `INSERT INTO scalping_strategy
       (user_id, exch, StocksName, price_type, initialBuyPrice, buyOnMarket,
       targetPriceDiff, entryDiffPrice, lotSize, maxOpenPosition, duration, stopLoss,
-      marketClosingTime, debugOn)
-      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
+      marketClosingTime, debugOn, chaseTicks, orderTimeout, side, productType, intradayMargin)
+      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
       [
         user_id,
         exch,
@@ -60,6 +280,11 @@ const createStrategy = async (req, res) => {
         stopLoss,
         marketClosingTime,
         debugOn,
+        optional.chaseTicks,
+        optional.orderTimeout,
+        optional.side,
+        optional.productType,
+        optional.intradayMargin,
       ]
     );
 
@@ -86,22 +311,20 @@ const updateStrategy = async (req, res) => {
     stopLoss,
     marketClosingTime,
     debugOn,
-    user_id,
   } = req.body;
+  const { values: optional, error } = optionalStrategyFields(req.body);
+  if (error) return res.status(400).json({ error });
 
   try {
-    const [existing] = await pool.query(
-      "SELECT id FROM scalping_strategy WHERE id = ? AND user_id = ?",
-      [id, user_id]
-    );
-    if (existing.length === 0)
+    if (!(await findOwnedStrategy(id, req.user.id)))
       return res.status(404).json({ error: "Strategy not found" });
 
     await pool.query(
       `UPDATE scalping_strategy SET
         exch = ?, StocksName = ?, price_type = ?, initialBuyPrice = ?, buyOnMarket = ?,
         targetPriceDiff = ?, entryDiffPrice = ?, lotSize = ?, maxOpenPosition = ?,
-        duration = ?, stopLoss = ?, marketClosingTime = ?, debugOn = ?
+        duration = ?, stopLoss = ?, marketClosingTime = ?, debugOn = ?,
+        chaseTicks = ?, orderTimeout = ?, side = ?, productType = ?, intradayMargin = ?
         WHERE id = ?`,
       [
         exch,
@@ -117,10 +340,44 @@ const updateStrategy = async (req, res) => {
         stopLoss,
         marketClosingTime,
         debugOn,
+        optional.chaseTicks,
+        optional.orderTimeout,
+        optional.side,
+        optional.productType,
+        optional.intradayMargin,
         id,
       ]
     );
 
+    // Push the row as saved into the running session, if any, and report
+    // what the strategy made of it. The version lets the strategy drop
+    // out-of-order updates and tags its Params Updated / Rejected event.
+    const session = runningProcesses.get(String(id));
+    if (session) {
+      const strategy = await findOwnedStrategy(id, req.user.id);
+      const version = session.paramsVersion + 1;
+      const ack = awaitParamsAck(session, version);
+      if (session.command("update_params", { version, params: toStrategyParams(strategy) })) {
+        session.paramsVersion = version;
+        console.log(`Strategy ${id}: params v${version} sent to running session`);
+        const { tag, data } = await ack;
+        if (tag === "Params Updated") {
+          return res.json({ message: "Strategy updated", paramsVersion: version, changes: data.changes });
+        }
+        if (tag === "Params Rejected") {
+          return res.status(409).json({
+            error: `Saved, but the running strategy rejected it: ${data.reason}`,
+            paramsVersion: version,
+          });
+        }
+        return res.status(504).json({
+          error: "Saved, but the running strategy did not confirm the update",
+          paramsVersion: version,
+        });
+      }
+      ack.cancel();
+    }
+
     res.json({ message: "Strategy updated" });
   } catch (err) {
     console.error(err);
@@ -163,6 +420,15 @@ const runScalpingStrategyWithData = async (req, res) => {
   const strategyId = req.params.id;
   console.log(`Starting scalping strategy with ID: ${strategyId}`);
 
+  // Armed by the warmup and already running: starting it from the browser
+  // only watches it (the warmup, not this browser, owns its lifetime)
+  const armed = runningProcesses.get(String(strategyId));
+  if (armed && armed.armed) {
+    const detach = attachViewer(req, res, armed);
+    req.on("close", detach);
+    return;
+  }
+
   try {
     // Fetch strategy details from DB
     const [strategyResult] = await pool.query(
@@ -191,92 +457,253 @@ const runScalpingStrategyWithData = async (req, res) => {
     const creds = shoonyaResult[0];
     console.log("Shoonya Token:", creds.token);
 
-    const scriptPath = path.join(
-      __dirname,
-      "../strategies/scalping_strategy.py"
-    );
+    if (runningProcesses.has(String(strategyId))) {
+      return res.status(409).json({ error: "Strategy is already running" });
+    }
 
-    const args = [scriptPath];
-    const python = spawn("python3", ["-u", ...args]);
-
-    python.stdin.write(
-      JSON.stringify({
-        token: creds.token,
-        user: creds.user_code,
-        password: creds.password,
-        vc: creds.vc,
-        app_key: creds.app_key,
-        imei: creds.imei,
-        exch: strategy.exch,
-        stock_name: strategy.StocksName,
-        price_type: strategy.price_type,
-        initial_buy_price: strategy.initialBuyPrice,
-        target_price_diff: strategy.targetPriceDiff,
-        entry_diff_price: strategy.entryDiffPrice,
-        lot_size: strategy.lotSize,
-        max_open_position: strategy.maxOpenPosition,
-        duration: strategy.duration,
-        market_closing_time: strategy.marketClosingTime,
-        debug_on: strategy.debugOn === 1 ? "True" : "False",
-      })
-    );
-    python.stdin.end();
+    // Hand params to a pre-warmed worker, here or on a strategy node
+    // (see services/strategyWorkerPool.js and services/strategyCluster.js)
+    const session = startStrategy(strategyId, {
+      ...toCredentials(creds),
+      ...toStrategyParams(strategy),
+      params_version: 0,
+    });
+    recordRun(session, {
+      strategyId: strategy.id,
+      userId: strategy.user_id,
+      account: creds.user_code,
+      symbol: session.symbol,
+      params: toStrategyParams(strategy),
+    });
+    streamStrategySession(req, res, strategyId, session);
+  } catch (err) {
+    console.error(err);
+    if (res.headersSent) {
+      res.write(`data: [ERROR] ${err.message}\n\n`);
+      res.end();
+    } else {
+      res.status(500).json({ error: "Failed to start strategy" });
+    }
+  }
+};
+
+// Pre-market warmup (see services/warmupScheduler.js): start every configured
+// strategy, or only `userId`'s, armed for `openAt` so its login and setup are
+// done before the open. Strategies already running are left alone, and so
+// are users without Shoonya credentials.
+const armStrategies = async (openAt, { userId } = {}) => {
+  const [rows] = await pool.query(
+    `SELECT s.*, c.user_code, c.password, c.vc, c.app_key, c.imei, c.token
+       FROM scalping_strategy s
+       JOIN shoonya_settings c ON c.user_id = s.user_id
+      ${userId ? "WHERE s.user_id = ?" : ""}
+      ORDER BY s.id`,
+    userId ? [userId] : []
+  );
+
+  const armed = [];
+  const skipped = [];
+  for (const strategy of rows) {
+    const strategyId = String(strategy.id);
+    if (runningProcesses.has(strategyId)) {
+      skipped.push(strategyId);
+      continue;
+    }
+    if (armed.length > 0) await new Promise((resolve) => setTimeout(resolve, WARMUP_STAGGER_MS));
 
-    // Setup SSE headers
-    res.writeHead(200, {
-      "Content-Type": "text/event-stream",
-      "Cache-Control": "no-cache",
-      Connection: "keep-alive",
+    const session = startStrategy(strategyId, {
+      ...toCredentials(strategy),
+      ...toStrategyParams(strategy),
+      arm_at: openAt,
+      params_version: 0,
     });
-    res.flushHeaders();
-
-    // Keep-alive ping every 15 seconds
-    const keepAliveInterval = setInterval(() => {
-      res.write(":\n\n"); // SSE ping
-    }, 15000);
-
-    // Handle Python stdout
-    python.stdout.on("data", (data) => {
-      const lines = data.toString().split(/\r?\n/).filter(Boolean);
-      for (const line of lines) {
-        console.log(line);
-        res.write(`data: ${line}\n\n`);
-      }
+    session.armed = true;
+    recordRun(session, {
+      strategyId: strategy.id,
+      userId: strategy.user_id,
+      account: strategy.user_code,
+      symbol: session.symbol,
+      params: toStrategyParams(strategy),
     });
+    registerSession(strategyId, session);
+    armed.push(strategyId);
+  }
+  return { openAt, armed, skipped };
+};
+
+// Arm the caller's strategies for the next open now rather than at the
+// scheduled warmup; after the open they simply start
+const warmupStrategies = async (req, res) => {
+  try {
+    res.json(await armStrategies(MARKET_OPEN_AT, { userId: req.user.id }));
+  } catch (err) {
+    console.error(err);
+    res.status(500).json({ error: "Failed to arm strategies" });
+  }
+};
+
+// Run one strategy's decisions on the owner's account and mirror every order
+// onto the accounts listed in ?accounts=<user_id>,<user_id> (see fanout.py).
+// Only the strategy's owner may run it, and only onto accounts whose holders
+// linked them to the owner (see linkedAccountsController.js).
+const runScalpingFanout = async (req, res) => {
+  const strategyId = req.params.id;
+  const accountIds = String(req.query.accounts || "")
+    .split(",")
+    .map((id) => id.trim())
+    .filter(Boolean);
+
+  if (accountIds.length === 0) {
+    return res.status(400).json({ error: "accounts is required" });
+  }
 
-    // Handle Python stderr
-    python.stderr.on("data", (data) => {
-      const lines = data.toString().split(/\r?\n/).filter(Boolean);
-      for (const line of lines) {
-        console.error("Python stderr:", line);
-        res.write(`data: [ERROR] ${line}\n\n`);
+  try {
+    const [strategyResult] = await pool.query(
+      "SELECT * FROM scalping_strategy WHERE id = ?",
+      [strategyId]
+    );
+    if (strategyResult.length === 0 || strategyResult[0].user_id !== req.user.id) {
+      return res.status(404).json({ error: "Strategy not found" });
+    }
+    const strategy = strategyResult[0];
+
+    const followerIds = accountIds.filter((id) => id !== String(strategy.user_id));
+    if (followerIds.length > 0) {
+      const [links] = await pool.query(
+        "SELECT account_user_id FROM linked_accounts WHERE owner_user_id = ? AND account_user_id IN (?)",
+        [strategy.user_id, followerIds]
+      );
+      const linked = new Set(links.map((row) => String(row.account_user_id)));
+      const unlinked = followerIds.filter((id) => !linked.has(id));
+      if (unlinked.length > 0) {
+        return res
+          .status(403)
+          .json({ error: `Accounts not linked to you: ${unlinked.join(", ")}` });
       }
-    });
+    }
 
-    // When the Python script exits
-    python.on("close", (code) => {
-      clearInterval(keepAliveInterval);
-      res.write(`data: Script exited with code ${code}\n\n`);
-      res.end();
+    const [shoonyaResult] = await pool.query(
+      "SELECT user_id, user_code, password, vc, app_key, imei, token FROM shoonya_settings WHERE user_id IN (?)",
+      [[strategy.user_id, ...accountIds]]
+    );
+    const leader = shoonyaResult.find((row) => String(row.user_id) === String(strategy.user_id));
+    if (!leader) {
+      return res.status(400).json({ error: "Shoonya credentials not found for user" });
+    }
+    // The owner's own account always leads; listing it again is a no-op
+    const followers = shoonyaResult.filter((row) => row !== leader);
+    const missing = accountIds.filter(
+      (id) =>
+        id !== String(strategy.user_id) &&
+        !followers.some((row) => String(row.user_id) === id)
+    );
+    if (missing.length > 0) {
+      return res
+        .status(400)
+        .json({ error: `Shoonya credentials not found for accounts: ${missing.join(", ")}` });
+    }
+
+    if (runningProcesses.has(String(strategyId))) {
+      return res.status(409).json({ error: "Strategy is already running" });
+    }
+
+    const session = startStrategy(strategyId, {
+      ...toCredentials(leader),
+      ...toStrategyParams(strategy),
+      accounts: followers.map(toCredentials),
+      params_version: 0,
+    });
+    recordRun(session, {
+      strategyId: strategy.id,
+      userId: strategy.user_id,
+      account: leader.user_code,
+      symbol: session.symbol,
+      params: toStrategyParams(strategy),
+      accounts: followers.length + 1,
     });
+    streamStrategySession(req, res, strategyId, session);
+  } catch (err) {
+    console.error(err);
+    if (res.headersSent) {
+      res.write(`data: [ERROR] ${err.message}\n\n`);
+      res.end();
+    } else {
+      res.status(500).json({ error: "Failed to start fan-out" });
+    }
+  }
+};
+
+// Run a strategy as a spread scalp: its own instrument is leg A, the second
+// leg comes from ?leg=EXCH|SYMBOL (see pairs_strategy.py)
+const runPairsStrategy = async (req, res) => {
+  const strategyId = req.params.id;
+  const queryError = pairsQueryError(req.query);
+  if (queryError) {
+    return res.status(400).json({ error: queryError });
+  }
+
+  try {
+    const strategy = await findOwnedStrategy(strategyId, req.user.id);
+    if (!strategy) {
+      return res.status(404).json({ error: "Strategy not found" });
+    }
+
+    const [shoonyaResult] = await pool.query(
+      "SELECT user_id, user_code, password, vc, app_key, imei, token FROM shoonya_settings WHERE user_id = ?",
+      [strategy.user_id]
+    );
+    if (shoonyaResult.length === 0) {
+      return res.status(400).json({ error: "Shoonya credentials not found for user" });
+    }
+    const creds = shoonyaResult[0];
 
-    // If client disconnects
-    req.on("close", () => {
-      clearInterval(keepAliveInterval);
-      python.kill();
-      console.log(`Client disconnected. Stopping strategy ${strategyId}`);
+    if (runningProcesses.has(String(strategyId))) {
+      return res.status(409).json({ error: "Strategy is already running" });
+    }
+
+    const params = toPairsParams(strategy, req.query);
+    const session = startStrategy(strategyId, {
+      ...toCredentials(creds),
+      ...params,
+      params_version: 0,
+    });
+    recordRun(session, {
+      strategyId: strategy.id,
+      userId: strategy.user_id,
+      account: creds.user_code,
+      symbol: session.symbols.join(","),
+      params,
     });
+    streamStrategySession(req, res, strategyId, session);
   } catch (err) {
     console.error(err);
     if (res.headersSent) {
       res.write(`data: [ERROR] ${err.message}\n\n`);
       res.end();
     } else {
-      res.status(500).json({ error: "Failed to start strategy" });
+      res.status(500).json({ error: "Failed to start pairs strategy" });
     }
   }
 };
 
+// Extra dashboards on a running strategy; disconnecting only detaches the viewer
+const watchScalpingStrategy = async (req, res) => {
+  try {
+    if (!(await findOwnedStrategy(req.params.id, req.user.id)))
+      return res.status(404).json({ error: "Strategy not found" });
+  } catch (err) {
+    console.error(err);
+    return res.status(500).json({ error: "Failed to look up strategy" });
+  }
+
+  const session = runningProcesses.get(String(req.params.id));
+  if (!session) {
+    return res.status(404).json({ error: "Strategy is not running" });
+  }
+  const detach = attachViewer(req, res, session);
+  req.on("close", detach);
+};
+
 const stopScalpingScript = async (req, res) => {
   const { strategyId } = req.body;
   console.log("Stop request body:", req.body);
@@ -285,16 +712,93 @@ const stopScalpingScript = async (req, res) => {
     return res.status(400).json({ error: "strategyId is required" });
   }
 
-  const processToKill = runningProcesses.get(String(strategyId));
-  if (!processToKill) {
+  try {
+    if (!(await findOwnedStrategy(strategyId, req.user.id)))
+      return res.status(404).json({ error: "Strategy not found" });
+  } catch (err) {
+    console.error(err);
+    return res.status(500).json({ error: "Failed to look up strategy" });
+  }
+
+  const session = runningProcesses.get(String(strategyId));
+  if (!session) {
     // ✅ Respond gracefully if script already stopped
     return res.status(200).json({ message: "Script already stopped" });
   }
 
-  processToKill.kill();
-  runningProcesses.delete(strategyId);
+  // Sends the strategy a stop command; it stays in runningProcesses (so it
+  // cannot be started twice) until it has actually exited, see registerSession
+  session.stop();
+
+  res.json({ message: `Strategy ${strategyId} is stopping` });
+};
+
+// Forward a runtime command (pause, resume, square_off, stop) to a running strategy
+const sendStrategyCommand = async (req, res) => {
+  const { id } = req.params;
+  const { command } = req.body;
+
+  if (!STRATEGY_COMMANDS.has(command)) {
+    return res.status(400).json({ error: `Unsupported command: ${command}` });
+  }
+
+  try {
+    if (!(await findOwnedStrategy(id, req.user.id)))
+      return res.status(404).json({ error: "Strategy not found" });
+  } catch (err) {
+    console.error(err);
+    return res.status(500).json({ error: "Failed to look up strategy" });
+  }
+
+  const session = runningProcesses.get(String(id));
+  if (!session || !session.command(command)) {
+    return res.status(404).json({ error: "Strategy is not running" });
+  }
+
+  res.json({ message: `Command ${command} sent to strategy ${id}` });
+};
+
+// Capture a CPU (and optionally allocation) profile of the host running a
+// strategy: body { seconds = 10, intervalMs = 5, allocations = false }
+const MAX_PROFILE_SECONDS = 300;
+const profileStrategy = async (req, res) => {
+  try {
+    if (!(await findOwnedStrategy(req.params.id, req.user.id)))
+      return res.status(404).json({ error: "Strategy not found" });
+  } catch (err) {
+    console.error(err);
+    return res.status(500).json({ error: "Failed to look up strategy" });
+  }
+
+  const session = runningProcesses.get(String(req.params.id));
+  if (!session) {
+    return res.status(404).json({ error: "Strategy is not running" });
+  }
+
+  const seconds = Number(req.body.seconds ?? 10);
+  if (!(seconds > 0 && seconds <= MAX_PROFILE_SECONDS)) {
+    return res.status(400).json({ error: `seconds must be in (0, ${MAX_PROFILE_SECONDS}]` });
+  }
+
+  try {
+    const report = await profileSession(session, {
+      seconds,
+      intervalMs: req.body.intervalMs,
+      allocations: Boolean(req.body.allocations),
+    });
+    res.json(report);
+  } catch (err) {
+    console.error(err);
+    const busy = err.message.startsWith("A profile is already");
+    res.status(busy ? 409 : 500).json({ error: err.message });
+  }
+};
 
-  res.json({ message: `Strategy ${strategyId} stopped successfully` });
+// Strategy nodes and what runs on each (coordinator mode only)
+const getClusterStatus = (req, res) => {
+  const stats = clusterStats();
+  if (!stats) return res.status(404).json({ error: "Not running as a strategy coordinator" });
+  res.json(stats);
 };
 
 // console.log("Stop request body:", req.body);
@@ -305,5 +809,13 @@ module.exports = {
   updateStrategy,
   deleteStrategy,
   runScalpingStrategyWithData,
+  runScalpingFanout,
+  runPairsStrategy,
+  watchScalpingStrategy,
   stopScalpingScript,
+  sendStrategyCommand,
+  profileStrategy,
+  armStrategies,
+  warmupStrategies,
+  getClusterStatus,
 };
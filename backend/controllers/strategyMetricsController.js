@@ -0,0 +1,136 @@
+const pool = require("../config/db");
+const { findOwnedStrategy } = require("../services/strategyOwnership");
+
+const DEFAULT_RANGE_DAYS = 7;
+const MAX_RUNS = 500;
+
+// ?from=&to= as dates; defaults to the last week
+const parseRange = (query) => {
+  const to = query.to ? new Date(query.to) : new Date();
+  const from = query.from
+    ? new Date(query.from)
+    : new Date(to.getTime() - DEFAULT_RANGE_DAYS * 24 * 60 * 60 * 1000);
+  if (Number.isNaN(from.getTime()) || Number.isNaN(to.getTime())) return null;
+  return { from, to };
+};
+
+const getStrategyRuns = async (req, res) => {
+  const range = parseRange(req.query);
+  if (!range) return res.status(400).json({ error: "Invalid from/to" });
+
+  try {
+    if (!(await findOwnedStrategy(req.params.id, req.user.id)))
+      return res.status(404).json({ error: "Strategy not found" });
+
+    const [runs] = await pool.query(
+      `SELECT id, symbol, accounts, started_at, ended_at, exit_code,
+        initial_cash, final_cash, profit, fills
+       FROM strategy_runs
+       WHERE strategy_id = ? AND started_at >= ? AND started_at < ?
+       ORDER BY started_at DESC LIMIT ?`,
+      [req.params.id, range.from, range.to, MAX_RUNS]
+    );
+    res.json(runs);
+  } catch (err) {
+    console.error(err);
+    res.status(500).json({ error: "Failed to fetch runs" });
+  }
+};
+
+const getRunFills = async (req, res) => {
+  try {
+    const [runs] = await pool.query(
+      "SELECT id, strategy_id, started_at, ended_at FROM strategy_runs WHERE id = ?",
+      [req.params.runId]
+    );
+    if (runs.length === 0 || !(await findOwnedStrategy(runs[0].strategy_id, req.user.id)))
+      return res.status(404).json({ error: "Run not found" });
+
+    // Bounding ts by the run's lifetime lets MySQL prune to its partitions
+    const run = runs[0];
+    const [fills] = await pool.query(
+      `SELECT ts, account, kind, side, qty, price, order_no, latency_ms
+       FROM strategy_fills
+       WHERE run_id = ? AND ts >= ? AND ts <= ?
+       ORDER BY ts`,
+      [run.id, run.started_at, run.ended_at || new Date()]
+    );
+    res.json(fills);
+  } catch (err) {
+    console.error(err);
+    res.status(500).json({ error: "Failed to fetch fills" });
+  }
+};
+
+// Snapshots bucketed to ?bucket= seconds (default 60)
+const getStrategyMetrics = async (req, res) => {
+  const range = parseRange(req.query);
+  const bucket = Math.max(1, parseInt(req.query.bucket || "60", 10) || 60);
+  if (!range) return res.status(400).json({ error: "Invalid from/to" });
+
+  try {
+    if (!(await findOwnedStrategy(req.params.id, req.user.id)))
+      return res.status(404).json({ error: "Strategy not found" });
+
+    const [rows] = await pool.query(
+      `SELECT FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP(ts) / ?) * ?) AS bucket,
+        MIN(ltp) AS ltp_low, MAX(ltp) AS ltp_high, AVG(ltp) AS ltp_avg,
+        MAX(net_qty) AS net_qty_max, MAX(ladder_depth) AS ladder_depth_max,
+        AVG(avg_price) AS avg_price
+       FROM strategy_snapshots
+       WHERE strategy_id = ? AND ts >= ? AND ts < ?
+       GROUP BY bucket ORDER BY bucket`,
+      [bucket, bucket, req.params.id, range.from, range.to]
+    );
+    res.json(rows);
+  } catch (err) {
+    console.error(err);
+    res.status(500).json({ error: "Failed to fetch metrics" });
+  }
+};
+
+// Per-day PnL and fill latency
+const getStrategyPerformance = async (req, res) => {
+  const range = parseRange(req.query);
+  if (!range) return res.status(400).json({ error: "Invalid from/to" });
+
+  try {
+    if (!(await findOwnedStrategy(req.params.id, req.user.id)))
+      return res.status(404).json({ error: "Strategy not found" });
+
+    const [[days], [latency]] = await Promise.all([
+      pool.query(
+        `SELECT DATE(started_at) AS day, COUNT(*) AS runs, SUM(profit) AS profit, SUM(fills) AS fills
+         FROM strategy_runs
+         WHERE strategy_id = ? AND started_at >= ? AND started_at < ?
+         GROUP BY day ORDER BY day`,
+        [req.params.id, range.from, range.to]
+      ),
+      pool.query(
+        `SELECT DATE(ts) AS day, AVG(latency_ms) AS latency_avg_ms, MAX(latency_ms) AS latency_max_ms
+         FROM strategy_fills
+         WHERE strategy_id = ? AND ts >= ? AND ts < ?
+         GROUP BY day`,
+        [req.params.id, range.from, range.to]
+      ),
+    ]);
+    const latencyByDay = new Map(latency.map((row) => [String(row.day), row]));
+    res.json(
+      days.map((row) => ({
+        ...row,
+        latency_avg_ms: latencyByDay.get(String(row.day))?.latency_avg_ms ?? null,
+        latency_max_ms: latencyByDay.get(String(row.day))?.latency_max_ms ?? null,
+      }))
+    );
+  } catch (err) {
+    console.error(err);
+    res.status(500).json({ error: "Failed to fetch performance" });
+  }
+};
+
+module.exports = {
+  getStrategyRuns,
+  getRunFills,
+  getStrategyMetrics,
+  getStrategyPerformance,
+};
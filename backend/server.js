@@ -13,6 +13,12 @@ const authRoutes = require("./Routes/authRoutes");
 const scalpingRoutes = require("./Routes/scalpingRoutes");
 const shoonyaRoutes = require("./Routes/shoonyaRoutes");
 const circuitRoutes = require("./Routes/circuitRoutes"); // ✅ Added
+const { ensureMetricsSchema, flushMetrics } = require("./services/runRecorder");
+const { ensureStrategySchema } = require("./services/strategySchema");
+const { scheduleWarmup } = require("./services/warmupScheduler");
+const { armStrategies } = require("./controllers/scalpingController");
+const { setupCluster } = require("./services/strategyCluster");
+const { startPool } = require("./services/strategyWorkerPool");
 
 dotenv.config();
 const app = express();
@@ -42,6 +48,28 @@ app.use("/api/scalping", scalpingRoutes);
 app.use("/api/shoonya", shoonyaRoutes);
 app.use("/api/circuit", circuitRoutes); // ✅ Circuit endpoints
 
+// Fan-out account links
+ensureStrategySchema().catch((err) =>
+  console.error("❌ Strategy schema setup failed:", err.message)
+);
+
+// Run/metrics tables (strategy_runs, strategy_fills, strategy_snapshots)
+ensureMetricsSchema().catch((err) =>
+  console.error("❌ Metrics schema setup failed:", err.message)
+);
+
+// Warm Python workers for strategies run here (STRATEGY_POOL_SIZE)
+startPool();
+
+// Coordinator for remote strategy nodes (when STRATEGY_CLUSTER=coordinator)
+setupCluster();
+
+// Arm every configured strategy before the open (when STRATEGY_WARMUP_AT is set)
+scheduleWarmup(armStrategies);
+
+// Don't lose buffered fills/snapshots on a normal shutdown
+process.on("SIGTERM", () => flushMetrics().finally(() => process.exit(0)));
+
 // Start server
 app.listen(PORT, () => {
   console.log(`🚀 Server running on http://localhost:${PORT}`);
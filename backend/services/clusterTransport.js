@@ -0,0 +1,97 @@
+// Links between the strategy coordinator and its nodes (see
+// services/strategyCluster.js). Both transports carry the same NDJSON frames
+// as the strategy pipes (see strategyIpc.js) and give each side a Link:
+// `send(frame)`, `close()`, and "frame" / "close" events.
+//
+//   in-process  a pair of Links in one Node process; frames still go through
+//               JSON and are delivered asynchronously, as over a socket
+//   tcp         one Link per socket; the coordinator listens, nodes connect,
+//               over TLS when given tls options (see tls.createServer /
+//               tls.connect)
+const net = require("net");
+const tls = require("tls");
+const { EventEmitter } = require("events");
+const { encodeFrame, createFrameDecoder } = require("./strategyIpc");
+
+class Link extends EventEmitter {
+  constructor(write, end) {
+    super();
+    this.closed = false;
+    this._write = write;
+    this._end = end;
+  }
+
+  send(frame) {
+    if (this.closed) return false;
+    this._write(encodeFrame(frame));
+    return true;
+  }
+
+  close() {
+    if (this.closed) return;
+    this._end();
+    this._closed();
+  }
+
+  // Called once, whichever side (or the network) ended the link
+  _closed() {
+    if (this.closed) return;
+    this.closed = true;
+    this.emit("close");
+  }
+}
+
+// Two connected Links, e.g. a coordinator and a node in the same process
+const createInProcessLink = () => {
+  const links = [];
+  // Frames already sent are delivered before the peer sees the close
+  const end = () => setImmediate(() => links.forEach((link) => link._closed()));
+  for (const side of [0, 1]) {
+    const write = (chunk) => {
+      const peer = links[1 - side];
+      setImmediate(() => !peer.closed && peer.decode(chunk));
+    };
+    links.push(new Link(write, end));
+  }
+  for (const link of links) {
+    link.decode = createFrameDecoder((frame) => link.emit("frame", frame));
+  }
+  return links;
+};
+
+const socketLink = (socket) => {
+  socket.setNoDelay(true);
+  socket.setKeepAlive(true);
+  const link = new Link((chunk) => socket.write(chunk), () => socket.end());
+  socket.on("data", createFrameDecoder((frame) => link.emit("frame", frame)));
+  socket.on("error", (err) => link.emit("error", err));
+  socket.on("close", () => link._closed());
+  link.remoteAddress = socket.remoteAddress;
+  return link;
+};
+
+// Accept node connections; `onLink` gets a Link per connected node
+const listenTcp = (port, onLink, host = "127.0.0.1", tlsOptions = null) => {
+  const accept = (socket) => onLink(socketLink(socket));
+  const server = tlsOptions ? tls.createServer(tlsOptions, accept) : net.createServer(accept);
+  server.on("tlsClientError", (err) => console.error(`Strategy node TLS error: ${err.message}`));
+  server.listen(port, host);
+  return server;
+};
+
+// Resolves with a Link to the coordinator at host:port
+const connectTcp = (host, port, tlsOptions = null) =>
+  new Promise((resolve, reject) => {
+    const socket = tlsOptions ? tls.connect({ host, port, ...tlsOptions }) : net.connect({ host, port });
+    socket.once(tlsOptions ? "secureConnect" : "connect", () => {
+      socket.off("error", reject);
+      resolve(socketLink(socket));
+    });
+    socket.once("error", reject);
+  });
+
+module.exports = {
+  createInProcessLink,
+  listenTcp,
+  connectTcp,
+};
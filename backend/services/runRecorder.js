@@ -0,0 +1,346 @@
+// Persists what a strategy run produces (the run itself, every fill,
+// periodic state snapshots and each params version it accepted) to MySQL through the shared config/db.js pool.
+//
+// Rows from every running strategy go through one BulkWriter per table,
+// which buffers them and writes multi-row INSERTs (at most BATCH_ROWS rows,
+// at least every FLUSH_MS), so write load grows with time rather than with
+// events. Fills and snapshots are RANGE partitioned by month on their
+// timestamp and indexed on (strategy_id, ts) / (run_id, ts), so dashboard
+// history queries are partition-pruned index range scans.
+const pool = require("../config/db");
+
+const BATCH_ROWS = 500;
+const FLUSH_MS = 1000;
+const MAX_BUFFERED_ROWS = 50000;
+const SNAPSHOT_INTERVAL_MS = parseInt(process.env.STRATEGY_SNAPSHOT_MS || "5000", 10);
+const PARTITION_MONTHS_AHEAD = 2;
+const PARTITION_CHECK_MS = 24 * 60 * 60 * 1000;
+
+const PARTITIONED_TABLES = ["strategy_fills", "strategy_snapshots"];
+
+const SCHEMA = [
+  `CREATE TABLE IF NOT EXISTS strategy_runs (
+    id BIGINT UNSIGNED NOT NULL,
+    strategy_id INT NOT NULL,
+    user_id INT NOT NULL,
+    symbol VARCHAR(64) NOT NULL,
+    accounts INT NOT NULL DEFAULT 1,
+    params JSON NULL,
+    started_at DATETIME(3) NOT NULL,
+    ended_at DATETIME(3) NULL,
+    exit_code INT NULL,
+    initial_cash DECIMAL(16,4) NULL,
+    final_cash DECIMAL(16,4) NULL,
+    profit DECIMAL(16,4) NULL,
+    fills INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id),
+    KEY idx_runs_strategy_started (strategy_id, started_at),
+    KEY idx_runs_user_started (user_id, started_at)
+  )`,
+  `CREATE TABLE IF NOT EXISTS strategy_fills (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    run_id BIGINT UNSIGNED NOT NULL,
+    strategy_id INT NOT NULL,
+    ts DATETIME(3) NOT NULL,
+    account VARCHAR(64) NOT NULL,
+    kind VARCHAR(32) NOT NULL,
+    side CHAR(1) NOT NULL,
+    qty INT NOT NULL,
+    price DECIMAL(14,4) NULL,
+    order_no VARCHAR(32) NULL,
+    latency_ms DECIMAL(12,2) NULL,
+    PRIMARY KEY (id, ts),
+    KEY idx_fills_strategy_ts (strategy_id, ts),
+    KEY idx_fills_run_ts (run_id, ts)
+  ) PARTITION BY RANGE (TO_DAYS(ts)) (PARTITION pmax VALUES LESS THAN MAXVALUE)`,
+  `CREATE TABLE IF NOT EXISTS strategy_snapshots (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    run_id BIGINT UNSIGNED NOT NULL,
+    strategy_id INT NOT NULL,
+    ts DATETIME(3) NOT NULL,
+    ltp DECIMAL(14,4) NULL,
+    net_qty INT NULL,
+    avg_price DECIMAL(14,4) NULL,
+    ladder_depth INT NULL,
+    next_buy_price DECIMAL(14,4) NULL,
+    target_price DECIMAL(14,4) NULL,
+    PRIMARY KEY (id, ts),
+    KEY idx_snapshots_strategy_ts (strategy_id, ts),
+    KEY idx_snapshots_run_ts (run_id, ts)
+  ) PARTITION BY RANGE (TO_DAYS(ts)) (PARTITION pmax VALUES LESS THAN MAXVALUE)`,
+  // One row per edit a running strategy applied: changes is
+  // { field: { from, to } } as reported in its Params Updated event
+  `CREATE TABLE IF NOT EXISTS strategy_param_changes (
+    id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    run_id BIGINT UNSIGNED NOT NULL,
+    strategy_id INT NOT NULL,
+    ts DATETIME(3) NOT NULL,
+    version INT NOT NULL,
+    changes JSON NOT NULL,
+    PRIMARY KEY (id),
+    KEY idx_param_changes_strategy_ts (strategy_id, ts),
+    KEY idx_param_changes_run (run_id, version)
+  )`,
+];
+
+// Buffers rows for one table and writes them as multi-row INSERTs, one
+// statement in flight at a time. Failed batches are retried on the next
+// flush until MAX_BUFFERED_ROWS is reached, then dropped (and counted).
+class BulkWriter {
+  constructor(table, columns) {
+    this.table = table;
+    this.columns = columns;
+    this.rows = [];
+    this.timer = null;
+    this.inFlight = null;
+    this.dropped = 0;
+    this.failures = 0;
+  }
+
+  push(row) {
+    this.rows.push(row);
+    if (this.rows.length >= BATCH_ROWS) this.flush();
+    else if (!this.timer) this.timer = setTimeout(() => this.flush(), FLUSH_MS);
+  }
+
+  flush() {
+    clearTimeout(this.timer);
+    this.timer = null;
+    if (this.inFlight || this.rows.length === 0) return this.inFlight || Promise.resolve();
+
+    const batch = this.rows.splice(0, BATCH_ROWS);
+    this.inFlight = pool
+      .query(`INSERT INTO ${this.table} (${this.columns.join(", ")}) VALUES ?`, [batch])
+      .catch((err) => {
+        console.error(`Bulk insert into ${this.table} failed (${batch.length} rows):`, err.message);
+        this.failures += 1;
+        if (this.rows.length + batch.length <= MAX_BUFFERED_ROWS) this.rows.unshift(...batch);
+        else this.dropped += batch.length;
+      })
+      .finally(() => {
+        this.inFlight = null;
+        if (this.rows.length >= BATCH_ROWS) this.flush();
+        else if (this.rows.length && !this.timer) {
+          this.timer = setTimeout(() => this.flush(), FLUSH_MS);
+        }
+      });
+    return this.inFlight;
+  }
+
+  // Write out everything buffered, batch after batch, including rows queued
+  // behind a statement already in flight (e.g. on shutdown). Gives up at the
+  // first failed batch instead of retrying against a database that is down.
+  async drain() {
+    const failures = this.failures;
+    while ((this.rows.length > 0 || this.inFlight) && this.failures === failures) {
+      await (this.inFlight || this.flush());
+    }
+  }
+}
+
+const fillWriter = new BulkWriter("strategy_fills", [
+  "run_id", "strategy_id", "ts", "account", "kind", "side", "qty", "price", "order_no", "latency_ms",
+]);
+const snapshotWriter = new BulkWriter("strategy_snapshots", [
+  "run_id", "strategy_id", "ts", "ltp", "net_qty", "avg_price", "ladder_depth", "next_buy_price", "target_price",
+]);
+const paramChangeWriter = new BulkWriter("strategy_param_changes", [
+  "run_id", "strategy_id", "ts", "version", "changes",
+]);
+
+// Python timestamps are local ISO strings (see scalping_strategy.log_json)
+const toSqlTime = (timestamp) => {
+  if (!timestamp) return new Date();
+  return String(timestamp).replace("T", " ").slice(0, 23);
+};
+
+const toNumber = (value) => {
+  const number = Number(value);
+  return value === null || value === undefined || Number.isNaN(number) ? null : number;
+};
+
+// Run ids are minted here so fills can reference a run before its row is written
+let runSeq = 0;
+const nextRunId = () => Date.now() * 1000 + (runSeq++ % 1000);
+
+// Follow one session: insert its run row, stream fills and snapshots into the
+// bulk writers, and close the run out when the session exits.
+// `account` is the broker user the strategy trades as (the leader in a fan-out).
+const recordRun = (session, { strategyId, userId, account, symbol, params, accounts = 1 }) => {
+  const runId = nextRunId();
+  const tsym = symbol.split("|")[1];
+  const fanout = accounts > 1;
+  const run = { initialCash: null, finalCash: null, profit: null, fills: 0 };
+  const state = { ltp: null, netQty: null, avgPrice: null, ladderDepth: null, nextBuyPrice: null, targetPrice: null };
+  let stateAt = null;
+
+  const created = pool
+    .query(
+      `INSERT INTO strategy_runs (id, strategy_id, user_id, symbol, accounts, params, started_at)
+       VALUES (?, ?, ?, ?, ?, ?, ?)`,
+      [runId, strategyId, userId, symbol, accounts, JSON.stringify(params), new Date()]
+    )
+    .catch((err) => console.error(`Failed to record run for strategy ${strategyId}:`, err.message));
+
+  const pushFill = (timestamp, account, data) => {
+    run.fills += 1;
+    fillWriter.push([
+      runId,
+      strategyId,
+      toSqlTime(timestamp),
+      String(account),
+      String(data.kind || ""),
+      data.side,
+      toNumber(data.qty) || 0,
+      toNumber(data.price),
+      data.orderNo ? String(data.orderNo) : null,
+      toNumber(data.latencyMs ?? data.fillMs),
+    ]);
+  };
+
+  const snapshot = () => {
+    if (!stateAt) return;
+    snapshotWriter.push([
+      runId,
+      strategyId,
+      toSqlTime(stateAt),
+      state.ltp,
+      state.netQty,
+      state.avgPrice,
+      state.ladderDepth,
+      state.nextBuyPrice,
+      state.targetPrice,
+    ]);
+    stateAt = null;
+  };
+  const snapshotTimer = setInterval(snapshot, SNAPSHOT_INTERVAL_MS);
+
+  session.on("frame", (frame) => {
+    if (frame.type !== "event") return;
+    const { data, timestamp } = frame;
+    switch (frame.tag) {
+      case "Fill":
+        // A fan-out reports each account's leg as a Fanout Fill instead
+        if (!fanout) pushFill(timestamp, account, data);
+        break;
+      case "Fanout Fill":
+        // qty is what the leg filled, including before a CANCELED / REJECTED
+        if (toNumber(data.qty) > 0) pushFill(timestamp, data.account, data);
+        break;
+      case "Params Updated":
+        paramChangeWriter.push([
+          runId,
+          strategyId,
+          toSqlTime(timestamp),
+          toNumber(data.version) || 0,
+          JSON.stringify(data.changes || {}),
+        ]);
+        break;
+      case "Initial Cash":
+        run.initialCash = toNumber(data);
+        break;
+      case "Trading Session Profit":
+        run.finalCash = toNumber(data.balanceCash);
+        run.profit = toNumber(data.profit);
+        break;
+      case "Current Position": {
+        const entry = (data || []).find((item) => item.tsym === tsym);
+        if (entry) {
+          state.netQty = toNumber(entry.netqty);
+          // A short ladder holds a negative netqty opened by sells
+          state.avgPrice = toNumber(state.netQty < 0 ? entry.daysellavgprc : entry.daybuyavgprc);
+          stateAt = timestamp;
+        }
+        break;
+      }
+      case "Position Info":
+        state.ladderDepth = toNumber(data.LppArraySize);
+        state.nextBuyPrice = toNumber(data.nextBuyPrice);
+        state.targetPrice = toNumber(data.TP);
+        state.ltp = toNumber(data.LTP);
+        stateAt = timestamp;
+        break;
+      case "Quotes":
+        if (data && data.lp !== undefined) {
+          state.ltp = toNumber(data.lp);
+          stateAt = timestamp;
+        }
+        break;
+      default:
+        break;
+    }
+  });
+
+  session.once("exit", async (code) => {
+    clearInterval(snapshotTimer);
+    snapshot();
+    await created;
+    try {
+      await pool.query(
+        `UPDATE strategy_runs SET ended_at = ?, exit_code = ?, initial_cash = ?, final_cash = ?,
+         profit = ?, fills = ? WHERE id = ?`,
+        [new Date(), code ?? null, run.initialCash, run.finalCash, run.profit, run.fills, runId]
+      );
+    } catch (err) {
+      console.error(`Failed to close run ${runId}:`, err.message);
+    }
+  });
+
+  return runId;
+};
+
+// Keep a monthly partition ready for the current month and the next few,
+// split off the catch-all pmax partition.
+const ensurePartitions = async (table, now = new Date()) => {
+  const [rows] = await pool.query(
+    `SELECT PARTITION_NAME AS name FROM information_schema.PARTITIONS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ? AND PARTITION_NAME IS NOT NULL`,
+    [table]
+  );
+  const existing = new Set(rows.map((row) => row.name));
+  const latest = [...existing].filter((name) => name !== "pmax").sort().pop();
+
+  for (let ahead = 0; ahead <= PARTITION_MONTHS_AHEAD; ahead++) {
+    const month = new Date(now.getFullYear(), now.getMonth() + ahead, 1);
+    const next = new Date(now.getFullYear(), now.getMonth() + ahead + 1, 1);
+    const name = `p${month.getFullYear()}${String(month.getMonth() + 1).padStart(2, "0")}`;
+    // Partitions can only be appended after the last one
+    if (existing.has(name) || (latest && name <= latest)) continue;
+    const bound = `${next.getFullYear()}-${String(next.getMonth() + 1).padStart(2, "0")}-01`;
+    await pool.query(
+      `ALTER TABLE ${table} REORGANIZE PARTITION pmax INTO (
+        PARTITION ${name} VALUES LESS THAN (TO_DAYS('${bound}')),
+        PARTITION pmax VALUES LESS THAN MAXVALUE)`
+    );
+    existing.add(name);
+  }
+};
+
+// Create the tables if needed and keep their partitions rolling forward
+const ensureMetricsSchema = async () => {
+  for (const statement of SCHEMA) await pool.query(statement);
+  const maintain = async () => {
+    for (const table of PARTITIONED_TABLES) {
+      try {
+        await ensurePartitions(table);
+      } catch (err) {
+        console.error(`Partition maintenance for ${table} failed:`, err.message);
+      }
+    }
+  };
+  await maintain();
+  setInterval(maintain, PARTITION_CHECK_MS).unref();
+};
+
+// Write out everything still buffered (e.g. on shutdown)
+const flushMetrics = () =>
+  Promise.all([fillWriter.drain(), snapshotWriter.drain(), paramChangeWriter.drain()]);
+
+module.exports = {
+  recordRun,
+  ensureMetricsSchema,
+  flushMetrics,
+  BulkWriter,
+  BATCH_ROWS,
+  FLUSH_MS,
+};
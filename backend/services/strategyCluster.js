@@ -0,0 +1,473 @@
+// Coordinator / node mode for the strategy runtime. Without it (the default)
+// the backend runs every strategy on its own worker pool. With
+// STRATEGY_CLUSTER=coordinator the backend becomes the coordinator: strategy
+// nodes on other machines (node strategyNode.js) connect and register, and
+// each strategy started through startStrategy() is assigned to one of them.
+//
+//   placement   a strategy goes to the node already running its account or
+//               one of its symbols (one login, one request budget and one
+//               quote stream per account/symbol), otherwise the least loaded
+//   failover    a node that closes its link or misses heartbeats for
+//               LOST_AFTER_MS is dropped; after REASSIGN_DELAY_MS its
+//               strategies are started again on the remaining nodes (they
+//               rebuild their ladder from positions and the order book)
+//   transport   the coordinator listens on 127.0.0.1 unless
+//               STRATEGY_CLUSTER_HOST names another interface, which it
+//               only accepts with STRATEGY_CLUSTER_SECRET and TLS
+//               (STRATEGY_CLUSTER_TLS_KEY / _CERT): start params carry
+//               broker credentials
+//   streams     every node forwards its strategies' frames, so a
+//               RemoteSession emits "frame" / "exit" like a local
+//               StrategySession and the feed, run recorder and dashboards
+//               are unchanged, whichever node it runs on
+//
+// A node that loses the coordinator stops its strategies, killing the
+// strategy hosts of any that outlive the stop grace, before the coordinator
+// restarts them elsewhere, so one strategy never trades twice.
+// The backend's own pool (when STRATEGY_POOL_SIZE > 0) joins as the node
+// "local" over the in-process transport, which also runs a whole cluster in
+// one process for local testing (createLocalCluster).
+const crypto = require("crypto");
+const fs = require("fs");
+const os = require("os");
+const { EventEmitter } = require("events");
+const pool = require("./strategyWorkerPool");
+const { createInProcessLink, listenTcp } = require("./clusterTransport");
+
+const CLUSTER_MODE = process.env.STRATEGY_CLUSTER || "off"; // off | coordinator
+const CLUSTER_HOST = process.env.STRATEGY_CLUSTER_HOST || "127.0.0.1";
+const CLUSTER_PORT = parseInt(process.env.STRATEGY_CLUSTER_PORT || "7400", 10);
+const CLUSTER_SECRET = process.env.STRATEGY_CLUSTER_SECRET || "";
+const NODE_CAPACITY = parseInt(process.env.STRATEGY_NODE_CAPACITY || "64", 10);
+const HEARTBEAT_MS = 2000;
+const LOST_AFTER_MS = 10000;
+// By then a node that lost us has stopped or killed every strategy it ran:
+// its stop grace (STOP_GRACE_MS in strategyWorkerPool.js, STOP_GRACE in
+// strategy_worker.py if the node itself died) plus a heartbeat either way
+// for the two sides noticing the loss at different times
+const REASSIGN_DELAY_MS = pool.STOP_GRACE_MS + 2 * HEARTBEAT_MS;
+const PROFILE_GRACE_MS = 30000;
+
+let coordinator = null;
+
+const LOOPBACK_HOSTS = new Set(["127.0.0.1", "::1", "localhost"]);
+
+// Coordinator TLS options from STRATEGY_CLUSTER_TLS_KEY / _CERT, if both are set
+const clusterTls = () => {
+  const { STRATEGY_CLUSTER_TLS_KEY: key, STRATEGY_CLUSTER_TLS_CERT: cert } = process.env;
+  return key && cert ? { key: fs.readFileSync(key), cert: fs.readFileSync(cert) } : null;
+};
+
+const event = (tag, data) => ({ type: "event", tag, timestamp: new Date().toISOString(), data });
+
+const sameSecret = (a, b) => {
+  const digest = (value) => crypto.createHash("sha256").update(String(value)).digest();
+  return crypto.timingSafeEqual(digest(a), digest(b));
+};
+
+// Strategies a node's strategies have in common with `session`
+const sharesWith = (session) => (other) =>
+  other.account === session.account || other.symbols.some((symbol) => session.symbols.includes(symbol));
+
+// One strategy as the coordinator sees it, wherever it runs; emits "frame"
+// and "exit" like StrategySession
+class RemoteSession extends EventEmitter {
+  constructor(coordinator, strategyId, params) {
+    super();
+    this.coordinator = coordinator;
+    this.strategyId = String(strategyId);
+    this.params = { ...params };
+    this.symbols = pool.strategySymbols(params);
+    this.symbol = this.symbols[0];
+    this.account = params.user;
+    this.node = null;
+    this.finished = false;
+  }
+
+  command(command, fields = {}) {
+    if (this.finished) return false;
+    // A strategy restarted on another node starts from its latest params
+    if (command === "update_params" && fields.params) {
+      Object.assign(this.params, fields.params, { params_version: fields.version });
+    }
+    if (!this.node) return false;
+    return this.node.link.send({ type: "command", strategyId: this.strategyId, command, fields });
+  }
+
+  stop() {
+    if (this.finished) return;
+    // Not running anywhere (waiting for a node, or its node was just lost)
+    if (!this.node || this.node.lost) {
+      this.coordinator.pending.delete(this);
+      this.finish(0);
+      return;
+    }
+    this.node.link.send({ type: "stop", strategyId: this.strategyId });
+  }
+
+  profile(options) {
+    return this.coordinator.profile(this, options);
+  }
+
+  finish(code) {
+    if (this.finished) return;
+    this.finished = true;
+    if (this.node) this.node.sessions.delete(this);
+    this.coordinator.sessions.delete(this.strategyId);
+    this.emit("exit", code);
+  }
+}
+
+// Assigns strategies to registered nodes and relays their frames
+class StrategyCoordinator extends EventEmitter {
+  constructor({ secret = CLUSTER_SECRET, lostAfterMs = LOST_AFTER_MS, reassignDelayMs = REASSIGN_DELAY_MS } = {}) {
+    super();
+    this.secret = secret;
+    this.lostAfterMs = lostAfterMs;
+    this.reassignDelayMs = reassignDelayMs;
+    this.nodes = new Map(); // nodeId -> { id, link, capacity, sessions, lastSeen, stats, lost }
+    this.sessions = new Map(); // strategyId -> RemoteSession
+    this.pending = new Set(); // sessions waiting for a node with room
+    this.profiles = new Map(); // requestId -> { node, finish }
+    this.profileSeq = 0;
+    this.server = null;
+    this.timer = setInterval(() => this.sweep(), HEARTBEAT_MS);
+    this.timer.unref();
+  }
+
+  listen(port = CLUSTER_PORT, host = CLUSTER_HOST, tlsOptions = clusterTls()) {
+    // Params carry broker credentials: nodes on other machines need a secret and TLS
+    if (!LOOPBACK_HOSTS.has(host) && !(this.secret && tlsOptions)) {
+      console.error(
+        `Strategy nodes on ${host} need STRATEGY_CLUSTER_SECRET and STRATEGY_CLUSTER_TLS_KEY/_CERT; accepting nodes on 127.0.0.1 only`
+      );
+      host = "127.0.0.1";
+    }
+    this.server = listenTcp(port, (link) => this.attach(link), host, tlsOptions);
+    console.log(`Strategy coordinator listening on ${host}:${port}${tlsOptions ? " (TLS)" : ""}`);
+    return this.server;
+  }
+
+  // A new link; it becomes a node once it registers
+  attach(link) {
+    let node = null;
+    link.on("frame", (frame) => {
+      if (node) {
+        node.lastSeen = Date.now();
+        this.onNodeFrame(node, frame);
+      } else if (frame.type === "register") {
+        node = this.register(link, frame);
+      }
+    });
+    link.on("error", (err) => console.error(`Strategy node link error: ${err.message}`));
+    link.on("close", () => node && this.lose(node, "Link closed"));
+  }
+
+  register(link, frame) {
+    if (this.secret && !sameSecret(frame.secret || "", this.secret)) {
+      link.send({ type: "rejected", reason: "Bad cluster secret" });
+      link.close();
+      return null;
+    }
+    const previous = this.nodes.get(frame.nodeId);
+    if (previous) this.lose(previous, "Registered again");
+
+    const node = {
+      id: String(frame.nodeId),
+      link,
+      capacity: Number(frame.capacity) || NODE_CAPACITY,
+      sessions: new Set(),
+      lastSeen: Date.now(),
+      stats: null,
+      lost: false,
+    };
+    this.nodes.set(node.id, node);
+    link.send({ type: "registered", nodeId: node.id });
+    console.log(`Strategy node ${node.id} registered (capacity ${node.capacity})`);
+
+    for (const session of [...this.pending]) {
+      this.pending.delete(session);
+      this.assign(session);
+    }
+    return node;
+  }
+
+  onNodeFrame(node, frame) {
+    if (frame.type === "heartbeat") {
+      node.stats = frame.stats || null;
+      return;
+    }
+    if (frame.type === "profile") {
+      const request = this.profiles.get(frame.requestId);
+      if (request) request.finish(frame.error ? new Error(frame.error) : null, frame.report);
+      return;
+    }
+    const session = this.sessions.get(String(frame.strategyId));
+    // Late frames from a node the strategy has been moved away from are dropped
+    if (!session || session.node !== node) return;
+    if (frame.type === "frame") {
+      session.emit("frame", frame.frame);
+      this.emit("frame", session.strategyId, frame.frame);
+    } else if (frame.type === "exit") {
+      session.finish(frame.code);
+    }
+  }
+
+  placeSession(session) {
+    const open = [...this.nodes.values()].filter((node) => !node.lost && node.sessions.size < node.capacity);
+    const shared = open.find((node) => [...node.sessions].some(sharesWith(session)));
+    if (shared) return shared;
+    open.sort((a, b) => a.sessions.size / a.capacity - b.sessions.size / b.capacity);
+    return open[0] || null;
+  }
+
+  assign(session) {
+    const node = this.placeSession(session);
+    if (!node) {
+      this.pending.add(session);
+      session.emit("frame", event("Waiting for Node", { strategyId: session.strategyId }));
+      return;
+    }
+    session.node = node;
+    node.sessions.add(session);
+    node.link.send({ type: "start", strategyId: session.strategyId, params: session.params });
+  }
+
+  start(strategyId, params) {
+    const session = new RemoteSession(this, strategyId, params);
+    this.sessions.set(session.strategyId, session);
+    this.assign(session);
+    return session;
+  }
+
+  // Drop a node; once it has had time to stop them, its strategies start elsewhere
+  lose(node, reason) {
+    if (node.lost) return;
+    node.lost = true;
+    if (this.nodes.get(node.id) === node) this.nodes.delete(node.id);
+    node.link.close();
+    console.error(`Strategy node ${node.id} lost (${reason}); ${node.sessions.size} strategies to reassign`);
+
+    for (const request of [...this.profiles.values()]) {
+      if (request.node === node) request.finish(new Error(`Strategy node ${node.id} was lost while profiling`));
+    }
+    const orphans = [...node.sessions];
+    for (const session of orphans) {
+      session.emit("frame", event("Node Lost", { node: node.id, reason, reassignInMs: this.reassignDelayMs }));
+    }
+    setTimeout(() => {
+      for (const session of orphans) {
+        if (session.finished || session.node !== node) continue;
+        node.sessions.delete(session);
+        session.node = null;
+        this.assign(session);
+        if (session.node) {
+          session.emit("frame", event("Strategy Reassigned", { from: node.id, to: session.node.id }));
+        }
+      }
+    }, this.reassignDelayMs).unref();
+  }
+
+  sweep() {
+    const now = Date.now();
+    for (const node of [...this.nodes.values()]) {
+      if (now - node.lastSeen > this.lostAfterMs) this.lose(node, "Missed heartbeats");
+      else node.link.send({ type: "heartbeat" });
+    }
+  }
+
+  profile(session, { seconds = 10, intervalMs, allocations = false } = {}) {
+    return new Promise((resolve, reject) => {
+      if (session.finished || !session.node) {
+        reject(new Error("Strategy is not running"));
+        return;
+      }
+      const { node } = session;
+      const requestId = ++this.profileSeq;
+      const finish = (error, report) => {
+        clearTimeout(timer);
+        this.profiles.delete(requestId);
+        if (error) reject(error);
+        else resolve({ node: node.id, ...report });
+      };
+      const timer = setTimeout(() => finish(new Error("Profile timed out")), seconds * 1000 + PROFILE_GRACE_MS);
+      this.profiles.set(requestId, { node, finish });
+      node.link.send({ type: "profile", requestId, strategyId: session.strategyId, seconds, intervalMs, allocations });
+    });
+  }
+
+  // Snapshot of nodes and where strategies run, for monitoring
+  stats() {
+    const now = Date.now();
+    return {
+      nodes: [...this.nodes.values()].map((node) => ({
+        id: node.id,
+        capacity: node.capacity,
+        strategies: [...node.sessions].map((session) => session.strategyId),
+        lastSeenMs: now - node.lastSeen,
+        stats: node.stats,
+      })),
+      pending: [...this.pending].map((session) => session.strategyId),
+    };
+  }
+
+  close() {
+    clearInterval(this.timer);
+    if (this.server) this.server.close();
+    for (const node of [...this.nodes.values()]) node.link.close();
+  }
+}
+
+// Runs the strategies a coordinator assigns on this process's worker pool
+class StrategyNode extends EventEmitter {
+  constructor({
+    nodeId = `${os.hostname()}-${process.pid}`,
+    capacity = NODE_CAPACITY,
+    secret = CLUSTER_SECRET,
+    lostAfterMs = LOST_AFTER_MS,
+    workers = pool,
+  } = {}) {
+    super();
+    this.nodeId = String(nodeId);
+    this.capacity = capacity;
+    this.secret = secret;
+    this.lostAfterMs = lostAfterMs;
+    this.workers = workers;
+    this.sessions = new Map(); // strategyId -> local StrategySession
+    this.link = null;
+    this.timer = null;
+  }
+
+  connect(link) {
+    this.link = link;
+    let lastSeen = Date.now();
+    link.on("frame", (frame) => {
+      lastSeen = Date.now();
+      this.onFrame(frame);
+    });
+    link.on("error", (err) => console.error(`Coordinator link error: ${err.message}`));
+    link.once("close", () => this.orphan("Coordinator link closed"));
+    link.send({ type: "register", nodeId: this.nodeId, capacity: this.capacity, secret: this.secret });
+
+    this.timer = setInterval(() => {
+      if (Date.now() - lastSeen > this.lostAfterMs) {
+        link.close();
+        return;
+      }
+      const stats = this.workers.poolStats();
+      link.send({
+        type: "heartbeat",
+        stats: { strategies: this.sessions.size, hosts: stats.hosts.length, idleWorkers: stats.idle.length },
+      });
+    }, HEARTBEAT_MS);
+    this.timer.unref();
+  }
+
+  onFrame(frame) {
+    const strategyId = String(frame.strategyId);
+    const session = this.sessions.get(strategyId);
+    if (frame.type === "start") {
+      if (!session) this.start(strategyId, frame.params);
+    } else if (frame.type === "command") {
+      if (session) session.command(frame.command, frame.fields);
+    } else if (frame.type === "stop") {
+      if (session) session.stop();
+      else this.link.send({ type: "exit", strategyId, code: 0 });
+    } else if (frame.type === "profile") {
+      this.profile(session, frame);
+    } else if (frame.type === "registered") {
+      console.log(`Strategy node ${this.nodeId} registered with the coordinator`);
+      this.emit("registered");
+    } else if (frame.type === "rejected") {
+      console.error(`Strategy node ${this.nodeId} rejected: ${frame.reason}`);
+      this.emit("rejected", frame.reason);
+    }
+  }
+
+  start(strategyId, params) {
+    const session = this.workers.startStrategyProcess(strategyId, params);
+    this.sessions.set(strategyId, session);
+    const link = this.link;
+    session.on("frame", (frame) => link.send({ type: "frame", strategyId, frame }));
+    session.once("exit", (code) => {
+      if (this.sessions.get(strategyId) === session) this.sessions.delete(strategyId);
+      link.send({ type: "exit", strategyId, code });
+    });
+  }
+
+  profile(session, { requestId, seconds, intervalMs, allocations }) {
+    const reply = (fields) => this.link.send({ type: "profile", requestId, ...fields });
+    if (!session) {
+      reply({ error: "Strategy is not running" });
+      return;
+    }
+    this.workers
+      .profileHost(session, { seconds, intervalMs, allocations })
+      .then((report) => reply({ report }))
+      .catch((err) => reply({ error: err.message }));
+  }
+
+  // Without a coordinator nobody can see or stop these strategies, and it
+  // will restart them elsewhere: stop them here first, killing the hosts of
+  // any that are still running after the stop grace
+  orphan(reason) {
+    clearInterval(this.timer);
+    if (this.sessions.size > 0) {
+      console.error(`Strategy node ${this.nodeId}: ${reason}; stopping ${this.sessions.size} strategies`);
+    }
+    for (const session of this.sessions.values()) session.stop(undefined, { force: true });
+    this.sessions.clear();
+    this.emit("disconnected", reason);
+  }
+}
+
+// Join a node to `target` over the in-process transport
+const attachInProcessNode = (target, options) => {
+  const [coordinatorEnd, nodeEnd] = createInProcessLink();
+  target.attach(coordinatorEnd);
+  const node = new StrategyNode(options);
+  node.connect(nodeEnd);
+  return node;
+};
+
+// A coordinator and `nodes` in-process nodes sharing this process's pool,
+// for running the cluster locally; node.link.close() simulates a node dying
+const createLocalCluster = (nodes = 2, options = {}) => {
+  const local = new StrategyCoordinator({ secret: "", ...options });
+  const members = [];
+  for (let i = 1; i <= nodes; i++) {
+    members.push(attachInProcessNode(local, { nodeId: `node-${i}`, secret: "", ...options }));
+  }
+  return { coordinator: local, nodes: members };
+};
+
+// Called once at server start-up
+const setupCluster = () => {
+  if (CLUSTER_MODE !== "coordinator") return null;
+  coordinator = new StrategyCoordinator();
+  coordinator.listen(CLUSTER_PORT);
+  if (pool.POOL_SIZE > 0) attachInProcessNode(coordinator, { nodeId: "local" });
+  return coordinator;
+};
+
+// Where the controller starts strategies: the coordinator when there is
+// one, this process's worker pool otherwise
+const startStrategy = (strategyId, params) =>
+  coordinator ? coordinator.start(strategyId, params) : pool.startStrategyProcess(strategyId, params);
+
+const profileSession = (session, options) =>
+  session.profile ? session.profile(options) : pool.profileHost(session, options);
+
+const clusterStats = () => (coordinator ? coordinator.stats() : null);
+
+module.exports = {
+  StrategyCoordinator,
+  StrategyNode,
+  RemoteSession,
+  attachInProcessNode,
+  createLocalCluster,
+  setupCluster,
+  startStrategy,
+  profileSession,
+  clusterStats,
+};
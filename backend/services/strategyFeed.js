@@ -0,0 +1,191 @@
+// Shared, compacted view of one strategy session for any number of SSE
+// viewers. Each strategy frame is classified and encoded once per session,
+// not once per viewer, so server CPU stays flat as dashboards are added.
+//
+// Subscription levels (a viewer gets its level and everything below it):
+//   trades  orders, fills, commands, lifecycle and errors
+//   state   + diffs of the position / ladder / spread state and quotes coalesced
+//           to at most `fps` per second
+//   debug   + every raw frame, including per-pass dumps
+const { encodeSseChunk } = require("./strategyIpc");
+
+const LEVELS = { trades: 0, state: 1, debug: 2 };
+const DEFAULT_LEVEL = "state";
+const QUOTE_FPS = Number(process.env.SSE_QUOTE_FPS || "2");
+
+// Per-pass dumps folded into state/quote frames instead of being forwarded
+const STATE_TAGS = new Set(["Current Position", "Position Info", "Quotes", "Spread Info"]);
+// Noise only a debug viewer wants (plus every "Waiting ..." poll)
+const DEBUG_TAGS = new Set([
+  "Login Inputs",
+  "Raw Login Response",
+  "Market Quote",
+  "Market Times",
+  "Cash Limit",
+  "Initial Limits",
+  "Initial Positions",
+  "Order Book",
+  "Margin Limits",
+  "Margin Check",
+  "Poll Schedule",
+  "Price Band",
+]);
+
+const POSITION_FIELDS = ["netqty", "daybuyqty", "daysellqty", "daybuyavgprc", "daysellavgprc", "rpnl"];
+const LADDER_FIELDS = ["netQty", "nextBuyPrice", "LppArraySize", "curIndex", "LPP", "TP"];
+const QUOTE_FIELDS = ["lp", "bp1", "sp1", "bq1", "sq1", "v", "o", "h", "l", "c"];
+const SPREAD_FIELDS = ["spread", "mean", "deviation", "z", "held"];
+
+const pick = (source, fields) => {
+  const picked = {};
+  for (const field of fields) {
+    if (source && source[field] !== undefined) picked[field] = source[field];
+  }
+  return picked;
+};
+
+// Fields of `next` that differ from `previous` (shallow)
+const diffFields = (previous, next) => {
+  const diff = {};
+  for (const [key, value] of Object.entries(next)) {
+    if (previous[key] !== value) diff[key] = value;
+  }
+  return diff;
+};
+
+const parseLevel = (level) => (level in LEVELS ? level : DEFAULT_LEVEL);
+
+const isDebugFrame = (frame) =>
+  frame.type !== "event" || DEBUG_TAGS.has(frame.tag) || String(frame.tag).startsWith("Waiting");
+
+class StrategyFeed {
+  constructor(session, { fps = QUOTE_FPS } = {}) {
+    this.session = session;
+    this.tsym = session.symbol.split("|")[1];
+    this.fps = fps;
+    this.viewers = new Set();
+    this.state = { position: {}, ladder: {}, spread: {} };
+    this.quote = null;
+    this.quoteSeq = 0;
+    this.quoteTimer = null;
+
+    session.on("frame", (frame) => this.onFrame(frame));
+    session.once("exit", (code) => this.close(code));
+  }
+
+  // `stream` is a createEventStream(); returns a function that detaches it
+  addViewer(stream, { level = DEFAULT_LEVEL, fps = this.fps } = {}) {
+    const viewer = {
+      stream,
+      level: LEVELS[parseLevel(level)],
+      intervalMs: 1000 / Math.max(0.1, Math.min(Number(fps) || this.fps, this.fps)),
+      lastQuoteAt: 0,
+      quoteSeq: 0,
+    };
+    this.viewers.add(viewer);
+    if (viewer.level >= LEVELS.state) {
+      stream.send({ type: "snapshot", state: this.state, quote: this.quote });
+      viewer.quoteSeq = this.quoteSeq;
+    }
+    return () => this.viewers.delete(viewer);
+  }
+
+  // Encode once, hand the same chunk to every viewer at or above `level`
+  broadcast(level, frame) {
+    let chunk = null;
+    for (const viewer of this.viewers) {
+      if (viewer.level < level) continue;
+      chunk = chunk || encodeSseChunk(frame);
+      viewer.stream.send(frame, chunk);
+    }
+  }
+
+  onFrame(frame) {
+    if (frame.type === "event" && STATE_TAGS.has(frame.tag)) {
+      this.broadcast(LEVELS.debug, frame);
+      this.foldState(frame);
+    } else if (isDebugFrame(frame)) {
+      this.broadcast(LEVELS.debug, frame);
+    } else {
+      this.broadcast(LEVELS.trades, frame);
+    }
+  }
+
+  foldState(frame) {
+    if (frame.tag === "Current Position") {
+      const entry = (frame.data || []).find((item) => item.tsym === this.tsym);
+      this.applyState("position", pick(entry, POSITION_FIELDS), frame.timestamp);
+    } else if (frame.tag === "Position Info") {
+      this.applyState("ladder", pick(frame.data, LADDER_FIELDS), frame.timestamp);
+    } else if (frame.tag === "Spread Info") {
+      this.applyState("spread", pick(frame.data, SPREAD_FIELDS), frame.timestamp);
+    } else if (frame.tag === "Quotes") {
+      this.applyQuote(pick(frame.data, QUOTE_FIELDS), frame.timestamp);
+    }
+  }
+
+  applyState(section, next, timestamp) {
+    const diff = diffFields(this.state[section], next);
+    if (Object.keys(diff).length === 0) return;
+    this.state[section] = { ...this.state[section], ...diff };
+    this.broadcast(LEVELS.state, { type: "state", timestamp, diff: { [section]: diff } });
+  }
+
+  // Quotes are only stored here; the timer sends the newest one per viewer slot
+  applyQuote(quote, timestamp) {
+    if (this.quote && Object.keys(diffFields(this.quote, quote)).length === 0) return;
+    this.quote = { ...this.quote, ...quote, timestamp };
+    this.quoteSeq += 1;
+    if (this.flushQuotes() && !this.quoteTimer) {
+      this.quoteTimer = setInterval(() => this.flushQuotes(), 1000 / this.fps);
+    }
+  }
+
+  // Returns whether some viewer is still owed the newest quote
+  flushQuotes() {
+    const now = Date.now();
+    let pending = false;
+    let chunk = null;
+    const frame = { type: "quote", quote: this.quote };
+    for (const viewer of this.viewers) {
+      if (viewer.level < LEVELS.state || viewer.quoteSeq === this.quoteSeq) continue;
+      if (now - viewer.lastQuoteAt < viewer.intervalMs) {
+        pending = true;
+        continue;
+      }
+      chunk = chunk || encodeSseChunk(frame);
+      viewer.stream.send(frame, chunk);
+      viewer.quoteSeq = this.quoteSeq;
+      viewer.lastQuoteAt = now;
+    }
+    // Idle once every viewer has the newest quote
+    if (!pending && this.quoteTimer) {
+      clearInterval(this.quoteTimer);
+      this.quoteTimer = null;
+    }
+    return pending;
+  }
+
+  close(code) {
+    clearInterval(this.quoteTimer);
+    this.quoteTimer = null;
+    for (const viewer of this.viewers) {
+      viewer.stream.send({ type: "exit", code });
+      viewer.stream.end();
+    }
+    this.viewers.clear();
+  }
+}
+
+// One feed per session, created on first use
+const feedFor = (session) => {
+  if (!session.feed) session.feed = new StrategyFeed(session);
+  return session.feed;
+};
+
+module.exports = {
+  StrategyFeed,
+  feedFor,
+  parseLevel,
+  LEVELS,
+};
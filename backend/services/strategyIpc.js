@@ -0,0 +1,92 @@
+// NDJSON framing between the backend and strategy processes (see
+// strategies/ipc.py): one compact JSON object per line in both directions.
+
+const SSE_MAX_QUEUED = 500;
+
+// Per-pass status dumps; safe to drop when a browser cannot keep up
+const NOISY_TAGS = new Set(["Current Position", "Quotes", "Position Info"]);
+
+const encodeFrame = (message) => JSON.stringify(message) + "\n";
+
+// Returns a chunk handler that reassembles frames split across pipe reads.
+// Lines that are not JSON are passed through as log frames.
+const createFrameDecoder = (onFrame) => {
+  let buffer = "";
+  return (chunk) => {
+    buffer += chunk.toString();
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    for (const raw of lines) {
+      const line = raw.trim();
+      if (!line) continue;
+      try {
+        onFrame(JSON.parse(line));
+      } catch (err) {
+        onFrame({ type: "log", text: line });
+      }
+    }
+  };
+};
+
+const encodeSseChunk = (frame) => `data: ${JSON.stringify(frame)}\n\n`;
+
+// A newer quote frame always follows, so a dropped one is never missed
+const isDroppable = (frame) =>
+  frame.type === "quote" ||
+  (frame.type === "event" &&
+    (NOISY_TAGS.has(frame.tag) || String(frame.tag).startsWith("Waiting")));
+
+// SSE writer that never blocks the strategy: stdout is always drained, and
+// when the browser's socket is backed up frames are queued, dropping the
+// oldest status dumps first once the queue is full.
+const createEventStream = (res, { maxQueued = SSE_MAX_QUEUED } = {}) => {
+  const queue = [];
+  let blocked = false;
+  let dropped = 0;
+
+  const write = (chunk) => {
+    blocked = !res.write(chunk);
+  };
+
+  const flush = () => {
+    blocked = false;
+    if (dropped > 0) {
+      write(encodeSseChunk({ type: "dropped", count: dropped }));
+      dropped = 0;
+    }
+    while (queue.length && !blocked) write(queue.shift().chunk);
+  };
+  res.on("drain", flush);
+
+  // `chunk` lets a caller fanning one frame out to many streams encode it once
+  const send = (frame, chunk = encodeSseChunk(frame)) => {
+    if (!blocked) return write(chunk);
+
+    queue.push({ chunk, droppable: isDroppable(frame) });
+    if (queue.length > maxQueued) {
+      const index = queue.findIndex((item) => item.droppable);
+      queue.splice(index === -1 ? 0 : index, 1);
+      dropped += 1;
+    }
+  };
+
+  const ping = () => {
+    if (!blocked) write(":\n\n");
+  };
+
+  const end = () => {
+    res.off("drain", flush);
+    for (const item of queue) res.write(item.chunk);
+    queue.length = 0;
+    res.end();
+  };
+
+  return { send, ping, end };
+};
+
+module.exports = {
+  encodeFrame,
+  createFrameDecoder,
+  createEventStream,
+  encodeSseChunk,
+};
@@ -0,0 +1,13 @@
+// Ownership checks shared by the strategy controllers
+const pool = require("../config/db");
+
+// The scalping_strategy row, only if it belongs to userId (the authenticated user)
+const findOwnedStrategy = async (strategyId, userId) => {
+  const [rows] = await pool.query("SELECT * FROM scalping_strategy WHERE id = ?", [strategyId]);
+  if (rows.length === 0 || rows[0].user_id !== userId) return null;
+  return rows[0];
+};
+
+module.exports = {
+  findOwnedStrategy,
+};
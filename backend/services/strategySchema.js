@@ -0,0 +1,47 @@
+// Tables and columns the strategy controllers rely on beyond the base schema,
+// created on start-up like the metrics tables (see runRecorder.js).
+const pool = require("../config/db");
+
+const SCHEMA = [
+  // account_user_id lets owner_user_id mirror strategies onto their broker
+  // account (fan-out); only the account holder can grant or revoke it
+  `CREATE TABLE IF NOT EXISTS linked_accounts (
+    owner_user_id INT NOT NULL,
+    account_user_id INT NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (owner_user_id, account_user_id),
+    KEY idx_linked_accounts_account (account_user_id)
+  )`,
+];
+
+// Columns added to existing tables; NULL means "use the strategy's default"
+const COLUMNS = [
+  // Order working (see strategies/order_manager.py)
+  ["scalping_strategy", "chaseTicks", "INT NULL"],
+  ["scalping_strategy", "orderTimeout", "DECIMAL(8,2) NULL"],
+  // Ladder direction and product (see LADDER_SIDES in scalping_strategy.py)
+  ["scalping_strategy", "side", "VARCHAR(5) NULL"],
+  ["scalping_strategy", "productType", "CHAR(1) NULL"],
+  ["scalping_strategy", "intradayMargin", "DECIMAL(5,4) NULL"],
+];
+
+// MySQL has no ADD COLUMN IF NOT EXISTS
+const addMissingColumns = async () => {
+  for (const [table, column, definition] of COLUMNS) {
+    const [rows] = await pool.query(
+      `SELECT 1 FROM information_schema.COLUMNS
+       WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = ? AND COLUMN_NAME = ?`,
+      [table, column]
+    );
+    if (rows.length === 0) await pool.query(`ALTER TABLE ${table} ADD COLUMN ${column} ${definition}`);
+  }
+};
+
+const ensureStrategySchema = async () => {
+  for (const statement of SCHEMA) await pool.query(statement);
+  await addMissingColumns();
+};
+
+module.exports = {
+  ensureStrategySchema,
+};
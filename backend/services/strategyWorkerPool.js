@@ -0,0 +1,265 @@
+const { spawn } = require("child_process");
+const path = require("path");
+const { EventEmitter } = require("events");
+const { encodeFrame, createFrameDecoder } = require("./strategyIpc");
+
+// Warm Python workers that have already paid interpreter startup and the
+// NorenApi/requests/pyotp imports. Starting a strategy hands params to a
+// worker over its stdin pipe instead of cold-spawning python3. A worker
+// hosts several strategies (one thread each) so they can share one
+// streamed quote subscription per symbol.
+const WORKER_SCRIPT = path.join(__dirname, "../strategies/strategy_worker.py");
+const POOL_SIZE = parseInt(process.env.STRATEGY_POOL_SIZE || "4", 10);
+const STRATEGIES_PER_HOST = parseInt(process.env.STRATEGIES_PER_HOST || "16", 10);
+const RESPAWN_DELAY_MS = 5000;
+const STOP_GRACE_MS = 5000;
+const PROFILE_GRACE_MS = 30000;
+
+const idleWorkers = [];
+const activeHosts = new Set();
+let respawnTimer = null;
+let started = false; // see startPool
+let shuttingDown = false;
+
+// Every instrument a strategy streams: each leg of a multi-leg strategy,
+// otherwise its one symbol
+const strategySymbols = (params) =>
+  params.legs
+    ? params.legs.map((leg) => `${leg.exch}|${leg.stock_name}`)
+    : [`${params.exch}|${params.stock_name}`];
+
+// One strategy running on a host; emits "frame" and "exit"
+class StrategySession extends EventEmitter {
+  constructor(host, strategyId, params) {
+    super();
+    this.host = host;
+    this.strategyId = String(strategyId);
+    this.symbols = strategySymbols(params);
+    this.symbol = this.symbols[0];
+    this.account = params.user;
+    this.finished = false;
+    this.stuck = false; // ignored a stop past its grace period
+  }
+
+  command(command, fields = {}) {
+    if (this.finished || !this.host.stdin.writable) return false;
+    this.host.stdin.write(
+      encodeFrame({ type: "command", strategyId: this.strategyId, command, ...fields })
+    );
+    return true;
+  }
+
+  // Ask the strategy to stop at its next decision point. Threads cannot be
+  // killed, so a strategy still running after graceMs isolates its host (no
+  // new strategies are placed there) and the host is killed as soon as only
+  // stuck strategies are left on it. With `force` (failover: the strategy is
+  // being restarted elsewhere and must not keep trading here) the host is
+  // killed after graceMs whatever else runs on it.
+  stop(graceMs = STOP_GRACE_MS, { force = false } = {}) {
+    if (!this.command("stop")) return;
+    const timer = setTimeout(() => {
+      if (this.finished) return;
+      this.stuck = true;
+      activeHosts.delete(this.host);
+      if (force || onlyStuck(this.host)) this.host.kill();
+      else console.error(`Strategy ${this.strategyId} did not stop within ${graceMs}ms; isolating its host`);
+    }, graceMs);
+    this.once("exit", () => clearTimeout(timer));
+  }
+
+  finish(code) {
+    if (this.finished) return;
+    this.finished = true;
+    this.host.sessions.delete(this.strategyId);
+    this.emit("exit", code);
+    if (this.host.sessions.size === 0) retireHost(this.host);
+    else if (onlyStuck(this.host)) this.host.kill();
+  }
+}
+
+const onlyStuck = (host) => [...host.sessions.values()].every((session) => session.stuck);
+
+const spawnWorker = () => {
+  const worker = spawn("python3", ["-u", WORKER_SCRIPT]);
+  worker.ready = false;
+  worker.sessions = new Map();
+
+  worker.stdout.on(
+    "data",
+    createFrameDecoder((frame) => {
+      if (frame.type === "ready") {
+        worker.ready = true;
+        worker.emit("ready");
+        return;
+      }
+      if (frame.type === "profile") {
+        worker.emit("profile", frame);
+        return;
+      }
+      const session = worker.sessions.get(String(frame.strategyId));
+      if (!session) {
+        console.log(`[worker ${worker.pid}] ${frame.tag || frame.type}`);
+      } else if (frame.type === "exit") {
+        session.finish(frame.code);
+      } else {
+        session.emit("frame", frame);
+      }
+    })
+  );
+
+  // stderr cannot be attributed to one strategy; every session on the host sees it
+  worker.stderr.on("data", (data) => {
+    const lines = data.toString().split(/\r?\n/).filter(Boolean);
+    for (const line of lines) {
+      console.error(`Python stderr [${worker.pid}]:`, line);
+      for (const session of worker.sessions.values()) {
+        session.emit("frame", { type: "stderr", text: line });
+      }
+    }
+  });
+
+  worker.once("exit", (code) => {
+    const index = idleWorkers.indexOf(worker);
+    if (index !== -1) idleWorkers.splice(index, 1);
+    activeHosts.delete(worker);
+    for (const session of [...worker.sessions.values()]) session.finish(code);
+    // A worker dying before it was ready means the Python side is broken
+    // (missing module, bad interpreter); back off instead of looping.
+    if (!worker.ready) scheduleRefill(RESPAWN_DELAY_MS);
+    else if (index !== -1) scheduleRefill();
+  });
+
+  return worker;
+};
+
+const fillPool = () => {
+  while (idleWorkers.length < POOL_SIZE) {
+    idleWorkers.push(spawnWorker());
+  }
+};
+
+const scheduleRefill = (delay = 0) => {
+  if (respawnTimer || !started || shuttingDown) return;
+  respawnTimer = setTimeout(() => {
+    respawnTimer = null;
+    fillPool();
+  }, delay);
+};
+
+// Prefer a worker that finished its imports; fall back to a still-warming
+// one and finally to a fresh spawn when the pool is drained.
+const acquireWorker = () => {
+  let index = idleWorkers.findIndex((worker) => worker.ready);
+  if (index === -1 && idleWorkers.length > 0) index = 0;
+  const worker = index === -1 ? spawnWorker() : idleWorkers.splice(index, 1)[0];
+  scheduleRefill();
+  return worker;
+};
+
+// Co-locate with a strategy sharing a symbol (shared quote stream) or the
+// same account, otherwise take a fresh worker.
+const placeStrategy = (symbols, account) => {
+  for (const host of activeHosts) {
+    if (host.sessions.size >= STRATEGIES_PER_HOST) continue;
+    for (const session of host.sessions.values()) {
+      if (session.account === account || session.symbols.some((symbol) => symbols.includes(symbol)))
+        return host;
+    }
+  }
+  const worker = acquireWorker();
+  activeHosts.add(worker);
+  return worker;
+};
+
+// Closing stdin lets the host exit once its strategy threads are done
+const retireHost = (host) => {
+  activeHosts.delete(host);
+  if (host.stdin.writable) host.stdin.end();
+};
+
+const startStrategyProcess = (strategyId, params) => {
+  const host = placeStrategy(strategySymbols(params), params.user);
+  const session = new StrategySession(host, strategyId, params);
+  host.sessions.set(session.strategyId, session);
+  host.stdin.write(encodeFrame({ type: "start", strategyId: session.strategyId, params }));
+  return session;
+};
+
+// Sample the stacks of the host a session runs on (every strategy on it) for
+// `seconds`; resolves with the report, including the collapsed-stack file
+// written on the host (see strategies/profiler.py)
+let profileSeq = 0;
+const profileHost = (session, { seconds = 10, intervalMs, allocations = false } = {}) =>
+  new Promise((resolve, reject) => {
+    const { host } = session;
+    const requestId = ++profileSeq;
+    const finish = (error, report) => {
+      clearTimeout(timer);
+      host.off("profile", onProfile);
+      host.off("exit", onExit);
+      if (error) reject(error);
+      else resolve(report);
+    };
+    const onProfile = (frame) => {
+      if (frame.requestId !== requestId) return;
+      finish(frame.error ? new Error(frame.error) : null, frame.report);
+    };
+    const onExit = () => finish(new Error("Strategy host exited while profiling"));
+    const timer = setTimeout(
+      () => finish(new Error("Profile timed out")),
+      seconds * 1000 + PROFILE_GRACE_MS
+    );
+
+    if (session.finished || !host.stdin.writable) {
+      finish(new Error("Strategy is not running"));
+      return;
+    }
+    host.on("profile", onProfile);
+    host.once("exit", onExit);
+    host.stdin.write(
+      encodeFrame({ type: "profile", requestId, seconds, interval_ms: intervalMs, allocations })
+    );
+  });
+
+// Resolves once every pooled worker has finished importing
+const whenPoolReady = () =>
+  Promise.all(
+    idleWorkers.map((worker) =>
+      worker.ready ? null : new Promise((resolve) => worker.once("ready", resolve))
+    )
+  );
+
+// Snapshot of worker processes, for monitoring and benchmarks
+const poolStats = () => ({
+  idle: idleWorkers.map((worker) => ({ pid: worker.pid, ready: worker.ready })),
+  hosts: [...activeHosts].map((host) => ({ pid: host.pid, strategies: host.sessions.size })),
+});
+
+const shutdownPool = () => {
+  shuttingDown = true;
+  clearTimeout(respawnTimer);
+  respawnTimer = null;
+  while (idleWorkers.length) idleWorkers.pop().kill();
+  for (const host of activeHosts) host.kill();
+};
+
+// Warm POOL_SIZE workers and keep the pool topped up. Called by the process
+// that runs strategies (server.js, strategyNode.js, the benchmarks); until
+// then requiring this module spawns nothing and strategies cold-start.
+const startPool = () => {
+  started = true;
+  shuttingDown = false;
+  fillPool();
+};
+
+module.exports = {
+  startPool,
+  startStrategyProcess,
+  STOP_GRACE_MS,
+  strategySymbols,
+  whenPoolReady,
+  poolStats,
+  profileHost,
+  shutdownPool,
+  POOL_SIZE,
+};
@@ -0,0 +1,80 @@
+// Pre-market warmup. Strategies started at the open all log in, fetch quotes,
+// limits, positions and the order book, and subscribe at the same moment, so
+// the first decisions wait on a pile of broker calls. Instead every configured
+// strategy is started a few minutes early, armed for the open: it does all of
+// that setup right away and then waits for MARKET_OPEN_AT before its first
+// decision (see arm_at in strategies/scalping_strategy.py).
+const WARMUP_AT = process.env.STRATEGY_WARMUP_AT || ""; // e.g. "09:05:00"; unset disables the schedule
+const MARKET_OPEN_AT = process.env.MARKET_OPEN_AT || "09:15:00";
+const TRADING_DAYS = new Set([1, 2, 3, 4, 5]); // Mon-Fri
+// Exchange holidays that fall on weekdays, e.g. "2026-10-20,2026-11-09"
+const MARKET_HOLIDAYS = new Set(
+  (process.env.MARKET_HOLIDAYS || "").split(",").map((day) => day.trim()).filter(Boolean)
+);
+// Days looked ahead for the next trading day (long weekends plus holidays)
+const LOOKAHEAD_DAYS = 15;
+
+let warmupTimer = null;
+
+// `day` at the local time "HH:MM[:SS]"
+const atTime = (day, time) => {
+  const [hours, minutes, seconds = 0] = time.split(":").map(Number);
+  const at = new Date(day);
+  at.setHours(hours, minutes, seconds, 0);
+  return at;
+};
+
+// Local calendar date as "YYYY-MM-DD"
+const dateKey = (day) =>
+  `${day.getFullYear()}-${String(day.getMonth() + 1).padStart(2, "0")}-${String(day.getDate()).padStart(2, "0")}`;
+
+const isTradingDay = (day) => TRADING_DAYS.has(day.getDay()) && !MARKET_HOLIDAYS.has(dateKey(day));
+
+// When the next warmup is due: a trading day's WARMUP_AT, or `from` itself
+// when it falls between that day's warmup and the open (e.g. the server
+// restarted at 09:10)
+const nextWarmup = (from = new Date()) => {
+  for (let offset = 0; offset < LOOKAHEAD_DAYS; offset++) {
+    const day = new Date(from);
+    day.setDate(from.getDate() + offset);
+    if (!isTradingDay(day)) continue;
+    const warmupAt = atTime(day, WARMUP_AT);
+    if (warmupAt > from) return warmupAt;
+    if (from < atTime(day, MARKET_OPEN_AT)) return from;
+  }
+  return null;
+};
+
+// Run `armAll(openAt)` at every warmup; returns the time of the next one, or
+// null when STRATEGY_WARMUP_AT is not set
+const scheduleWarmup = (armAll, from = new Date()) => {
+  if (!WARMUP_AT) return null;
+  const at = nextWarmup(from);
+  clearTimeout(warmupTimer);
+  warmupTimer = setTimeout(async () => {
+    console.log(`Strategy warmup: arming strategies for ${MARKET_OPEN_AT}`);
+    try {
+      const { armed, skipped } = await armAll(MARKET_OPEN_AT);
+      console.log(`Strategy warmup: ${armed.length} armed, ${skipped.length} already running`);
+    } catch (err) {
+      console.error("Strategy warmup failed:", err.message);
+    }
+    // Today is done once the open has passed
+    scheduleWarmup(armAll, new Date(Math.max(Date.now(), atTime(at, MARKET_OPEN_AT))));
+  }, Math.max(0, at - Date.now()));
+  warmupTimer.unref();
+  console.log(`Strategy warmup scheduled for ${at.toString()}`);
+  return at;
+};
+
+const cancelWarmup = () => {
+  clearTimeout(warmupTimer);
+  warmupTimer = null;
+};
+
+module.exports = {
+  scheduleWarmup,
+  cancelWarmup,
+  nextWarmup,
+  MARKET_OPEN_AT,
+};
@@ -0,0 +1,119 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+# Base Clock
+class Clock:
+    """Source of time for strategy code.
+
+    `now()` is the wall-clock datetime used for market-session rules,
+    `monotonic()` is a drift-free seconds counter used for every timer and
+    deadline. Strategies never call `datetime.now()` or `time.sleep()`
+    directly, so the same code runs against the real market or a simulation.
+    """
+
+    def now(self):
+        raise NotImplementedError
+
+    def monotonic(self):
+        raise NotImplementedError
+
+    def sleep_until(self, deadline):
+        raise NotImplementedError
+
+    def sleep(self, seconds):
+        self.sleep_until(self.monotonic() + seconds)
+
+    def deadline_at(self, when):
+        """Convert a wall-clock datetime into a monotonic deadline."""
+        return self.monotonic() + (when - self.now()).total_seconds()
+
+    def ticker(self, interval):
+        return Ticker(self, interval)
+
+
+# Real-time Clock
+class RealClock(Clock):
+    def __init__(self):
+        # Event based waits can be cut short by wake(), e.g. on a control command
+        self._wakeup = threading.Event()
+
+    def now(self):
+        return datetime.now()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep_until(self, deadline):
+        remaining = deadline - time.monotonic()
+        while remaining > 0:
+            if self._wakeup.wait(remaining):
+                self._wakeup.clear()
+                return
+            remaining = deadline - time.monotonic()
+
+    def wake(self):
+        self._wakeup.set()
+
+
+# Simulated Clock
+class SimulatedClock(Clock):
+    """Virtual clock that jumps straight to each deadline.
+
+    Sleeping costs no real time, so a full trading day of strategy loops
+    completes in milliseconds. Use it with a fake broker for tests and
+    backtests.
+    """
+
+    def __init__(self, start=None):
+        self._start = start or datetime.now()
+        self._elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def now(self):
+        with self._lock:
+            return self._start + timedelta(seconds=self._elapsed)
+
+    def monotonic(self):
+        with self._lock:
+            return self._elapsed
+
+    def sleep_until(self, deadline):
+        with self._lock:
+            if deadline > self._elapsed:
+                self._elapsed = deadline
+
+    def advance(self, seconds):
+        with self._lock:
+            self._elapsed += seconds
+
+    def wake(self):
+        pass
+
+
+# Fixed-rate scheduler
+class Ticker:
+    """Deadline-based pacing for polling loops.
+
+    Each `wait()` sleeps until the next multiple of `interval` after the
+    previous deadline, so time spent in API calls is absorbed instead of
+    added on top of the pause. If a pass overruns, missed ticks are skipped
+    rather than fired back to back.
+    """
+
+    def __init__(self, clock, interval):
+        self.clock = clock
+        self.interval = interval
+        self.deadline = clock.monotonic() + interval
+
+    def wait(self):
+        now = self.clock.monotonic()
+        if self.deadline <= now:
+            missed = int((now - self.deadline) // self.interval) + 1
+            self.deadline += missed * self.interval
+        self.clock.sleep_until(self.deadline)
+        self.deadline += self.interval
+
+    def reset(self):
+        self.deadline = self.clock.monotonic() + self.interval
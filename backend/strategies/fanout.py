@@ -0,0 +1,312 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pyotp
+
+TERMINAL_STATUSES = ("COMPLETE", "REJECTED", "CANCELED")
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+
+# Logged-in sessions
+class SessionPool:
+    """Broker sessions shared by every fan-out in a host, keyed by account.
+
+    A session is logged in once and reference counted; strategies that fan
+    out over overlapping accounts reuse it, and it is only logged out when
+    the last of them releases it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}      # user -> Lock, so one account never logs in twice at once
+        self._sessions = {}   # user -> [api, refs, loginResponse]
+
+    def acquire(self, user, login):
+        """Return (api, loginResponse), calling `login()` only if `user` has no live session."""
+        with self._lock:
+            userLock = self._locks.setdefault(user, threading.Lock())
+        with userLock:
+            entry = self._sessions.get(user)
+            if entry is not None:
+                entry[1] += 1
+                return entry[0], entry[2]
+            api, response = login()
+            if response is not None and response.get("stat") == "Ok":
+                self._sessions[user] = [api, 1, response]
+            return api, response
+
+    def release(self, user):
+        """Drop one reference; returns the api to log out once nobody holds it."""
+        with self._lock:
+            entry = self._sessions.get(user)
+            if entry is None:
+                return None
+            entry[1] -= 1
+            if entry[1] > 0:
+                return None
+            del self._sessions[user]
+            return entry[0]
+
+
+SESSIONS = SessionPool()
+
+
+# One decision's order on every account
+class FanoutOrder:
+    def __init__(self, groupId, orderParams):
+        self.groupId = groupId
+        self.orderParams = dict(orderParams)
+        self.legs = {}  # user -> leg dict (orderNo, quantity, dispatchedAt, ackMs, status, ...)
+
+
+# Fan-out broker facade
+class FanoutApi:
+    """Looks like one NorenApi session to the strategy, trades on many accounts.
+
+    The first account (the strategy's own credentials) is the leader: quotes,
+    positions, limits and the websocket all come from its session, so every
+    decision is made once. `place_order` is dispatched to every logged-in
+    account in parallel and returns one group order number; status, modify
+    and cancel calls on that number fan out to each account's own order. The
+    group reads OPEN while any account's order is still working, then takes
+    the leader's final status. Fills are tracked per account with their
+    latency from dispatch, and a follower never exits more than it entered
+    through the fan-out: sells are capped at what it bought for a long
+    ladder, buys at what it sold short for a short one. Shares a leg filled
+    before ending CANCELED or REJECTED (`fillshares`) count towards that.
+    """
+
+    def __init__(self, accounts, api_factory, log, clock, sessions=SESSIONS, side="long"):
+        self.followers = list(accounts)
+        self.api_factory = api_factory
+        self.log = log
+        self.clock = clock
+        self.sessions_pool = sessions
+        self.leader = None
+        self.leaderUser = None
+        self.sessions = {}   # user -> logged-in api
+        self.netQty = {}     # user -> quantity bought minus sold through the fan-out
+        # The order side that closes the ladder, and the sign of what it holds
+        self.exitSide, self.heldSign = ("B", -1) if side == "short" else ("S", 1)
+        self.orders = {}     # groupId -> FanoutOrder
+        self.fills = {}      # user -> {"orders", "fills", "rejects", "cancels", "ackMs", "fillMs"}
+        self._ids = itertools.count(1)
+        self._executor = ThreadPoolExecutor(max_workers=len(self.followers) + 1,
+                                            thread_name_prefix="fanout")
+
+    def __getattr__(self, name):
+        # Market data, books and the websocket are the leader's
+        leader = self.__dict__.get("leader")
+        if leader is None:
+            raise AttributeError(name)
+        return getattr(leader, name)
+
+    # Session handling
+    def _login(self, account, twoFA=None):
+        def login():
+            api = self.api_factory()
+            response = api.login(
+                userid=account["user"],
+                password=account["password"],
+                twoFA=twoFA or pyotp.TOTP(account["token"]).now(),
+                vendor_code=account["vc"],
+                api_secret=account["app_key"],
+                imei=account["imei"]
+            )
+            return api, response
+
+        try:
+            return self.sessions_pool.acquire(account["user"], login)
+        except Exception as e:
+            return None, {"stat": "Not_Ok", "emsg": str(e)}
+
+    def login(self, userid, password, twoFA, vendor_code, api_secret, imei):
+        leaderAccount = {"user": userid, "password": password, "vc": vendor_code,
+                         "app_key": api_secret, "imei": imei}
+        futures = [self._executor.submit(self._login, leaderAccount, twoFA)]
+        futures += [self._executor.submit(self._login, account) for account in self.followers]
+        results = [future.result() for future in futures]
+
+        leaderApi, leaderResponse = results[0]
+        if leaderResponse is None or leaderResponse.get("stat") != "Ok":
+            return leaderResponse
+        self.leader = leaderApi
+        self.leaderUser = userid
+        self.sessions[userid] = leaderApi
+
+        for account, (api, response) in zip(self.followers, results[1:]):
+            if response is not None and response.get("stat") == "Ok":
+                self.sessions[account["user"]] = api
+            else:
+                self.log("Fanout Login Failed", {"account": account["user"], "response": response})
+        for user in self.sessions:
+            self.netQty[user] = 0
+            self.fills[user] = {"orders": 0, "fills": 0, "rejects": 0, "cancels": 0, "ackMs": [], "fillMs": []}
+        self.log("Fanout Sessions", {"leader": userid, "accounts": list(self.sessions)})
+        return leaderResponse
+
+    def logout(self):
+        self.log("Fanout Report", self.report())
+        response = None
+        for user in list(self.sessions):
+            api = self.sessions_pool.release(user)
+            if api is not None:
+                result = api.logout()
+                if user == self.leaderUser:
+                    response = result
+        self._executor.shutdown(wait=False)
+        return response or {"stat": "Ok"}
+
+    # Orders
+    def _quantity(self, user, orderParams):
+        quantity = int(orderParams["quantity"])
+        if orderParams["buy_or_sell"] == self.exitSide and user != self.leaderUser:
+            return min(quantity, max(0, self.heldSign * self.netQty[user]))
+        return quantity
+
+    def _place(self, user, orderParams):
+        dispatchedAt = self.clock.monotonic()
+        try:
+            response = self.sessions[user].place_order(**orderParams)
+        except Exception as e:
+            response = {"stat": "Not_Ok", "emsg": str(e)}
+        ackMs = (self.clock.monotonic() - dispatchedAt) * 1000
+        orderNo = response.get("norenordno") if response else None
+        return {
+            "orderNo": orderNo,
+            "quantity": int(orderParams["quantity"]),
+            "dispatchedAt": dispatchedAt,
+            "ackMs": round(ackMs, 2),
+            "status": "OPEN" if orderNo else "REJECTED",
+            "avgprc": None,
+            "filledQty": 0,
+            "response": response,
+        }
+
+    def place_order(self, **orderParams):
+        order = FanoutOrder(f"FAN-{next(self._ids)}", orderParams)
+        futures = {}
+        for user in self.sessions:
+            quantity = self._quantity(user, orderParams)
+            if quantity > 0:
+                futures[user] = self._executor.submit(self._place, user, dict(orderParams, quantity=quantity))
+        for user, future in futures.items():
+            leg = order.legs[user] = future.result()
+            self.fills[user]["orders"] += 1
+            self.fills[user]["ackMs"].append(leg["ackMs"])
+            if leg["orderNo"] is None:
+                self.fills[user]["rejects"] += 1
+
+        dispatched = [leg["dispatchedAt"] for leg in order.legs.values()]
+        self.log("Fanout Order", {
+            "groupId": order.groupId,
+            "side": orderParams["buy_or_sell"],
+            "skewMs": round((max(dispatched) - min(dispatched)) * 1000, 2),
+            "legs": {user: {"orderNo": leg["orderNo"], "quantity": leg["quantity"], "ackMs": leg["ackMs"]}
+                     for user, leg in order.legs.items()}
+        })
+
+        leaderLeg = order.legs.get(self.leaderUser)
+        if leaderLeg is None or leaderLeg["orderNo"] is None:
+            return leaderLeg["response"] if leaderLeg else None
+        self.orders[order.groupId] = order
+        return {"stat": "Ok", "norenordno": order.groupId}
+
+    def _refresh(self, user, leg):
+        history = self.sessions[user].single_order_history(leg["orderNo"])
+        return user, history
+
+    def single_order_history(self, orderno):
+        order = self.orders.get(orderno)
+        if order is None:
+            return self.leader.single_order_history(orderno)
+
+        working = [(user, leg) for user, leg in order.legs.items() if leg["status"] not in TERMINAL_STATUSES]
+        for user, history in self._executor.map(lambda item: self._refresh(*item), working):
+            if not history:
+                continue
+            leg = order.legs[user]
+            leg["status"] = history[0]["status"]
+            if leg["status"] not in TERMINAL_STATUSES:
+                continue
+            leg["avgprc"] = history[0].get("avgprc")
+            leg["fillMs"] = round((self.clock.monotonic() - leg["dispatchedAt"]) * 1000, 2)
+            filled = history[0].get("fillshares")
+            leg["filledQty"] = int(filled or leg["quantity"]) if leg["status"] == "COMPLETE" else int(filled or 0)
+            side = 1 if order.orderParams["buy_or_sell"] == "B" else -1
+            self.netQty[user] += side * leg["filledQty"]
+            stats = self.fills[user]
+            if leg["status"] == "COMPLETE":
+                stats["fills"] += 1
+                stats["fillMs"].append(leg["fillMs"])
+            elif leg["status"] == "REJECTED":
+                stats["rejects"] += 1
+            else:
+                stats["cancels"] += 1
+            self.log("Fanout Fill", {
+                "groupId": orderno,
+                "account": user,
+                "orderNo": leg["orderNo"],
+                "side": order.orderParams["buy_or_sell"],
+                "qty": leg["filledQty"],
+                "orderedQty": leg["quantity"],
+                "status": leg["status"],
+                "avgprc": leg["avgprc"],
+                "fillMs": leg["fillMs"]
+            })
+
+        leaderLeg = order.legs[self.leaderUser]
+        anyWorking = any(leg["status"] not in TERMINAL_STATUSES for leg in order.legs.values())
+        return [{
+            "stat": "Ok",
+            "norenordno": orderno,
+            "status": "OPEN" if anyWorking else leaderLeg["status"],
+            "avgprc": leaderLeg["avgprc"] or "0.00",
+            "fillshares": leaderLeg["filledQty"],
+            "legs": {user: leg["status"] for user, leg in order.legs.items()},
+        }]
+
+    def _fan(self, orderno, call):
+        """Apply `call(api, leg)` to every still-working leg of a group order in parallel."""
+        order = self.orders.get(orderno)
+        working = [(user, leg) for user, leg in order.legs.items() if leg["status"] not in TERMINAL_STATUSES]
+        responses = list(self._executor.map(lambda item: call(self.sessions[item[0]], item[1]), working))
+        if any(response is not None and response.get("stat") == "Ok" for response in responses):
+            return {"stat": "Ok", "result": orderno}
+        return responses[0] if responses else None
+
+    def modify_order(self, orderno, exchange, tradingsymbol, newquantity, newprice_type, newprice=0.0, **kwargs):
+        if orderno not in self.orders:
+            return self.leader.modify_order(orderno, exchange, tradingsymbol, newquantity,
+                                            newprice_type, newprice, **kwargs)
+        # Each account keeps its own leg quantity; only price and type move
+        return self._fan(orderno, lambda api, leg: api.modify_order(
+            leg["orderNo"], exchange, tradingsymbol, leg["quantity"], newprice_type, newprice, **kwargs))
+
+    def cancel_order(self, orderno):
+        if orderno not in self.orders:
+            return self.leader.cancel_order(orderno)
+        return self._fan(orderno, lambda api, leg: api.cancel_order(leg["orderNo"]))
+
+    def report(self):
+        """Per-account order counts and ack/fill latency percentiles (ms)."""
+        return {
+            user: {
+                "orders": stats["orders"],
+                "fills": stats["fills"],
+                "rejects": stats["rejects"],
+                "cancels": stats["cancels"],
+                "netQty": self.netQty[user],
+                "ackMsP50": percentile(stats["ackMs"], 0.5),
+                "ackMsMax": max(stats["ackMs"], default=None),
+                "fillMsP50": percentile(stats["fillMs"], 0.5),
+                "fillMsP99": percentile(stats["fillMs"], 0.99),
+            }
+            for user, stats in self.fills.items()
+        }
@@ -0,0 +1,112 @@
+"""Framed IPC between the Node backend and a strategy process.
+
+Both directions use NDJSON: one compact JSON object per line, so a frame
+never contains a raw newline and can be split safely however the pipe
+chunks it.
+
+Out (stdout):  {"type": "ready", "pid": ...}
+               {"type": "event", "strategyId": ..., "tag": ..., "timestamp": ..., "data": ...}
+               {"type": "exit", "strategyId": ..., "code": ...}
+               {"type": "profile", "requestId": ..., "report": {...} | "error": ...}
+In  (stdin):   {"type": "start", "strategyId": ..., "params": {...}}
+               {"type": "command", "strategyId": ..., "command": "pause" | "resume" |
+                "stop" | "square_off" | "update_params", ...}
+               {"type": "profile", "requestId": ..., "seconds": ..., "interval_ms": ...,
+                "allocations": bool}  (whole host, see profiler.py)
+"""
+import sys
+import json
+import queue
+import threading
+from collections.abc import Mapping
+from datetime import datetime
+
+
+def _default_converter(o):
+    if isinstance(o, datetime):
+        return o.isoformat()
+    if isinstance(o, Mapping):
+        return dict(o)
+    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
+
+
+def encode_frame(message):
+    return json.dumps(message, separators=(",", ":"), default=_default_converter) + "\n"
+
+
+# Outbound events
+class EventChannel:
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        frame = encode_frame(message)
+        with self._lock:
+            self._stream.write(frame)
+            self._stream.flush()
+
+    def event(self, tag, data, timestamp, **fields):
+        self.send({"type": "event", "tag": tag, "timestamp": timestamp, "data": data, **fields})
+
+    def bind(self, **fields):
+        """Channel view that stamps `fields` (e.g. strategyId) on every frame."""
+        return BoundChannel(self, fields)
+
+
+class BoundChannel(EventChannel):
+    def __init__(self, channel, fields):
+        self._channel = channel
+        self._fields = fields
+
+    def send(self, message):
+        self._channel.send({**message, **self._fields})
+
+
+def claim_stdout():
+    """Reserve the real stdout for frames.
+
+    Third-party code (NorenApi prints URLs from modify/cancel order) would
+    otherwise interleave plain text with frames, so stray prints go to
+    stderr from here on.
+    """
+    stream = sys.stdout
+    sys.stdout = sys.stderr
+    return EventChannel(stream)
+
+
+# Inbound commands
+class CommandQueue:
+    """Runtime commands waiting to be applied between strategy decisions."""
+
+    def __init__(self, on_command=None):
+        self._queue = queue.Queue()
+        self._on_command = on_command
+
+    def put(self, command):
+        self._queue.put(command)
+        if self._on_command:
+            self._on_command(command)
+
+    def drain(self):
+        commands = []
+        while True:
+            try:
+                commands.append(self._queue.get_nowait())
+            except queue.Empty:
+                return commands
+
+
+def read_frames(stream, on_frame, on_error=None):
+    """Pass every frame read from `stream` to `on_frame` until EOF."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            if on_error:
+                on_error({"error": str(e), "frame": line[:200]})
+            continue
+        on_frame(message)
@@ -0,0 +1,184 @@
+CHASE_TICKS = 2         # reprice a working limit once the market is this many ticks away
+ORDER_TIMEOUT = 60.0    # seconds before a working order is cancelled as stale
+MAX_CHASES = 5          # modifications per order before it is left to time out
+DEFAULT_TICK_SIZE = 0.05
+
+TERMINAL_STATUSES = ("COMPLETE", "REJECTED", "CANCELED")
+
+
+def round_to_tick(price, tick_size):
+    return round(round(price / tick_size) * tick_size, 2)
+
+
+# One order the strategy is waiting on
+class WorkingOrder:
+    def __init__(self, orderNo, kind, orderParams, placedAt):
+        self.orderNo = orderNo
+        self.kind = kind  # the log label, e.g. "Buy" or "Second Buy"
+        self.orderParams = dict(orderParams)
+        self.price = float(orderParams.get("price") or 0)
+        self.placedAt = placedAt
+        self.chases = 0
+        self.cancelRequested = False
+        self.status = "OPEN"
+        self.avgprc = None
+        self.filledQty = 0  # shares filled, including before a CANCELED / REJECTED
+        self.history = None
+
+    @property
+    def side(self):
+        return self.orderParams["buy_or_sell"]
+
+
+# Working-order tracking
+class OrderManager:
+    """Tracks the strategy's working orders without blocking the decision loop.
+
+    Orders are placed with `submit` and then looked at once per decision pass
+    through `poll`, which returns the orders that reached a terminal status
+    since the last pass. While a limit order is OPEN, a market that has moved
+    `chase_ticks` or more away from its price gets the order repriced to the
+    LTP with `modify_order` (up to MAX_CHASES times); an order still open
+    after `timeout` seconds is cancelled. A cancel only takes effect once the
+    broker reports CANCELED, so a fill that races the cancel is still seen;
+    so is a partial one (`fillshares` on the CANCELED or REJECTED order),
+    which is reported as a Fill of the filled quantity.
+    With `bands` (a PriceBands), every limit price placed or chased to is
+    first put on the tick grid and inside the instrument's circuit limits.
+    """
+
+    def __init__(self, api, clock, log, tick_size=DEFAULT_TICK_SIZE,
+                 chase_ticks=CHASE_TICKS, timeout=ORDER_TIMEOUT, bands=None):
+        self.api = api
+        self.clock = clock
+        self.log = log
+        self.tick_size = tick_size or DEFAULT_TICK_SIZE
+        self.chase_ticks = chase_ticks
+        self.timeout = timeout
+        self.bands = bands
+        self.orders = []
+
+    def submit(self, kind, orderParams):
+        """Place an order and start tracking it; returns the WorkingOrder or None."""
+        if self.bands is not None:
+            orderParams = self.bands.check(kind, orderParams)
+        placedAt = self.clock.monotonic()
+        return self.track(kind, orderParams, self.api.place_order(**orderParams), placedAt)
+
+    def track(self, kind, orderParams, orderStatus, placedAt):
+        """Start tracking an order the caller placed itself (e.g. legs placed concurrently)."""
+        self.log(f"{kind} Order Status", orderStatus)
+        if orderStatus is None:
+            self.log("Error", "Order placement returned None")
+            return None
+        orderNo = orderStatus.get("norenordno")
+        if orderNo is None:
+            self.log("Error", "Order number is None in order status")
+            return None
+        order = WorkingOrder(orderNo, kind, orderParams, placedAt)
+        self.orders.append(order)
+        return order
+
+    def working(self, side=None):
+        return [order for order in self.orders if side is None or order.side == side]
+
+    def poll(self, ltp=None):
+        """Refresh every working order; returns the ones that finished this pass.
+
+        `ltp` is the price to chase towards, or a {tradingsymbol: ltp} dict
+        when orders on several instruments are working.
+        """
+        finished = []
+        for order in list(self.orders):
+            history = self.api.single_order_history(order.orderNo)
+            if not history:
+                continue
+            order.history = history
+            order.status = history[0]["status"]
+            if order.status in TERMINAL_STATUSES:
+                order.avgprc = history[0].get("avgprc")
+                filled = history[0].get("fillshares")
+                if order.status == "COMPLETE":
+                    order.filledQty = int(filled or order.orderParams["quantity"])
+                else:
+                    order.filledQty = int(filled or 0)
+                self.orders.remove(order)
+                self.log(f"{order.kind} Order History", history)
+                if order.filledQty:
+                    self.log("Fill", {
+                        "kind": order.kind,
+                        "side": order.side,
+                        "orderNo": order.orderNo,
+                        "qty": order.filledQty,
+                        "status": order.status,
+                        "price": order.avgprc,
+                        "latencyMs": round((self.clock.monotonic() - order.placedAt) * 1000, 2)
+                    })
+                finished.append(order)
+                continue
+            if order.cancelRequested:
+                continue
+            if self.clock.monotonic() - order.placedAt > self.timeout:
+                self.cancel(order, f"Open for more than {self.timeout:g}s")
+            else:
+                price = ltp.get(order.orderParams["tradingsymbol"]) if isinstance(ltp, dict) else ltp
+                if price is not None:
+                    self._chase(order, float(price))
+        return finished
+
+    def _chase(self, order, ltp):
+        if order.orderParams["price_type"] != "LMT" or order.chases >= MAX_CHASES:
+            return
+        # Ticks the market sits on the wrong side of the order's limit
+        away = (ltp - order.price) if order.side == "B" else (order.price - ltp)
+        if away < self.chase_ticks * self.tick_size - 1e-9:
+            return
+        newPrice = round_to_tick(ltp, self.tick_size)
+        if self.bands is not None:
+            newPrice = self.bands.limit_price(order.orderParams["exchange"], order.orderParams["tradingsymbol"],
+                                              order.side, newPrice)
+            if newPrice == order.price:
+                return
+        response = self.api.modify_order(
+            orderno=order.orderNo,
+            exchange=order.orderParams["exchange"],
+            tradingsymbol=order.orderParams["tradingsymbol"],
+            newquantity=order.orderParams["quantity"],
+            newprice_type="LMT",
+            newprice=newPrice,
+        )
+        self.log(f"{order.kind} Order Modified", {
+            "orderNo": order.orderNo,
+            "from": order.price,
+            "to": newPrice,
+            "ltp": ltp,
+            "chases": order.chases + 1,
+            "response": response
+        })
+        if response is not None and response.get("stat") == "Ok":
+            order.price = newPrice
+            order.chases += 1
+
+    def cancel(self, order, reason):
+        response = self.api.cancel_order(order.orderNo)
+        order.cancelRequested = True
+        self.log(f"{order.kind} Order Cancel Requested", {
+            "orderNo": order.orderNo,
+            "reason": reason,
+            "response": response
+        })
+
+    def cancel_all(self, reason):
+        for order in self.orders:
+            if not order.cancelRequested:
+                self.cancel(order, reason)
+
+    def settle(self, ticker, ltp=None):
+        """Poll until nothing is working (or `timeout` passes), e.g. after cancel_all
+        before squaring off; returns the orders that finished meanwhile."""
+        deadline = self.clock.monotonic() + self.timeout
+        finished = self.poll(ltp)
+        while self.orders and self.clock.monotonic() < deadline:
+            ticker.wait()
+            finished += self.poll(ltp)
+        return finished
@@ -0,0 +1,14 @@
+"""Polling cadence shared by the strategies and the offline tools that model them.
+
+Seconds, multiplied by STRATEGY_PACING_SCALE (benchmarks only). Kept apart
+from scalping_strategy so tools such as stress_test.py can read them without
+importing the broker client.
+"""
+import os
+
+PACING_SCALE = float(os.environ.get("STRATEGY_PACING_SCALE", "1"))
+POSITION_POLL_INTERVAL = 0.2 * PACING_SCALE  # while waiting for the first position to show up
+ORDER_POLL_INTERVAL = 0.5 * PACING_SCALE     # while an order is OPEN
+LOOP_INTERVAL = 2.2 * PACING_SCALE           # one decision pass: positions + quotes + orders
+MIN_POLL_INTERVAL = 0.3 * PACING_SCALE       # ...when price is next to a trigger
+MAX_POLL_INTERVAL = 6.0 * PACING_SCALE       # ...when it is far from all of them
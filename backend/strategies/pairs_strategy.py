@@ -0,0 +1,491 @@
+import statistics
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+import pyotp
+from clock import RealClock
+from ipc import CommandQueue
+from order_manager import (OrderManager, round_to_tick, CHASE_TICKS, ORDER_TIMEOUT,
+                           DEFAULT_TICK_SIZE, TERMINAL_STATUSES)
+from fanout import percentile
+from price_bands import PriceBands
+from pacing import LOOP_INTERVAL, ORDER_POLL_INTERVAL
+from scalping_strategy import ShoonyaApiPy, log_json
+
+LOOKBACK = 60        # spread samples the mean and deviation are taken over
+ENTRY_Z = 2.0        # open the pair once the spread is this many deviations out
+EXIT_Z = 0.5         # close it once the spread is back within this
+STOP_Z = 4.0         # or give up once it runs this far the wrong way
+MAX_EXIT_ATTEMPTS = 3
+
+# Params a running pairs strategy accepts through update_params.
+# Legs, hedge ratio and credentials are fixed for the life of a session.
+HOT_RELOAD_PARAMS = {
+    "entry_z": float,
+    "exit_z": float,
+    "stop_z": float,
+    "chase_ticks": int,
+    "order_timeout": float,
+}
+
+
+# One instrument of the pair
+class Leg:
+    def __init__(self, index, exch, stock_name, quantity):
+        self.index = index
+        self.exch = exch
+        self.stock_name = stock_name
+        self.quantity = quantity
+        self.token = stock_name
+        self.tick_size = DEFAULT_TICK_SIZE
+        self.feed = None
+        self.slippage = []  # per fill, in price units; positive means paid away
+
+    def report(self):
+        return {
+            "leg": self.stock_name,
+            "fills": len(self.slippage),
+            "slippageAvg": round(statistics.fmean(self.slippage), 4) if self.slippage else None,
+            "slippageP50": percentile(self.slippage, 0.5),
+            "slippageMax": max(self.slippage, default=None),
+        }
+
+
+# The orders of one decision, one per leg
+class LegGroup:
+    def __init__(self, kind, fills, skewMs):
+        self.kind = kind
+        self.fills = fills  # [{"leg", "side", "order", "decisionPrice", "status", "avgprc", "finishedAt"}]
+        self.skewMs = skewMs
+
+    @property
+    def done(self):
+        return all(fill["status"] in TERMINAL_STATUSES for fill in self.fills)
+
+    def completed(self):
+        return [fill for fill in self.fills if fill["status"] == "COMPLETE"]
+
+
+# Strategy Runner
+def run_pairs_strategy(params, api=None, clock=None, channel=None, commands=None,
+                       quote_service=None, owner=None):
+    """Spread scalp on two instruments: when legA - hedge_ratio * legB strays
+    `entry_z` deviations from its rolling mean, buy the cheap leg and sell the
+    rich one; close both once it reverts inside `exit_z` (or stops out at
+    `stop_z`).
+
+    Runs on the same core as the ladder: one broker session, an OrderManager
+    tracking (and chasing) every leg order, and the host's QuoteService for
+    both instruments, read as one consistent cut. Both legs of a decision are
+    placed concurrently; a leg that fails while its sibling filled is
+    unwound at market so the book is never left naked.
+    """
+    clock = clock or RealClock()
+    commands = commands or CommandQueue()
+    log = partial(log_json, clock=clock, channel=channel)
+    api = api or ShoonyaApiPy()
+
+    # Destructure params
+    user = params["user"]
+    legs = [Leg(index, leg["exch"], leg["stock_name"], int(leg["quantity"]))
+            for index, leg in enumerate(params["legs"])]
+    if len(legs) != 2:
+        log("Invalid Params", {"reason": f"A pair needs exactly two legs, got {len(legs)}"})
+        return
+    hedgeRatio = float(params.get("hedge_ratio", 1.0))
+    lookback = int(params.get("lookback", LOOKBACK))
+    entryZ = float(params.setdefault("entry_z", ENTRY_Z))
+    exitZ = float(params.setdefault("exit_z", EXIT_Z))
+    stopZ = float(params.setdefault("stop_z", STOP_Z))
+    price_type = params.get("price_type", "MKT")
+    # Selling a leg short is intraday-only, hence MIS by default
+    product_type = params.get("product_type", "I")
+    duration = int(params["duration"])
+    market_closing_time = params["market_closing_time"]
+    chaseTicks = int(params.setdefault("chase_ticks", CHASE_TICKS))
+    orderTimeout = float(params.setdefault("order_timeout", ORDER_TIMEOUT))
+
+    # Login
+    try:
+        otp = pyotp.TOTP(params["token"]).now()
+    except Exception as e:
+        log("OTP Error", {"error": str(e)})
+        return
+
+    loginStatus = None
+    try:
+        loginStatus = api.login(
+            userid=user,
+            password=params["password"],
+            twoFA=otp,
+            vendor_code=params["vc"],
+            api_secret=params["app_key"],
+            imei=params["imei"]
+        )
+    except Exception as e:
+        log("Login Exception", {"error": str(e)})
+
+    if loginStatus is None or loginStatus.get("stat") != "Ok":
+        log("Login Failed", loginStatus or {"reason": "Login returned None. Possible token or session error."})
+        return
+
+    log("Login Successful", loginStatus)
+    if quote_service is not None:
+        quote_service.attach(api, owner)
+
+    # Market Time Setup
+    start_time = clock.now()
+    closing_time = datetime.strptime(market_closing_time, "%H:%M:%S")
+    closing_time_combined = datetime.combine(start_time.date(), closing_time.time())
+    closing_time_minus_30_min = closing_time_combined - timedelta(minutes=30)
+    closing_time_minus_1_min = closing_time_combined - timedelta(minutes=1)
+    EndTime = start_time + timedelta(minutes=duration)
+
+    # Instrument details (circuit limits included), and a streamed feed per
+    # leg when the host has one
+    bands = PriceBands(api, clock, log)
+    for leg in legs:
+        try:
+            quotes = api.get_quotes(exchange=leg.exch, token=leg.stock_name)
+        except Exception as e:
+            log("API Error", {"error": str(e)})
+            quotes = None
+        log("Market Quote", quotes)
+        if quotes:
+            leg.token = quotes.get("token", leg.stock_name)
+            leg.tick_size = float(quotes.get("ti") or 0) or DEFAULT_TICK_SIZE
+            bands.update(leg.exch, leg.stock_name, quotes)
+        if quote_service is not None:
+            leg.feed = quote_service.subscribe(leg.exch, leg.token, owner)
+
+    log("Strategy Runtime Info", {
+        "legs": [{"exch": leg.exch, "stock_name": leg.stock_name, "quantity": leg.quantity} for leg in legs],
+        "hedgeRatio": hedgeRatio,
+        "lookback": lookback,
+        "entryZ": entryZ,
+        "exitZ": exitZ,
+        "stopZ": stopZ,
+        "strategyEndsAt": str(EndTime),
+        "closingTime": str(closing_time_combined)
+    })
+
+    orders = OrderManager(api, clock, log, chase_ticks=chaseTicks, timeout=orderTimeout, bands=bands)
+    executor = ThreadPoolExecutor(max_workers=len(legs), thread_name_prefix="pairs")
+
+    def rest_quote(leg):
+        try:
+            return api.get_quotes(leg.exch, leg.stock_name)
+        except Exception as e:
+            log("API Error", {"error": str(e)})
+            return None
+
+    def sync_quotes():
+        # One consistent cut of the stream, or every leg fetched in parallel so
+        # the prices are at most one round trip apart
+        if quote_service is not None:
+            snapshots = quote_service.snapshot([leg.feed for leg in legs])
+            if snapshots is not None:
+                return snapshots
+        return list(executor.map(rest_quote, legs))
+
+    def order_params(leg, side, ltp, priceType):
+        tick = leg.tick_size
+        return {
+            "buy_or_sell": side,
+            "product_type": product_type,
+            "exchange": leg.exch,
+            "tradingsymbol": leg.stock_name,
+            'quantity': leg.quantity,
+            'discloseqty': 0,
+            "price_type": priceType,
+            'price': round_to_tick(ltp, tick) if priceType == "LMT" else 0,
+            'retention': 'DAY',
+            'remarks': 'By MERN Backend',
+        }
+
+    def place(orderParams):
+        placedAt = clock.monotonic()
+        try:
+            response = api.place_order(**orderParams)
+        except Exception as e:
+            response = {"stat": "Not_Ok", "emsg": str(e)}
+        return response, placedAt
+
+    def place_legs(kind, sides, ltps, priceType):
+        """Place one order per (leg, side) concurrently and track them as one group."""
+        entries = [(leg, side, ltp) for leg, side, ltp in zip(legs, sides, ltps) if side]
+        orderParamsList = [bands.check(kind, order_params(leg, side, ltp, priceType)) for leg, side, ltp in entries]
+        results = list(executor.map(place, orderParamsList))
+
+        fills = []
+        for (leg, side, ltp), orderParams, (response, placedAt) in zip(entries, orderParamsList, results):
+            order = orders.track(f"{kind} {leg.stock_name}", orderParams, response, placedAt)
+            fills.append({
+                "leg": leg,
+                "side": side,
+                "order": order,
+                "decisionPrice": float(ltp),
+                "status": "OPEN" if order else "REJECTED",
+                "avgprc": None,
+                "finishedAt": None,
+            })
+        placed = [placedAt for _, placedAt in results]
+        group = LegGroup(kind, fills, round((max(placed) - min(placed)) * 1000, 2))
+        log("Legs Placed", {
+            "kind": kind,
+            "skewMs": group.skewMs,
+            "legs": [{"leg": fill["leg"].stock_name, "side": fill["side"],
+                      "orderNo": fill["order"].orderNo if fill["order"] else None,
+                      "decisionPrice": fill["decisionPrice"]} for fill in fills]
+        })
+        return group
+
+    def track_finished(group, finished):
+        for order in finished:
+            for fill in group.fills:
+                if fill["order"] is order:
+                    fill["status"] = order.status
+                    fill["avgprc"] = float(order.avgprc) if order.avgprc else None
+                    fill["finishedAt"] = clock.monotonic()
+
+    def report_slippage(group):
+        completed = group.completed()
+        for fill in completed:
+            leg = fill["leg"]
+            # Against the price the decision was taken at; positive is worse
+            slippage = (fill["avgprc"] - fill["decisionPrice"]) * (1 if fill["side"] == "B" else -1)
+            leg.slippage.append(round(slippage, 4))
+            log("Leg Slippage", {
+                "kind": group.kind,
+                "leg": leg.stock_name,
+                "side": fill["side"],
+                "decisionPrice": fill["decisionPrice"],
+                "fillPrice": fill["avgprc"],
+                "slippage": round(slippage, 4),
+                "slippageTicks": round(slippage / leg.tick_size, 2)
+            })
+        finishedAt = [fill["finishedAt"] for fill in completed]
+        log("Legs Filled", {
+            "kind": group.kind,
+            "filled": len(completed),
+            "legs": len(group.fills),
+            "placementSkewMs": group.skewMs,
+            "fillSkewMs": round((max(finishedAt) - min(finishedAt)) * 1000, 2) if finishedAt else None
+        })
+
+    # Runtime commands from the backend, applied between decisions
+    paused = False
+    squareOffRequested = False
+    stopRequested = False
+    paramsVersion = int(params.get("params_version", 0))
+
+    def apply_params_update(message):
+        nonlocal paramsVersion, entryZ, exitZ, stopZ, chaseTicks, orderTimeout
+        version = int(message.get("version", paramsVersion + 1))
+        updates = message.get("params") or {}
+        if version <= paramsVersion:
+            log("Params Rejected", {"version": version, "reason": f"Stale version, running {paramsVersion}"})
+            return
+        try:
+            parsed = {key: parse(updates[key]) for key, parse in HOT_RELOAD_PARAMS.items() if key in updates}
+        except (TypeError, ValueError) as e:
+            log("Params Rejected", {"version": version, "reason": str(e)})
+            return
+
+        entryZ = parsed.get("entry_z", entryZ)
+        exitZ = parsed.get("exit_z", exitZ)
+        stopZ = parsed.get("stop_z", stopZ)
+        chaseTicks = parsed.get("chase_ticks", chaseTicks)
+        orderTimeout = parsed.get("order_timeout", orderTimeout)
+        orders.chase_ticks = chaseTicks
+        orders.timeout = orderTimeout
+
+        params.update({key: updates[key] for key in parsed})
+        paramsVersion = version
+        log("Params Updated", {"version": version, "params": parsed})
+
+    def apply_commands():
+        nonlocal paused, squareOffRequested, stopRequested
+        for message in commands.drain():
+            command = message.get("command")
+            if command == "update_params":
+                apply_params_update(message)
+                continue
+            if command == "pause":
+                paused = True
+            elif command == "resume":
+                paused = False
+            elif command == "square_off":
+                squareOffRequested = True
+            elif command == "stop":
+                stopRequested = True
+            else:
+                log("Unknown Command", message)
+                continue
+            log("Command Applied", {"command": command, "paused": paused})
+
+    # Position: the sides held per leg and their entry prices
+    spreads = deque(maxlen=lookback)
+    held = None     # {"direction", "sides", "entry": [avgprc per leg], "entryZ"}
+    group = None    # the LegGroup being worked
+    exitAttempts = 0
+    trades = []
+    ltps = [None] * len(legs)
+
+    def closing_sides(sides):
+        return [{"B": "S", "S": "B"}.get(side) for side in sides]
+
+    def on_group_done():
+        """Work out where a finished group leaves the book; returns False if it cannot be made flat."""
+        nonlocal group, held, exitAttempts
+        finished, group = group, None
+        report_slippage(finished)
+        completed = finished.completed()
+        sides = [None] * len(legs)
+        for fill in completed:
+            sides[fill["leg"].index] = fill["side"]
+
+        if finished.kind == "Entry":
+            if len(completed) == len(legs):
+                held = {
+                    "direction": 1 if sides[0] == "B" else -1,
+                    "sides": sides,
+                    "entry": [fill["avgprc"] for fill in sorted(completed, key=lambda fill: fill["leg"].index)],
+                }
+                log("Pair Opened", {"direction": held["direction"], "sides": sides, "entry": held["entry"]})
+            elif completed:
+                # One leg filled without the other: take it straight back off
+                log("Leg Break", {"filled": [fill["leg"].stock_name for fill in completed],
+                                  "failed": [fill["leg"].stock_name for fill in finished.fills
+                                             if fill["status"] != "COMPLETE"]})
+                held = {"direction": 0, "sides": sides,
+                        "entry": [next((fill["avgprc"] for fill in completed if fill["leg"] is leg), None)
+                                  for leg in legs]}
+                return close_pair("Unwind")
+            else:
+                log("Entry Failed", {"legs": [fill["status"] for fill in finished.fills]})
+            return True
+
+        # Exit or Unwind: whatever filled is off the book
+        pnl = 0.0
+        for fill in completed:
+            index = fill["leg"].index
+            entry = held["entry"][index]
+            if entry is not None:
+                pnl += (fill["avgprc"] - entry) * fill["leg"].quantity * (1 if fill["side"] == "S" else -1)
+            held["sides"][index] = None
+        if any(held["sides"]):
+            exitAttempts += 1
+            if exitAttempts >= MAX_EXIT_ATTEMPTS:
+                log("Leg Stuck", {"sides": held["sides"], "attempts": exitAttempts})
+                return False
+            return close_pair(finished.kind)
+        trades.append(round(pnl, 2))
+        log("Pair Closed", {"kind": finished.kind, "direction": held["direction"], "pnl": round(pnl, 2),
+                            "trades": len(trades), "totalPnl": round(sum(trades), 2)})
+        held = None
+        exitAttempts = 0
+        return True
+
+    def close_pair(kind):
+        # Exits go at market: being flat matters more than the price
+        nonlocal group
+        group = place_legs(kind, closing_sides(held["sides"]),
+                           [ltp if ltp is not None else 0 for ltp in ltps], "MKT")
+        return True
+
+    def settle():
+        """Work the current group (and any unwind it leads to) until nothing is open."""
+        while group is not None:
+            track_finished(group, orders.settle(clock.ticker(ORDER_POLL_INTERVAL),
+                                                {leg.stock_name: ltp for leg, ltp in zip(legs, ltps)}))
+            if not group.done:
+                log("Legs Unsettled", {"kind": group.kind, "legs": [fill["status"] for fill in group.fills]})
+                return False
+            if not on_group_done():
+                return False
+        return True
+
+    # Start Algo trade
+    loopTicker = clock.ticker(float(params.get("loop_interval", LOOP_INTERVAL)))
+    while True:
+        apply_commands()
+        if stopRequested:
+            # As with the ladder, stop leaves the pair on; only working orders go
+            orders.cancel_all("Strategy Stopped")
+            settle()
+            log("Strategy Stopped", {"held": held["sides"] if held else None})
+            break
+
+        quotes = sync_quotes()
+        ltps = [float(quote["lp"]) if quote and quote.get("lp") else None for quote in quotes]
+        for leg, quote in zip(legs, quotes):
+            bands.update(leg.exch, leg.stock_name, quote)
+        bands.refresh()
+        log("Quotes", {leg.stock_name: ltp for leg, ltp in zip(legs, ltps)})
+
+        if group is not None:
+            track_finished(group, orders.poll({leg.stock_name: ltp for leg, ltp in zip(legs, ltps)}))
+            if group.done and not on_group_done():
+                break
+
+        current_time = clock.now()
+        if current_time > EndTime or current_time > closing_time_minus_1_min or squareOffRequested:
+            orders.cancel_all("Square Off")
+            settle()
+            if held is not None and group is None:
+                close_pair("Exit")
+                settle()
+            log("End Time Reached", {"trades": len(trades), "totalPnl": round(sum(trades), 2)})
+            break
+
+        if None in ltps:
+            loopTicker.wait()
+            continue
+
+        spread = ltps[0] - hedgeRatio * ltps[1]
+        spreads.append(spread)
+        if len(spreads) < lookback:
+            log("Waiting for Spread History", {"samples": len(spreads), "lookback": lookback})
+            loopTicker.wait()
+            continue
+
+        mean = statistics.fmean(spreads)
+        deviation = statistics.pstdev(spreads, mean)
+        z = (spread - mean) / deviation if deviation > 0 else 0.0
+        log("Spread Info", {"spread": round(spread, 4), "mean": round(mean, 4),
+                            "deviation": round(deviation, 4), "z": round(z, 3),
+                            "held": held["direction"] if held else 0})
+
+        if group is None:
+            if held is None:
+                if abs(z) >= entryZ and not paused and current_time < closing_time_minus_30_min:
+                    # Spread rich: sell A, buy B; spread cheap: buy A, sell B
+                    sides = ["S", "B"] if z > 0 else ["B", "S"]
+                    group = place_legs("Entry", sides, ltps, price_type)
+            elif held["direction"] != 0:
+                entered = -held["direction"]  # the sign z had on the way in
+                if z * entered <= exitZ:
+                    close_pair("Exit")
+                elif z * entered >= stopZ:
+                    log("Spread Stop", {"z": round(z, 3), "stopZ": stopZ})
+                    close_pair("Exit")
+
+        loopTicker.wait()
+
+    log("Pairs Report", {
+        "trades": len(trades),
+        "totalPnl": round(sum(trades), 2),
+        "legs": [leg.report() for leg in legs]
+    })
+    executor.shutdown(wait=False)
+    # The shared stream moves off this session before it is logged out
+    if quote_service is not None:
+        quote_service.release(owner)
+
+    try:
+        log("Logout Response", api.logout())
+        log("User Logged Out", {"user_id": user})
+    except Exception as e:
+        log("Logout Error", {"error": str(e)})
@@ -0,0 +1,173 @@
+import math
+import os
+import threading
+from clock import Ticker
+
+REQUEST_BUDGET = float(os.environ.get("STRATEGY_REQUEST_BUDGET", "200"))  # REST calls per minute per account
+BURST_SECONDS = 10.0    # budget that may be spent in one go
+NEAR_TICKS = 2          # at or inside this distance from a trigger, poll at min_interval
+FAR_TICKS = 40          # at or beyond it, back off to max_interval
+
+# NorenApi calls that are one REST request each
+METERED_CALLS = frozenset((
+    "get_quotes",
+    "get_positions",
+    "get_limits",
+    "get_order_book",
+    "single_order_history",
+    "place_order",
+    "modify_order",
+    "cancel_order",
+))
+
+
+# Per-account rate limit
+class RequestBudget:
+    """Token bucket of REST calls for one broker account.
+
+    Calls are charged after they are made (the bucket may go into debt), and
+    pollers wait until it holds enough for their next pass, so the average
+    rate stays within `per_minute` while short bursts near a trigger are
+    allowed.
+    """
+
+    def __init__(self, per_minute, clock, burst_seconds=BURST_SECONDS):
+        self.clock = clock
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.spent = 0
+        self._updated = clock.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def spend(self, calls=1):
+        with self._lock:
+            self._refill(self.clock.monotonic())
+            self.tokens -= calls
+            self.spent += calls
+
+    def ready_at(self, calls=1):
+        """Monotonic time at which `calls` more requests fit in the budget."""
+        with self._lock:
+            now = self.clock.monotonic()
+            self._refill(now)
+            if self.tokens >= calls:
+                return now
+            return now + (calls - self.tokens) / self.rate
+
+    def acquire(self, calls=1):
+        """Sleep until `calls` more requests fit in the budget."""
+        self.clock.sleep_until(self.ready_at(calls))
+
+
+class BudgetPool:
+    """One RequestBudget per account, shared by every strategy on it in this host."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._budgets = {}
+
+    def get(self, account, per_minute, clock):
+        # The first strategy on an account sets its rate
+        with self._lock:
+            budget = self._budgets.get(account)
+            if budget is None:
+                budget = self._budgets[account] = RequestBudget(per_minute, clock)
+            return budget
+
+
+BUDGETS = BudgetPool()
+
+
+# Fixed-interval polling within the budget
+class BudgetedTicker(Ticker):
+    """Ticker for the waits between decision passes (an order still OPEN, a
+    position not yet reported) on a MeteredApi: each `wait()` also holds the
+    next pass until the account's budget can pay for as many calls as the
+    previous one made, so tight inner loops slow down with everything else
+    on the account instead of spending past it."""
+
+    def __init__(self, clock, interval, api):
+        super().__init__(clock, interval)
+        self.api = api
+        self._passCalls = api.calls
+
+    def wait(self):
+        super().wait()
+        self.api.budget.acquire(max(1, self.api.calls - self._passCalls))
+        self._passCalls = self.api.calls
+
+
+# Broker facade that counts
+class MeteredApi:
+    """Passes every call through to `api`, charging REST calls to `budget`."""
+
+    def __init__(self, api, budget):
+        self.api = api
+        self.budget = budget
+        self.calls = 0  # this strategy's share of the budget's spend
+
+    def __getattr__(self, name):
+        attr = getattr(self.__dict__["api"], name)
+        if name not in METERED_CALLS:
+            return attr
+
+        def metered(*args, **kwargs):
+            self.calls += 1
+            self.budget.spend()
+            return attr(*args, **kwargs)
+        return metered
+
+
+# Trigger-aware loop pacing
+class AdaptivePoller:
+    """Decision-loop pacing that follows the market instead of a fixed period.
+
+    Before each `wait()` the strategy calls `aim()` with the LTP and the
+    prices its next decision turns on (entry, target, stop, working limits).
+    Within NEAR_TICKS of one of them the loop runs at `min_interval`, beyond
+    FAR_TICKS it backs off to `max_interval`, and in between the interval
+    grows geometrically with the distance. Whatever the market, a pass never
+    starts before the account's RequestBudget can pay for it (as many calls
+    as the previous pass made). Like Ticker, time spent inside a pass counts
+    towards the interval.
+    """
+
+    def __init__(self, clock, api, min_interval, max_interval,
+                 near_ticks=NEAR_TICKS, far_ticks=FAR_TICKS):
+        self.clock = clock
+        self.api = api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.near_ticks = near_ticks
+        self.far_ticks = far_ticks
+        self.interval = max_interval
+        self.distance = None  # ticks to the nearest trigger at the last aim()
+        self.throttled = False
+        self._passStart = clock.monotonic()
+        self._passCalls = api.calls
+
+    def aim(self, ltp, triggers, tick_size):
+        distances = [abs(float(ltp) - float(price)) / tick_size for price in triggers if price is not None]
+        self.distance = min(distances) if distances else None
+        if self.distance is None or self.distance >= self.far_ticks:
+            self.interval = self.max_interval
+        elif self.distance <= self.near_ticks:
+            self.interval = self.min_interval
+        else:
+            fraction = math.log(self.distance / self.near_ticks) / math.log(self.far_ticks / self.near_ticks)
+            self.interval = self.min_interval * (self.max_interval / self.min_interval) ** fraction
+        return self.interval
+
+    def wait(self):
+        calls = max(1, self.api.calls - self._passCalls)
+        due = self._passStart + self.interval
+        affordable = self.api.budget.ready_at(calls)
+        self.throttled = affordable > due
+        self.clock.sleep_until(max(due, affordable))
+        self._passStart = self.clock.monotonic()
+        self._passCalls = self.api.calls
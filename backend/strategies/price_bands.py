@@ -0,0 +1,119 @@
+import math
+
+REFRESH_AFTER = 900.0   # seconds before a band nobody has re-reported is fetched again
+PRICE_DECIMALS = 4
+
+
+# One instrument's tradable prices for the day
+class PriceBand:
+    __slots__ = ("lower", "upper", "tick", "updatedAt")
+
+    def __init__(self, lower, upper, tick, updatedAt):
+        self.lower = lower
+        self.upper = upper
+        self.tick = tick
+        self.updatedAt = updatedAt
+
+
+def _price(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+# Pre-trade price validation
+class PriceBands:
+    """Circuit limits (uc/lc) and tick size per instrument, checked before
+    an order price leaves the process.
+
+    Bands are taken from quotes the strategy already fetches (`update` is
+    fed every REST quote and streamed touchline, and only changes what they
+    carry), so keeping them current costs nothing; one whose source stopped
+    reporting limits is re-fetched after `refresh_after` seconds. Checking a
+    price is a dict lookup and a few float operations: limit prices are
+    snapped onto the tick grid on the passive side (buys down, sells up) and
+    clamped into the band, so an order the exchange would reject for its
+    price is fixed here instead of costing a round trip and a REJECTED.
+    """
+
+    def __init__(self, api, clock, log, refresh_after=REFRESH_AFTER):
+        self.api = api
+        self.clock = clock
+        self.log = log
+        self.refresh_after = refresh_after
+        self.bands = {}  # "NSE|SBIN-EQ" -> PriceBand
+
+    def update(self, exch, tradingsymbol, quote):
+        """Fold the uc/lc/ti of any quote for the instrument into its band."""
+        if not quote:
+            return
+        lower, upper, tick = _price(quote.get("lc")), _price(quote.get("uc")), _price(quote.get("ti"))
+        if lower is None and upper is None and tick is None:
+            return
+        key = f"{exch}|{tradingsymbol}"
+        band = self.bands.get(key)
+        if band is None:
+            band = self.bands[key] = PriceBand(None, None, None, None)
+        before = (band.lower, band.upper, band.tick)
+        band.lower = band.lower if lower is None else lower
+        band.upper = band.upper if upper is None else upper
+        band.tick = band.tick if tick is None else tick
+        if lower is not None or upper is not None:
+            band.updatedAt = self.clock.monotonic()
+        if (band.lower, band.upper, band.tick) != before:
+            self.log("Price Band", {"instrument": key, "lower": band.lower, "upper": band.upper, "tick": band.tick})
+
+    def load(self, exch, tradingsymbol):
+        try:
+            quote = self.api.get_quotes(exch, tradingsymbol)
+        except Exception as e:
+            self.log("API Error", {"error": str(e)})
+            return
+        self.update(exch, tradingsymbol, quote)
+
+    def refresh(self):
+        """Re-fetch bands no quote has confirmed for `refresh_after` seconds."""
+        now = self.clock.monotonic()
+        for key, band in list(self.bands.items()):
+            if band.updatedAt is None or now - band.updatedAt > self.refresh_after:
+                band.updatedAt = now  # one attempt per period, even if it fails
+                exch, tradingsymbol = key.split("|", 1)
+                self.load(exch, tradingsymbol)
+
+    def limit_price(self, exch, tradingsymbol, side, price):
+        """`price` on the tick grid (rounded passively for `side`) and inside the band."""
+        band = self.bands.get(f"{exch}|{tradingsymbol}")
+        price = float(price)
+        if band is None:
+            return price
+        if band.tick:
+            steps = price / band.tick
+            steps = math.floor(steps + 1e-9) if side == "B" else math.ceil(steps - 1e-9)
+            price = round(steps * band.tick, PRICE_DECIMALS)
+        if band.upper is not None and price > band.upper:
+            price = band.upper
+        if band.lower is not None and price < band.lower:
+            price = band.lower
+        return price
+
+    def check(self, kind, orderParams):
+        """The order with a placeable price; logs what it had to change."""
+        if orderParams.get("price_type") not in ("LMT", "SL-LMT"):
+            return orderParams
+        price = float(orderParams.get("price") or 0)
+        checked = self.limit_price(orderParams["exchange"], orderParams["tradingsymbol"],
+                                   orderParams["buy_or_sell"], price)
+        if checked == price:
+            return orderParams
+        band = self.bands[f"{orderParams['exchange']}|{orderParams['tradingsymbol']}"]
+        self.log("Order Price Adjusted", {
+            "kind": kind,
+            "from": price,
+            "to": checked,
+            "lower": band.lower,
+            "upper": band.upper,
+            "tick": band.tick
+        })
+        return dict(orderParams, price=checked)
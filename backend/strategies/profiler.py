@@ -0,0 +1,164 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+PROFILE_DIR = os.environ.get("STRATEGY_PROFILE_DIR",
+                             os.path.join(tempfile.gettempdir(), "strategy-profiles"))
+SAMPLE_INTERVAL = 0.005   # seconds between stack samples
+MAX_SECONDS = 300.0
+ALLOCATION_FRAMES = 8     # traceback depth kept per allocation while tracing
+TOP = 15
+
+# Leaf frames of a thread that is waiting rather than working (pacing
+# sleeps, idle executors, the stdin reader); kept in the flame graph but
+# left out of the hot-spot tables
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("clock.py", "sleep_until"),
+    ("ipc.py", "read_frames"),
+}
+
+
+def frame_label(code, lineno=None):
+    name = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({name}:{lineno})" if lineno else f"{code.co_name} ({name})"
+
+
+def collapse(frame):
+    """Root-first `a;b;c` stack of `frame`, one entry per function."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def is_idle(frame):
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_LEAVES
+
+
+# On-demand sampling profiler
+class StackSampler:
+    """Samples the stack of every thread in the process for a time window.
+
+    Nothing is installed while it is not running (no settrace/setprofile
+    hooks, tracemalloc off), so a host that is not being profiled pays
+    nothing. While it runs, a background thread reads sys._current_frames()
+    every `interval` seconds and counts collapsed stacks per thread; with
+    `allocations`, tracemalloc records where memory is allocated for the
+    same window. The result is a collapsed-stack file (the input format of
+    flamegraph.pl and speedscope) plus a report of the hottest functions and
+    allocation sites, handed to `on_done`. `on_done` is called exactly once,
+    with {"error": ...} if the capture failed.
+    """
+
+    def __init__(self, seconds, on_done, interval=SAMPLE_INTERVAL, allocations=False, out_dir=PROFILE_DIR):
+        self.seconds = min(float(seconds), MAX_SECONDS)
+        self.interval = max(float(interval), 0.001)
+        self.allocations = allocations
+        self.out_dir = out_dir
+        self.on_done = on_done
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Only tracing this sampler turned on is turned off again
+        startedTracing = self.allocations and not tracemalloc.is_tracing()
+        report = {"error": "Profiler stopped unexpectedly"}
+        try:
+            if startedTracing:
+                tracemalloc.start(ALLOCATION_FRAMES)
+            report = self._capture()
+        except Exception as e:
+            report = {"error": str(e)}
+        finally:
+            if startedTracing:
+                tracemalloc.stop()
+            self.on_done(report)
+
+    def _capture(self):
+        ownId = threading.get_ident()
+        stacks = Counter()        # "thread;root;...;leaf" -> samples
+        selfTime = Counter()      # leaf function -> busy samples
+        totalTime = Counter()     # function anywhere on a busy stack -> samples
+        samples = busy = 0
+        names = {}
+        started = time.monotonic()
+        deadline = started + self.seconds
+
+        while time.monotonic() < deadline and not self._stop.is_set():
+            frames = sys._current_frames()
+            if frames.keys() - names.keys():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == ownId:
+                    continue
+                samples += 1
+                stacks[f"{names.get(ident, ident)};{collapse(frame)}"] += 1
+                if is_idle(frame):
+                    continue
+                busy += 1
+                selfTime[frame_label(frame.f_code, frame.f_lineno)] += 1
+                seen = set()
+                while frame is not None:
+                    label = frame_label(frame.f_code)
+                    if label not in seen:
+                        seen.add(label)
+                        totalTime[label] += 1
+                    frame = frame.f_back
+            del frames
+            self._stop.wait(self.interval)
+
+        elapsed = time.monotonic() - started
+        allocations = self._allocation_report() if self.allocations else None
+        path = self._write(stacks)
+
+        def share(counter):
+            return [{"frame": label, "samples": count, "pct": round(100.0 * count / busy, 1)}
+                    for label, count in counter.most_common(TOP)] if busy else []
+
+        return {
+            "file": path,
+            "seconds": round(elapsed, 2),
+            "intervalMs": round(self.interval * 1000, 2),
+            "samples": samples,
+            "busySamples": busy,
+            "threads": len(names),
+            "selfTime": share(selfTime),
+            "totalTime": share(totalTime),
+            "allocations": allocations,
+        }
+
+    def _allocation_report(self):
+        snapshot = tracemalloc.take_snapshot()
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        return [{
+            "where": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            "sizeKb": round(stat.size / 1024, 1),
+            "blocks": stat.count,
+        } for stat in snapshot.statistics("lineno")[:TOP]]
+
+    def _write(self, stacks):
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir,
+                            f"strategy-{os.getpid()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded")
+        with open(path, "w") as out:
+            for stack, count in stacks.most_common():
+                out.write(f"{stack} {count}\n")
+        return path
@@ -0,0 +1,177 @@
+import threading
+from types import MappingProxyType
+from clock import RealClock
+
+STALE_AFTER = 30.0      # seconds without a tick before a feed defers to REST
+
+
+# Per-strategy view of one instrument
+class QuoteFeed:
+    def __init__(self, service, key, owner):
+        self.service = service
+        self.key = key
+        self.owner = owner
+        self.snapshot = None
+        self.received_at = None
+        self.updated = threading.Event()
+
+    def _publish(self, snapshot, received_at):
+        self.snapshot = snapshot
+        self.received_at = received_at
+        self.updated.set()
+
+    def latest(self):
+        """Newest touchline snapshot, or None when the stream cannot be trusted."""
+        if self.snapshot is None or not self.service.connected:
+            return None
+        if self.service.clock.monotonic() - self.received_at > self.service.stale_after:
+            return None
+        return self.snapshot
+
+
+# Shared touchline stream
+class QuoteService:
+    """One websocket touchline subscription shared by every strategy in a host.
+
+    The set of instruments is the union of all strategies' subscriptions, sent
+    to the broker as one batched `subscribe`, so broker traffic grows with the
+    number of distinct symbols rather than the number of strategies. Each
+    tick is merged into a new read-only snapshot that is handed to every
+    interested feed as-is; subscribers share it instead of copying.
+
+    Every strategy offers its logged-in session through `attach`; the stream
+    runs on one of them, whichever account that is (a touchline is the same
+    for every account). When its owner is released the stream moves to
+    another attached session and resubscribes every instrument, so one
+    strategy logging out does not take the stream away from the rest. Until
+    the new socket is open, and whenever no session is left, feeds report
+    None and strategies read quotes over REST on their own sessions.
+    """
+
+    def __init__(self, clock=None, stale_after=STALE_AFTER):
+        self.clock = clock or RealClock()
+        self.stale_after = stale_after
+        self.connected = False
+        self._api = None
+        self._owner = None
+        self._sessions = {}   # owner -> logged-in api offered through attach
+        self._lock = threading.Lock()
+        self._feeds = {}      # "NSE|2885" -> [QuoteFeed]
+        self._snapshots = {}  # "NSE|2885" -> MappingProxyType
+
+    def attach(self, api, owner):
+        """Offer `owner`'s logged-in session; the stream starts on the first one."""
+        with self._lock:
+            self._sessions[owner] = api
+            if self._api is not None:
+                return False
+            self._api, self._owner = api, owner
+        self._connect(api)
+        return True
+
+    def _connect(self, api):
+        # NorenApi reconnects on its own and calls socket_open again, which
+        # resubscribes; the callbacks ignore a session the stream has left
+        api.start_websocket(
+            subscribe_callback=self._on_tick,
+            socket_open_callback=lambda: self._on_open(api),
+            socket_close_callback=lambda *args: self._on_close(api),
+        )
+
+    def _on_open(self, api):
+        with self._lock:
+            if api is not self._api:
+                return
+            self.connected = True
+            keys = list(self._feeds)
+        if keys:
+            api.subscribe(keys)
+
+    def _on_close(self, api):
+        with self._lock:
+            if api is self._api:
+                self.connected = False
+
+    def _detach(self, owner):
+        """Forget `owner`'s session, moving the stream off it if it carried it."""
+        with self._lock:
+            self._sessions.pop(owner, None)
+            if owner != self._owner:
+                return
+            previous = self._api
+            self._owner, self._api = next(iter(self._sessions.items()), (None, None))
+            api = self._api
+            if api is previous:
+                return
+            self.connected = False
+        # close_websocket joins the socket thread, which can wait out the
+        # close handshake; nothing here depends on it finishing
+        threading.Thread(target=self._close, args=(previous,), daemon=True).start()
+        if api is not None:
+            self._connect(api)
+
+    @staticmethod
+    def _close(api):
+        try:
+            api.close_websocket()
+        except Exception:
+            pass
+
+    def _on_tick(self, tick):
+        key = f"{tick['e']}|{tick['tk']}"
+        received_at = self.clock.monotonic()
+        with self._lock:
+            # 'tk' carries the full touchline, 'tf' only the fields that changed
+            merged = dict(self._snapshots.get(key) or {})
+            merged.update(tick)
+            snapshot = MappingProxyType(merged)
+            self._snapshots[key] = snapshot
+            feeds = tuple(self._feeds.get(key, ()))
+        for feed in feeds:
+            feed._publish(snapshot, received_at)
+
+    def subscribe(self, exch, token, owner):
+        key = f"{exch}|{token}"
+        feed = QuoteFeed(self, key, owner)
+        with self._lock:
+            feeds = self._feeds.setdefault(key, [])
+            first = not feeds
+            feeds.append(feed)
+            snapshot = self._snapshots.get(key)
+            connected = self.connected
+            api = self._api
+        if snapshot is not None:
+            feed._publish(snapshot, self.clock.monotonic())
+        if first and connected:
+            api.subscribe(key)
+        return feed
+
+    def release(self, owner):
+        """Drop every feed and the session held by `owner`, unsubscribing
+        instruments nobody needs. Call it before logging the session out."""
+        dropped = []
+        with self._lock:
+            for key, feeds in list(self._feeds.items()):
+                feeds[:] = [feed for feed in feeds if feed.owner != owner]
+                if not feeds:
+                    del self._feeds[key]
+                    self._snapshots.pop(key, None)
+                    dropped.append(key)
+            connected = self.connected
+            api = self._api
+        if dropped and connected:
+            api.unsubscribe(dropped)
+        self._detach(owner)
+
+    def snapshot(self, feeds):
+        """Newest snapshots of several feeds read as one consistent cut, or None
+        if any of them is not live (see QuoteFeed.latest)."""
+        if any(feed.latest() is None for feed in feeds):
+            return None
+        # Ticks are merged under the lock, so no instrument moves mid-read
+        with self._lock:
+            return [self._snapshots.get(feed.key) or feed.snapshot for feed in feeds]
+
+    def symbols(self):
+        with self._lock:
+            return {key: len(feeds) for key, feeds in self._feeds.items()}
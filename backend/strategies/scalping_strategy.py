@@ -1,43 +1,88 @@
+import os
 import sys
-import time
 import json
 import logging
 from datetime import datetime, timedelta
+from functools import partial
 from NorenRestApiPy.NorenApi import NorenApi
 import pyotp  # <-- TOTP support
+from clock import RealClock
+from ipc import EventChannel, CommandQueue
+from order_manager import OrderManager, CHASE_TICKS, ORDER_TIMEOUT
+from fanout import FanoutApi
+from poll_scheduler import AdaptivePoller, BudgetedTicker, MeteredApi, BUDGETS, REQUEST_BUDGET
+from price_bands import PriceBands
+from pacing import POSITION_POLL_INTERVAL, ORDER_POLL_INTERVAL, MIN_POLL_INTERVAL, MAX_POLL_INTERVAL
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logging.getLogger('NorenRestApiPy.NorenApi').setLevel(logging.WARNING)
 logging.getLogger('urllib3.connectionpool').setLevel(logging.WARNING)
 
+# Broker endpoints; overridable so benchmarks can point at a local stub
+SHOONYA_HOST = os.environ.get("SHOONYA_HOST", 'https://api.shoonya.com/NorenWClientTP/')
+SHOONYA_WEBSOCKET = os.environ.get("SHOONYA_WEBSOCKET", 'wss://api.shoonya.com/NorenWSTP/')
+
+# Params a running strategy accepts through update_params, with their parsers.
+# Instrument and credentials are fixed for the life of a session.
+HOT_RELOAD_PARAMS = {
+    "price_type": str,
+    "initial_buy_price": float,
+    "target_price_diff": float,
+    "entry_diff_price": float,
+    "lot_size": int,
+    "max_open_position": int,
+    "duration": int,
+    "market_closing_time": str,
+    "debug_on": lambda value: value == 'True',
+    "chase_ticks": int,
+    "order_timeout": float,
+}
+FIXED_PARAMS = ("exch", "stock_name", "side", "product_type")
+
+LADDER_SIDES = ("long", "short")
+PRODUCT_TYPES = ("C", "I")  # CNC (delivery), MIS (intraday)
+
 # Custom API Wrapper
 class ShoonyaApiPy(NorenApi):
     def __init__(self):
         super().__init__(
-            host='https://api.shoonya.com/NorenWClientTP/',
-            websocket='wss://api.shoonya.com/NorenWSTP/'
+            host=SHOONYA_HOST,
+            websocket=SHOONYA_WEBSOCKET
         )
         global api
         api = self
 
 # Logging helper
-def log_json(tag, data):
-    # Convert datetime objects to strings
-    def default_converter(o):
-        if isinstance(o, datetime):
-            return o.isoformat()
-        raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
-
-    print(json.dumps({
-        "tag": tag,
-        "timestamp": datetime.now().isoformat(),
-        "data": data
-    }, indent=2, default=default_converter))
+stdout_channel = EventChannel()
+
+def log_json(tag, data, clock=None, channel=None):
+    # One compact JSON frame per event (see ipc.py)
+    (channel or stdout_channel).event(tag, data, (clock.now() if clock else datetime.now()).isoformat())
+
+SECRET_PARAMS = ("password", "token", "app_key")
+
+def redacted_params(params):
+    # Params as they may be logged: the feed reaches viewers and run logs,
+    # so credentials are masked and fan-out accounts reduced to their user ids
+    safe = {key: ("***" if key in SECRET_PARAMS else value) for key, value in params.items()}
+    if params.get("accounts"):
+        safe["accounts"] = [account.get("user") for account in params["accounts"]]
+    return safe
 
 # Strategy Runner
-def run_scalping_strategy(params):
-    api = ShoonyaApiPy()
+def run_scalping_strategy(params, api=None, clock=None, channel=None, commands=None,
+                          quote_service=None, owner=None):
+    # api and clock are injectable so the strategy can run against a simulated broker;
+    # quote_service is the host's shared touchline stream (see quote_service.py)
+    clock = clock or RealClock()
+    commands = commands or CommandQueue()
+    log = partial(log_json, clock=clock, channel=channel)
+    setupStartedAt = clock.monotonic()
+    if api is None and params.get("accounts"):
+        # Fan-out: every order is mirrored onto the listed accounts (see fanout.py)
+        api = FanoutApi(params["accounts"], ShoonyaApiPy, log, clock, side=params.get("side") or "long")
+    api = api or ShoonyaApiPy()
 
     # Destructure params
     token = params["token"]  # This is the TOTP key, not OTP
@@ -57,16 +102,73 @@ def run_scalping_strategy(params):
     duration = int(params["duration"])
     market_closing_time = params["market_closing_time"]
     debugOn = params["debug_on"] == 'True'
+    chaseTicks = int(params.setdefault("chase_ticks", CHASE_TICKS))
+    orderTimeout = float(params.setdefault("order_timeout", ORDER_TIMEOUT))
+    ladderSide = params.setdefault("side", "long")
+    # Shorts cannot be carried overnight in the cash segment, so they default to MIS
+    product_type = params.setdefault("product_type", "I" if ladderSide == "short" else "C")
+    # Fraction of a lot's value an MIS position blocks. It varies by scrip and
+    # the broker's limits do not report it, so intraday ladders must set it.
+    intradayMargin = params.get("intraday_margin")
+    requestBudget = float(params.get("request_budget") or REQUEST_BUDGET)
+
+    if ladderSide not in LADDER_SIDES or product_type not in PRODUCT_TYPES:
+        log("Invalid Params", {"side": ladderSide, "product_type": product_type,
+                               "reason": f"side must be one of {LADDER_SIDES}, product_type one of {PRODUCT_TYPES}"})
+        return
+    if ladderSide == "short" and product_type != "I":
+        log("Invalid Params", {"side": ladderSide, "product_type": product_type,
+                               "reason": "A short ladder needs the intraday (I) product"})
+        return
+    if product_type == "I":
+        try:
+            intradayMargin = float(intradayMargin)
+        except (TypeError, ValueError):
+            intradayMargin = None
+        if intradayMargin is None or not 0 < intradayMargin <= 1:
+            log("Invalid Params", {"product_type": product_type, "intraday_margin": params.get("intraday_margin"),
+                                   "reason": "The intraday (I) product needs intraday_margin, a fraction in (0, 1]"})
+            return
+
+    # Armed start (pre-market warmup): login, instrument, limits, positions and
+    # the quote subscription are done now; the first decision waits for arm_at
+    armAt = None
+    if params.get("arm_at"):
+        try:
+            armAt = datetime.combine(clock.now().date(), datetime.strptime(params["arm_at"], "%H:%M:%S").time())
+        except ValueError as e:
+            log("Invalid Params", {"arm_at": params["arm_at"], "reason": str(e)})
+            return
+
+    # Ladder direction: a long ladder buys dips and sells strength, a short one
+    # mirrors it (sells rallies, covers dips). "Buy" in labels and names below
+    # is the entry side and "Sell" the exit; prices go through these helpers
+    # so both directions share one code path.
+    ladderSign = 1 if ladderSide == "long" else -1
+    entrySide, exitSide = ("B", "S") if ladderSign > 0 else ("S", "B")
+    avgPriceField = "daybuyavgprc" if ladderSign > 0 else "daysellavgprc"
+
+    def adverse(price, level):
+        # price is past level against the ladder (below it for a long ladder)
+        return ladderSign * (float(price) - float(level)) < 0
+
+    def shifted(price, diff):
+        # price moved by diff in the ladder's favour (up for a long ladder)
+        return float(price) + ladderSign * float(diff)
+
+    def held_qty(netqty):
+        # Position netqty as quantity held in the ladder's direction
+        return ladderSign * int(float(netqty))
 
     # Convert TOTP key to current OTP
     try:
         otp = pyotp.TOTP(token).now()
     except Exception as e:
-        log_json("OTP Error", {"error": str(e)})
+        log("OTP Error", {"error": str(e)})
         return
 
     # Debug login inputs
-    log_json("Login Inputs", {
+    log("Login Inputs", {
         "user": user,
         "otp": otp,
         "vc": vc,
@@ -86,57 +188,73 @@ def run_scalping_strategy(params):
             imei=imei
         )
     except Exception as e:
-        log_json("Login Exception", {"error": str(e)})
+        log("Login Exception", {"error": str(e)})
 
-    log_json("Raw Login Response", loginStatus)
+    log("Raw Login Response", loginStatus)
 
     if loginStatus is None:
-        log_json("Login Failed", {"reason": "Login returned None. Possible token or session error."})
+        log("Login Failed", {"reason": "Login returned None. Possible token or session error."})
         return
     elif loginStatus.get("stat") != "Ok":
-        log_json("Login Failed", loginStatus)
+        log("Login Failed", loginStatus)
         return
 
-    log_json("Login Successful", loginStatus)
+    log("Login Successful", loginStatus)
+    # From here every REST call is charged to the account's per-minute budget
+    api = MeteredApi(api, BUDGETS.get(user, requestBudget, clock))
+
+    # Inner polls (order status, positions) wait for the budget too
+    def pollTicker(interval):
+        return BudgetedTicker(clock, interval, api)
+    if quote_service is not None:
+        quote_service.attach(api, owner)
 
     # Market Time Setup
-    current_time = datetime.now()
+    current_time = clock.now()
     closing_time = datetime.strptime(market_closing_time, "%H:%M:%S")
     closing_time_combined = datetime.combine(current_time.date(), closing_time.time())
     closing_time_minus_30_min = closing_time_combined - timedelta(minutes=30)
     closing_time_minus_1_min = closing_time_combined - timedelta(minutes=1)
 
     # Log the calculated times for debugging
-    log_json("Market Times", {
+    log("Market Times", {
         "closing_time_combined": str(closing_time_combined),
         "closing_time_minus_30_min": str(closing_time_minus_30_min),
         "closing_time_minus_1_min": str(closing_time_minus_1_min)  # Log this variable
     })
 
     # Optional: Fetch Market Data
+    quotes = None
     try:
         quotes = api.get_quotes(exchange=exch, token=stock_name)  # Use the actual stock token
         limits = api.get_limits()
-        log_json("Market Quote", quotes)
-        log_json("Cash Limit", limits)
+        log("Market Quote", quotes)
+        log("Cash Limit", limits)
     except Exception as e:
-        log_json("API Error", {"error": str(e)})
+        log("API Error", {"error": str(e)})
+
+    # Stream LTP through the host's shared subscription when one is available
+    quoteFeed = None
+    if quote_service is not None and quotes:
+        quoteFeed = quote_service.subscribe(exch, quotes.get("token", stock_name), owner)
 
     # Strategy Info
     stopLossInRs = entryDiffPrice * (maxOpenPosition + 1)
     runtime_info = {
+        "side": ladderSide,
+        "productType": product_type,
         "initialBuyPrice": initialBuyPrice,
         "stopLoss": stopLossInRs,
         "strategyEndsAt": str(current_time + timedelta(seconds=duration)),
         "closingTime": str(closing_time_combined),
         "closingTimeMinus30Min": str(closing_time_minus_30_min)
     }
-    log_json("Strategy Runtime Info", runtime_info)
+    log("Strategy Runtime Info", runtime_info)
 
     # Initialize order parameters
     buyOrderParams = {
-        "buy_or_sell": "B",
-        "product_type": "C",
+        "buy_or_sell": entrySide,
+        "product_type": product_type,
         "exchange": exch,
         "tradingsymbol": stock_name,
         'quantity': lotSize,
@@ -148,8 +266,8 @@ def run_scalping_strategy(params):
     }
 
     sellOrderParams = {
-        "buy_or_sell": "S",
-        "product_type": "C",
+        "buy_or_sell": exitSide,
+        "product_type": product_type,
         "exchange": exch,
         "tradingsymbol": stock_name,
         'quantity': lotSize,
@@ -160,30 +278,196 @@ def run_scalping_strategy(params):
         'remarks': 'By MERN Backend',
     }
 
+    # Circuit limits and tick size, kept current from the quotes read below,
+    # so limit prices are fixed before they reach the exchange
+    bands = PriceBands(api, clock, log)
+    bands.update(exch, stock_name, quotes)
+
+    # Limit entries are worked (chased, timed out) between decisions instead of awaited
+    orders = OrderManager(api, clock, log,
+                          tick_size=float(quotes.get("ti") or 0) if quotes else None,
+                          chase_ticks=chaseTicks, timeout=orderTimeout, bands=bands)
+
+    def current_ltp():
+        # Streamed LTP while it is live, REST otherwise
+        latest = (quoteFeed.latest() if quoteFeed else None) or api.get_quotes(exch, stock_name)
+        return latest.get("lp") if latest else None
+
     # Initial cash check
     initialLimit = api.get_limits()
-    log_json("Initial Limits", initialLimit)
+    log("Initial Limits", initialLimit)
     initialCash = float(initialLimit['cash'])
-    log_json("Initial Cash", initialCash)
+    log("Initial Cash", initialCash)
+
+    # Margin check: the product's limits give the funds free to trade, and a
+    # lot blocks its full value as CNC but only a fraction as MIS, so the same
+    # capital carries a deeper intraday ladder. Entries stop at marginCap.
+    marginLimits = api.get_limits(product_type=product_type, segment="CM", exchange=exch) or {}
+    log("Margin Limits", marginLimits)
+    availableMargin = (float(marginLimits.get("cash") or initialCash) + float(marginLimits.get("payin") or 0)
+                       - float(marginLimits.get("marginused") or 0))
+
+    def margin_cap():
+        # Largest position (in shares) an entry may still be added to
+        refPrice = initialBuyPrice if price_type == "LMT" and initialBuyPrice > 0 else float(current_ltp() or 0)
+        marginPerLot = refPrice * lotSize * (1.0 if product_type == "C" else intradayMargin)
+        lots = int(availableMargin // marginPerLot) if marginPerLot > 0 else maxOpenPosition + 1
+        log("Margin Check", {
+            "productType": product_type,
+            "availableMargin": availableMargin,
+            "marginPerLot": round(marginPerLot, 2),
+            "affordableLots": lots
+        })
+        return (lots - 1) * lotSize
+
+    marginCap = margin_cap()
+    if marginCap < 0:
+        log("Insufficient Margin", {"availableMargin": availableMargin, "lotSize": lotSize})
+        return
 
-    start_time = datetime.now()
+    start_time = clock.now()
     EndTime = start_time + timedelta(minutes=duration)
-    log_json("Strategy End Time", EndTime)
+    log("Strategy End Time", EndTime)
 
     netPurchasedQty = 0
+    nextBuyPrice = None
     LppArray = []  # lastPurchasedPrice
 
+    # Runtime commands from the backend, applied between decisions
+    paused = False
+    squareOffRequested = False
+    stopRequested = False
+    paramsVersion = int(params.get("params_version", 0))
+
+    def apply_params_update(message):
+        # All-or-nothing: every field is parsed before any of them is applied,
+        # and the ladder (LppArray) and open orders are left untouched, so
+        # lot_size only changes while the ladder is empty.
+        nonlocal paramsVersion, price_type, initialBuyPrice, targetPriceDiff, entryDiffPrice
+        nonlocal lotSize, maxOpenPosition, duration, market_closing_time, debugOn, stopLossInRs
+        nonlocal chaseTicks, orderTimeout, marginCap
+        nonlocal EndTime, closing_time_combined, closing_time_minus_30_min, closing_time_minus_1_min
+
+        version = int(message.get("version", paramsVersion + 1))
+        updates = message.get("params") or {}
+        if version <= paramsVersion:
+            log("Params Rejected", {"version": version, "reason": f"Stale version, running {paramsVersion}"})
+            return
+
+        changedFixed = [key for key in FIXED_PARAMS if key in updates and str(updates[key]) != str(params[key])]
+        if changedFixed:
+            log("Params Rejected", {"version": version, "reason": f"Cannot change {', '.join(changedFixed)} while running"})
+            return
+
+        try:
+            parsed = {key: parse(updates[key]) for key, parse in HOT_RELOAD_PARAMS.items() if key in updates}
+            closing = datetime.strptime(parsed.get("market_closing_time", market_closing_time), "%H:%M:%S")
+        except (TypeError, ValueError) as e:
+            log("Params Rejected", {"version": version, "reason": str(e)})
+            return
+
+        changes = {}
+        for key, value in parsed.items():
+            previous = HOT_RELOAD_PARAMS[key](params[key])
+            if previous != value:
+                changes[key] = {"from": previous, "to": value}
+        # Each rung of the ladder is one lot: exits sized by a new lot_size
+        # would no longer match what was bought
+        if "lot_size" in changes and LppArray:
+            log("Params Rejected", {"version": version,
+                                    "reason": f"Cannot change lot_size with {len(LppArray)} open ladder entries"})
+            return
+
+        price_type = parsed.get("price_type", price_type)
+        initialBuyPrice = parsed.get("initial_buy_price", initialBuyPrice)
+        targetPriceDiff = parsed.get("target_price_diff", targetPriceDiff)
+        entryDiffPrice = parsed.get("entry_diff_price", entryDiffPrice)
+        lotSize = parsed.get("lot_size", lotSize)
+        maxOpenPosition = parsed.get("max_open_position", maxOpenPosition)
+        duration = parsed.get("duration", duration)
+        market_closing_time = parsed.get("market_closing_time", market_closing_time)
+        debugOn = parsed.get("debug_on", debugOn)
+        chaseTicks = parsed.get("chase_ticks", chaseTicks)
+        orderTimeout = parsed.get("order_timeout", orderTimeout)
+
+        stopLossInRs = entryDiffPrice * (maxOpenPosition + 1)
+        EndTime = start_time + timedelta(minutes=duration)
+        closing_time_combined = datetime.combine(clock.now().date(), closing.time())
+        closing_time_minus_30_min = closing_time_combined - timedelta(minutes=30)
+        closing_time_minus_1_min = closing_time_combined - timedelta(minutes=1)
+        buyOrderParams["price_type"] = price_type
+        buyOrderParams["price"] = initialBuyPrice
+        buyOrderParams["quantity"] = lotSize
+        orders.chase_ticks = chaseTicks
+        orders.timeout = orderTimeout
+        if "lot_size" in changes or "initial_buy_price" in changes or "price_type" in changes:
+            marginCap = margin_cap()
+
+        params.update({key: updates[key] for key in parsed})
+        paramsVersion = version
+        log("Params Updated", {
+            "version": version,
+            "changes": changes,
+            "stopLoss": stopLossInRs,
+            "strategyEndsAt": EndTime,
+            "closingTime": closing_time_combined
+        })
+
+    def trigger_prices():
+        # Prices the next decision turns on: the next entry, working limits,
+        # and the current lot's target and stop
+        prices = [order.price for order in orders.working() if order.price]
+        if not paused:
+            prices.append(nextBuyPrice)
+        if LppArray:
+            index = min(max(int(float(netPurchasedQty) / float(lotSize)) - 1, 0), len(LppArray) - 1)
+            prices.append(shifted(LppArray[index], targetPriceDiff))
+            prices.append(shifted(LppArray[index], -stopLossInRs))
+        return prices
+
+    def report_fill(kind, orderParams, orderNo, history, placedAt):
+        # Same shape as OrderManager's Fill event, for the sells awaited inline
+        if history and history[0]["status"] == 'COMPLETE':
+            log("Fill", {
+                "kind": kind,
+                "side": orderParams["buy_or_sell"],
+                "orderNo": orderNo,
+                "qty": orderParams["quantity"],
+                "price": history[0].get("avgprc"),
+                "latencyMs": round((clock.monotonic() - placedAt) * 1000, 2)
+            })
+
+    def apply_commands():
+        nonlocal paused, squareOffRequested, stopRequested
+        for message in commands.drain():
+            command = message.get("command")
+            if command == "update_params":
+                apply_params_update(message)
+                continue
+            if command == "pause":
+                paused = True
+            elif command == "resume":
+                paused = False
+            elif command == "square_off":
+                squareOffRequested = True
+            elif command == "stop":
+                stopRequested = True
+            else:
+                log("Unknown Command", message)
+                continue
+            log("Command Applied", {"command": command, "paused": paused})
+
     # Check any existing position available
     position = api.get_positions()
-    log_json("Initial Positions", position)
+    log("Initial Positions", position)
 
     if position is not None:
         for entry in position:
             if entry['tsym'] == stock_name:
                 daybuyamt = entry['lp']
-                netPurchasedQty = entry['netqty']
-                nextBuyPrice = float(daybuyamt) - float(entryDiffPrice)
-                log_json("Existing Position", {
+                netPurchasedQty = held_qty(entry['netqty'])
+                nextBuyPrice = shifted(daybuyamt, -entryDiffPrice)
+                log("Existing Position", {
                     "stock_name": stock_name,
                     "purchased_at": daybuyamt,
                     "netPurchasedQty": netPurchasedQty,
@@ -191,93 +475,153 @@ def run_scalping_strategy(params):
                 })
                 break
 
-    # If no existing position available then buy at limit price
-    current_time = datetime.now()
-    if float(netPurchasedQty) < 1 and current_time < closing_time_minus_30_min:
-        orderStatus = api.place_order(**buyOrderParams)
-        log_json("Initial Buy Order Status", orderStatus)
-
-        if orderStatus is None:
-            log_json("Error", "Order placement returned None")
+    # An existing ladder is rebuilt from the order book below; read it now so
+    # an armed start has nothing left to fetch at the open
+    order_book = None
+    if float(netPurchasedQty) >= 1:
+        order_book = api.get_order_book()
+        log("Order Book", order_book)
+
+    if armAt is not None and clock.now() < armAt:
+        log("Armed", {"openAt": str(armAt), "setupMs": round((clock.monotonic() - setupStartedAt) * 1000, 2)})
+        # Commands still apply while armed; the clock wakes on each one
+        openDeadline = clock.deadline_at(armAt)
+        while clock.monotonic() < openDeadline and not stopRequested:
+            clock.sleep_until(openDeadline)
+            apply_commands()
+        if stopRequested:
+            log("Strategy Stopped", {"netPurchasedQty": netPurchasedQty, "LppArraySize": len(LppArray)})
             return
+        # The run's duration counts from the open, not from the warmup
+        start_time = clock.now()
+        EndTime = start_time + timedelta(minutes=duration)
+        log("Market Open", {"strategyEndsAt": EndTime})
 
-        orderNo = orderStatus.get("norenordno")
-        if orderNo is None:
-            log_json("Error", "Order number is None in order status")
+    # If no existing position available then buy at limit price
+    current_time = clock.now()
+    initialBuyCancelled = False
+    if float(netPurchasedQty) < 1 and current_time < closing_time_minus_30_min:
+        initialOrder = orders.submit("Initial Buy", buyOrderParams)
+        if initialOrder is None:
             return
 
-        singleOrderStatus = api.single_order_history(orderNo)
-        log_json("Initial Buy Order History", singleOrderStatus)
-
-        while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-            time.sleep(0.5)
-            log_json("Waiting for Initial Buy Order Execution", {"orderNo": orderNo})
-            singleOrderStatus = api.single_order_history(orderNo)
-
-        if singleOrderStatus and singleOrderStatus[0]["status"] == 'COMPLETE':
-            LppArray.append(singleOrderStatus[0]["avgprc"])
-            nextBuyPrice = float(singleOrderStatus[0]["avgprc"]) - float(entryDiffPrice)
-            log_json("Initial Buy Completed", {"nextBuyPrice": nextBuyPrice})
-        elif singleOrderStatus and singleOrderStatus[0]["status"] == 'REJECTED':
-            log_json("Initial Buy Order Rejected", singleOrderStatus)
+        # Nothing to decide on before the first fill, but the order is still
+        # chased and timed out, and a stop cancels it
+        orderPoll = pollTicker(ORDER_POLL_INTERVAL)
+        orders.poll()
+        while orders.working():
+            orderPoll.wait()
+            apply_commands()
+            if stopRequested:
+                orders.cancel_all("Strategy Stopped")
+            log("Waiting for Initial Buy Order Execution", {"orderNo": initialOrder.orderNo, "price": initialOrder.price})
+            orders.poll(current_ltp())
+
+        if initialOrder.status == 'COMPLETE':
+            LppArray.append(initialOrder.avgprc)
+            nextBuyPrice = shifted(initialOrder.avgprc, -entryDiffPrice)
+            log("Initial Buy Completed", {"nextBuyPrice": nextBuyPrice})
+        elif initialOrder.status == 'REJECTED':
+            log("Initial Buy Order Rejected", initialOrder.history)
             return
+        elif initialOrder.status == 'CANCELED':
+            # The main loop re-enters once price trades below nextBuyPrice
+            initialBuyCancelled = True
+            nextBuyPrice = shifted(current_ltp() or initialOrder.price, -entryDiffPrice)
+            log("Initial Buy Order Cancelled", {"orderNo": initialOrder.orderNo, "nextBuyPrice": nextBuyPrice})
     else:
-        order_book = api.get_order_book()
-        log_json("Order Book", order_book)
+        if order_book is None:
+            order_book = api.get_order_book()
+            log("Order Book", order_book)
         if order_book is not None:
             for item in reversed(order_book):
                 if item.get('tsym') == stock_name and item.get('status') == 'COMPLETE':
                     trantype = item.get('trantype')
                     avgprc = item.get('avgprc')
-                    if trantype == 'B':
+                    if trantype == entrySide:
                         LppArray.append(avgprc)
-                    if trantype == 'S':
+                    if trantype == exitSide:
                         if LppArray:
                             LppArray.pop()
 
     # If no open position then wait till order getting executed
-    if not LppArray:
+    if not LppArray and not initialBuyCancelled:
+        positionPoll = pollTicker(POSITION_POLL_INTERVAL)
         while True:
+            apply_commands()
+            if stopRequested:
+                break
             position = api.get_positions()
-            log_json("Waiting for Position", position)
-            time.sleep(0.2)
+            log("Waiting for Position", position)
             netPurchasedQtyInPos = 0
             if position is not None:
                 for entry in position:
                     if entry['tsym'] == stock_name:
-                        daybuyamt = entry['daybuyavgprc']
-                        netPurchasedQtyInPos = entry['netqty']
+                        daybuyamt = entry[avgPriceField]
+                        netPurchasedQtyInPos = held_qty(entry['netqty'])
                         if int(netPurchasedQtyInPos) > 0:
                             for _ in range(int(netPurchasedQtyInPos)):
                                 LppArray.append(daybuyamt)
-                            log_json("Position Updated", {
+                            log("Position Updated", {
                                 "stock_name": stock_name,
                                 "purchased_at": daybuyamt,
                                 "netPurchasedQty": netPurchasedQtyInPos
                             })
                             break
-            if netPurchasedQtyInPos > 0:
+            if int(netPurchasedQtyInPos) > 0:
                 break
+            positionPoll.wait()
 
     # Start Algo trade
     lastSoldPrice = 0
+    # Faster passes near a trigger, slower away from them, within the budget
+    loopTicker = AdaptivePoller(clock, api, MIN_POLL_INTERVAL, MAX_POLL_INTERVAL)
+    pollBand = None
     while True:
+        apply_commands()
+        if stopRequested:
+            orders.cancel_all("Strategy Stopped")
+            orders.settle(pollTicker(ORDER_POLL_INTERVAL))
+            log("Strategy Stopped", {"netPurchasedQty": netPurchasedQty, "LppArraySize": len(LppArray)})
+            break
+
         position = api.get_positions()
-        log_json("Current Position", position)
-        time.sleep(0.2)
+        log("Current Position", position)
 
         if position is not None:
             for entry in position:
                 if entry['tsym'] == stock_name:
-                    daybuyamt = entry['daybuyavgprc']
-                    netPurchasedQty = entry['netqty']
+                    daybuyamt = entry[avgPriceField]
+                    netPurchasedQty = held_qty(entry['netqty'])
                     break
 
-        # Fetch LTP data
-        quotes = api.get_quotes(exch, stock_name)
-        log_json("Quotes", quotes)
-        time.sleep(1)
+        # Fetch LTP data: streamed touchline while it is live, REST otherwise
+        quotes = quoteFeed.latest() if quoteFeed else None
+        if quotes is None:
+            quotes = api.get_quotes(exch, stock_name)
+        log("Quotes", quotes)
         ltp = quotes.get("lp") if quotes else None
+        bands.update(exch, stock_name, quotes)
+        bands.refresh()
+
+        # Working entries: fills extend the ladder; chasing and stale-order
+        # cancels happen inside poll, one status call per working order
+        for order in orders.poll(ltp):
+            if order.status == 'COMPLETE':
+                LppArray.append(order.avgprc)
+                if order.kind == "Buy":
+                    nextBuyPrice = shifted(nextBuyPrice, -entryDiffPrice)
+                else:
+                    nextBuyPrice = shifted(order.avgprc, -entryDiffPrice)
+                log(f"{order.kind} Completed", {"nextBuyPrice": nextBuyPrice})
+            elif order.status == 'REJECTED':
+                log(f"{order.kind} Order Rejected", order.history)
+                return
+            else:
+                # A rung is one whole lot, so shares filled before the cancel
+                # stay off the ladder; they are in netqty and squared off at the end
+                log(f"{order.kind} Order Cancelled", {"orderNo": order.orderNo, "price": order.price,
+                                                      "filledQty": order.filledQty})
 
         if ltp is not None:
             if LppArray:
@@ -287,8 +631,8 @@ def run_scalping_strategy(params):
                 if curIndex >= len(LppArray):
                     curIndex = 0
 
-                tp = round(float(LppArray[curIndex]) + float(targetPriceDiff), 2)
-                log_json("Position Info", {
+                tp = round(shifted(LppArray[curIndex], targetPriceDiff), 2)
+                log("Position Info", {
                     "dayAvgPurPrice": daybuyamt,
                     "netQty": netPurchasedQty,
                     "nextBuyPrice": nextBuyPrice,
@@ -299,38 +643,43 @@ def run_scalping_strategy(params):
                     "LTP": ltp
                 })
 
-                if curIndex < len(LppArray) and float(ltp) < float(LppArray[curIndex]) - float(stopLossInRs):
-                    slp = float(LppArray[curIndex]) - float(stopLossInRs)
+                if curIndex < len(LppArray) and adverse(ltp, shifted(LppArray[curIndex], -stopLossInRs)):
+                    slp = shifted(LppArray[curIndex], -stopLossInRs)
+                    # No entry may fill behind the stop-loss exit
+                    orders.cancel_all("Stop Loss")
+                    orders.settle(pollTicker(ORDER_POLL_INTERVAL))
                     position = api.get_positions()
-                    time.sleep(0.2)
                     if position is not None:
                         for entry in position:
                             if entry['tsym'] == stock_name:
-                                daybuyamt = entry['daybuyavgprc']
-                                netPurchasedQty = entry['netqty']
+                                daybuyamt = entry[avgPriceField]
+                                netPurchasedQty = held_qty(entry['netqty'])
                                 break
                     sellOrderParams["quantity"] = netPurchasedQty
+                    placedAt = clock.monotonic()
                     orderStatus = api.place_order(**sellOrderParams)
-                    log_json("Stop Loss Sell Order Status", orderStatus)
+                    log("Stop Loss Sell Order Status", orderStatus)
 
                     if orderStatus is None:
-                        log_json("Error", "Order placement returned None")
+                        log("Error", "Order placement returned None")
                         return
 
                     orderNo = orderStatus.get("norenordno")
                     if orderNo is None:
-                        log_json("Error", "Order number is None in order status")
+                        log("Error", "Order number is None in order status")
                         return
 
                     singleOrderStatus = api.single_order_history(orderNo)
-                    log_json("Stop Loss Sell Order History", singleOrderStatus)
+                    log("Stop Loss Sell Order History", singleOrderStatus)
 
+                    orderPoll = pollTicker(ORDER_POLL_INTERVAL)
                     while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-                        time.sleep(0.5)
-                        log_json("Waiting for Stop Loss Sell Order Execution", {"orderNo": orderNo})
+                        orderPoll.wait()
+                        log("Waiting for Stop Loss Sell Order Execution", {"orderNo": orderNo})
                         singleOrderStatus = api.single_order_history(orderNo)
 
-                    log_json("Stop Loss Hit", {
+                    report_fill("Stop Loss Sell", sellOrderParams, orderNo, singleOrderStatus, placedAt)
+                    log("Stop Loss Hit", {
                         "ltp": ltp,
                         "qty": netPurchasedQty,
                         "buyAmt": LppArray[curIndex],
@@ -338,15 +687,15 @@ def run_scalping_strategy(params):
                         "sl": stopLossInRs
                     })
                     LppArray = []
-                    nextBuyPrice = float(ltp) - entryDiffPrice
+                    nextBuyPrice = shifted(ltp, -entryDiffPrice)
                     break
 
-                if curIndex < len(LppArray) and float(ltp) > (float(LppArray[curIndex]) + float(targetPriceDiff)) and (float(netPurchasedQty) > 0):
-                    tp = float(LppArray[curIndex]) + float(targetPriceDiff)
-                    tp_order = float(ltp) - 0.05
+                if curIndex < len(LppArray) and adverse(shifted(LppArray[curIndex], targetPriceDiff), ltp) and (float(netPurchasedQty) > 0):
+                    tp = shifted(LppArray[curIndex], targetPriceDiff)
+                    tp_order = shifted(ltp, -0.05)
                     sellOrderParamsLMT = {
-                        "buy_or_sell": "S",
-                        "product_type": "C",
+                        "buy_or_sell": exitSide,
+                        "product_type": product_type,
                         "exchange": exch,
                         "tradingsymbol": stock_name,
                         'quantity': lotSize,
@@ -356,29 +705,32 @@ def run_scalping_strategy(params):
                         'retention': 'DAY',
                         'remarks': 'By MERN Backend LMT',
                     }
+                    placedAt = clock.monotonic()
                     orderStatus = api.place_order(**sellOrderParams)
-                    log_json("Profit Booking Sell Order Status", orderStatus)
+                    log("Profit Booking Sell Order Status", orderStatus)
 
                     if orderStatus is None:
-                        log_json("Error", "Order placement returned None")
+                        log("Error", "Order placement returned None")
                         return
 
                     orderNo = orderStatus.get("norenordno")
                     if orderNo is None:
-                        log_json("Error", "Order number is None in order status")
+                        log("Error", "Order number is None in order status")
                         return
 
                     singleOrderStatus = api.single_order_history(orderNo)
-                    log_json("Profit Booking Sell Order History", singleOrderStatus)
+                    log("Profit Booking Sell Order History", singleOrderStatus)
 
+                    orderPoll = pollTicker(ORDER_POLL_INTERVAL)
                     while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-                        time.sleep(0.5)
-                        log_json("Waiting for Profit Booking Sell Order Execution", {"orderNo": orderNo})
+                        orderPoll.wait()
+                        log("Waiting for Profit Booking Sell Order Execution", {"orderNo": orderNo})
                         singleOrderStatus = api.single_order_history(orderNo)
 
+                    report_fill("Profit Booking Sell", sellOrderParams, orderNo, singleOrderStatus, placedAt)
                     sizeOfPArray = len(LppArray)
                     lastSoldPrice = singleOrderStatus[0]["avgprc"]
-                    log_json("Profit Booked", {
+                    log("Profit Booked", {
                         "qtySold": 1,
                         "soldAt": lastSoldPrice,
                         "buyPrice": LppArray[curIndex],
@@ -388,76 +740,26 @@ def run_scalping_strategy(params):
                     })
                     if len(LppArray) > (int(netPurchasedQty) - 1):
                         LppArray.pop(int(netPurchasedQty) - 1)
-                    nextBuyPrice = float(lastSoldPrice) - float(entryDiffPrice)
+                    nextBuyPrice = shifted(lastSoldPrice, -entryDiffPrice)
 
-                current_time = datetime.now()
-                if current_time < closing_time_minus_30_min:
-                    if float(ltp) < float(nextBuyPrice) and float(netPurchasedQty) <= float(maxOpenPosition):
-                        orderStatus = api.place_order(**buyOrderParams)
-                        log_json("Buy Order Status", orderStatus)
-
-                        if orderStatus is None:
-                            log_json("Error", "Order placement returned None")
-                            return
-
-                        orderNo = orderStatus.get("norenordno")
-                        if orderNo is None:
-                            log_json("Error", "Order number is None in order status")
+                current_time = clock.now()
+                if current_time < closing_time_minus_30_min and not paused and not orders.working(entrySide):
+                    if adverse(ltp, nextBuyPrice) and float(netPurchasedQty) <= min(float(maxOpenPosition), marginCap):
+                        if orders.submit("Buy", buyOrderParams) is None:
                             return
-
-                        singleOrderStatus = api.single_order_history(orderNo)
-                        log_json("Buy Order History", singleOrderStatus)
-
-                        while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-                            time.sleep(0.5)
-                            log_json("Waiting for Buy Order Execution", {"orderNo": orderNo})
-                            singleOrderStatus = api.single_order_history(orderNo)
-
-                        if singleOrderStatus and singleOrderStatus[0]["status"] == 'COMPLETE':
-                            LppArray.append(singleOrderStatus[0]["avgprc"])
-                            nextBuyPrice = float(nextBuyPrice) - float(entryDiffPrice)
-                            log_json("Buy Completed", {"nextBuyPrice": nextBuyPrice})
-                        if singleOrderStatus and singleOrderStatus[0]["status"] == 'REJECTED':
-                            log_json("Buy Order Rejected", singleOrderStatus)
+            else:
+                current_time = clock.now()
+                if current_time < closing_time_minus_30_min and not paused and not orders.working(entrySide):
+                    log("Waiting to Buy", {"ltp": ltp, "nextBuyPrice": nextBuyPrice})
+                    if adverse(ltp, nextBuyPrice) and float(netPurchasedQty) <= min(float(maxOpenPosition), marginCap):
+                        if orders.submit("Second Buy", buyOrderParams) is None:
                             return
-        else:
-            current_time = datetime.now()
-            if current_time < closing_time_minus_30_min:
-                log_json("Waiting to Buy", {"ltp": ltp, "nextBuyPrice": nextBuyPrice})
-                if float(ltp) < float(nextBuyPrice):
-                    orderStatus = api.place_order(**buyOrderParams)
-                    log_json("Second Buy Order Status", orderStatus)
-
-                    if orderStatus is None:
-                        log_json("Error", "Order placement returned None")
-                        return
-
-                    orderNo = orderStatus.get("norenordno")
-                    if orderNo is None:
-                        log_json("Error", "Order number is None in order status")
-                        return
-
-                    singleOrderStatus = api.single_order_history(orderNo)
-                    log_json("Second Buy Order History", singleOrderStatus)
-
-                    while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-                        time.sleep(0.5)
-                        log_json("Waiting for Second Buy Order Execution", {"orderNo": orderNo})
-                        singleOrderStatus = api.single_order_history(orderNo)
-
-                    if singleOrderStatus and singleOrderStatus[0]["status"] == 'COMPLETE':
-                        LppArray.append(singleOrderStatus[0]["avgprc"])
-                        nextBuyPrice = float(singleOrderStatus[0]["avgprc"]) - float(entryDiffPrice)
-                        log_json("Second Buy Completed", {"nextBuyPrice": nextBuyPrice})
-                    if singleOrderStatus and singleOrderStatus[0]["status"] == 'REJECTED':
-                        log_json("Second Buy Order Rejected", singleOrderStatus)
-                        return
 
         # Check end time
-        current_time = datetime.now()
-        if current_time > EndTime or current_time > closing_time_minus_1_min:
+        current_time = clock.now()
+        if current_time > EndTime or current_time > closing_time_minus_1_min or squareOffRequested:
             timespent = current_time - start_time
-            log_json("Time Spent", {
+            log("Time Spent", {
                 "timespent": str(timespent),
                 "start_time": start_time,
                 "current_time": current_time,
@@ -465,613 +767,95 @@ def run_scalping_strategy(params):
                 "closing_time": closing_time_combined
             })
 
+            # Pull working entries first; one that filled meanwhile is sold too
+            orders.cancel_all("End Time")
+            if any(order.status == 'COMPLETE' for order in orders.settle(pollTicker(ORDER_POLL_INTERVAL))):
+                position = api.get_positions()
+                for entry in position or []:
+                    if entry['tsym'] == stock_name:
+                        netPurchasedQty = held_qty(entry['netqty'])
+                        break
+
             if float(netPurchasedQty) > 0 and current_time < closing_time_combined:
                 sellOrderParams["quantity"] = netPurchasedQty
+                placedAt = clock.monotonic()
                 sellOrderResponse = api.place_order(**sellOrderParams)
-                log_json("End Time Sell Order Status", sellOrderResponse)
+                log("End Time Sell Order Status", sellOrderResponse)
 
                 if sellOrderResponse is None:
-                    log_json("Error", "Order placement returned None")
+                    log("Error", "Order placement returned None")
                     return
 
                 orderNo = sellOrderResponse.get("norenordno")
                 if orderNo is None:
-                    log_json("Error", "Order number is None in order status")
+                    log("Error", "Order number is None in order status")
                     return
 
                 singleOrderStatus = api.single_order_history(orderNo)
-                log_json("End Time Sell Order History", singleOrderStatus)
+                log("End Time Sell Order History", singleOrderStatus)
 
+                orderPoll = pollTicker(ORDER_POLL_INTERVAL)
                 while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-                    time.sleep(0.5)
-                    log_json("Waiting for End Time Sell Order Execution", {"orderNo": orderNo})
+                    orderPoll.wait()
+                    log("Waiting for End Time Sell Order Execution", {"orderNo": orderNo})
                     singleOrderStatus = api.single_order_history(orderNo)
 
+                report_fill("End Time Sell", sellOrderParams, orderNo, singleOrderStatus, placedAt)
                 LppArray = []
                 if sellOrderResponse is not None:
                     order_id = sellOrderResponse['norenordno']
-                    log_json("End Time Sell Order Placed", {"order_id": order_id})
+                    log("End Time Sell Order Placed", {"order_id": order_id})
                 else:
-                    log_json("End Time Sell Order Failed", {})
+                    log("End Time Sell Order Failed", {})
             else:
-                log_json("End Time Reached", {"reason": "No quantity to sell or market closed."})
+                log("End Time Reached", {"reason": "No quantity to sell or market closed."})
             break
 
-        time.sleep(1)
+        if ltp is not None:
+            loopTicker.aim(ltp, trigger_prices(), orders.tick_size)
+        band = "throttled" if loopTicker.throttled else (
+            "near" if loopTicker.interval <= MIN_POLL_INTERVAL else
+            "far" if loopTicker.interval >= MAX_POLL_INTERVAL else "approaching")
+        if band != pollBand:
+            pollBand = band
+            log("Poll Schedule", {
+                "band": band,
+                "interval": round(loopTicker.interval, 3),
+                "ticksToTrigger": round(loopTicker.distance, 1) if loopTicker.distance is not None else None,
+                "calls": api.calls
+            })
+        loopTicker.wait()
 
     # Calculate profit
     funds = api.get_limits()
     balance_cash = float(funds['cash'])
     profit = balance_cash - initialCash
-    log_json("Trading Session Profit", {
+    log("Trading Session Profit", {
         "initialCash": initialCash,
         "balanceCash": balance_cash,
         "profit": profit
     })
 
-    # Logout
+    # Logout; the shared stream moves off this session first
+    if quote_service is not None:
+        quote_service.release(owner)
+
     def logout(user_id):
         ret1 = api.logout()
-        log_json("Logout Response", ret1)
-        log_json("User Logged Out", {"user_id": user_id})
+        log("Logout Response", ret1)
+        log("User Logged Out", {"user_id": user_id})
 
     try:
         logout(user)
     except Exception as e:
-        log_json("Logout Error", {"error": str(e)})
+        log("Logout Error", {"error": str(e)})
 
 # Main Entrypoint
 if __name__ == "__main__":
     try:
         input_data = sys.stdin.read()
         params = json.loads(input_data)
-        log_json("Received Params", params)
+        log_json("Received Params", redacted_params(params))
         run_scalping_strategy(params)
     except Exception as e:
         log_json("Startup Error", {"error": str(e)})
-
-
-# import sys
-# import time
-# import json
-# import logging
-# from datetime import datetime, timedelta
-# from NorenRestApiPy.NorenApi import NorenApi
-# import pyotp  # <-- TOTP support
-
-# # Setup logging
-# logging.basicConfig(level=logging.INFO)
-# logging.getLogger('NorenRestApiPy.NorenApi').setLevel(logging.WARNING)
-# logging.getLogger('urllib3.connectionpool').setLevel(logging.WARNING)
-
-# # Custom API Wrapper
-# class ShoonyaApiPy(NorenApi):
-#     def __init__(self):
-#         super().__init__(
-#             host='https://api.shoonya.com/NorenWClientTP/',
-#             websocket='wss://api.shoonya.com/NorenWSTP/'
-#         )
-#         global api
-#         api = self
-
-# # Logging helper
-# def log_json(tag, data):
-#     # Convert datetime objects to strings
-#     def default_converter(o):
-#         if isinstance(o, datetime):
-#             return o.isoformat()
-#         raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
-
-#     print(json.dumps({
-#         "tag": tag,
-#         "timestamp": datetime.now().isoformat(),
-#         "data": data
-#     }, indent=2, default=default_converter))
-
-# # Strategy Runner
-# def run_scalping_strategy(params):
-#     api = ShoonyaApiPy()
-
-#     # Destructure params
-#     token = params["token"]  # This is the TOTP key, not OTP
-#     user = params["user"]
-#     password = params["password"]
-#     vc = params["vc"]
-#     app_key = params["app_key"]
-#     imei = params["imei"]
-#     exch = params["exch"]
-#     stock_name = params["stock_name"]
-#     price_type = params["price_type"]
-#     initialBuyPrice = float(params["initial_buy_price"])
-#     targetPriceDiff = float(params["target_price_diff"])
-#     entryDiffPrice = float(params["entry_diff_price"])
-#     lotSize = int(params["lot_size"])
-#     maxOpenPosition = int(params["max_open_position"])
-#     duration = int(params["duration"])
-#     market_closing_time = params["market_closing_time"]
-#     debugOn = params["debug_on"] == 'True'
-
-#     # Convert TOTP key to current OTP
-#     try:
-#         otp = pyotp.TOTP(token).now()
-#     except Exception as e:
-#         log_json("OTP Error", {"error": str(e)})
-#         return
-
-#     # Debug login inputs
-#     log_json("Login Inputs", {
-#         "user": user,
-#         "otp": otp,
-#         "vc": vc,
-#         "app_key_length": len(app_key),
-#         "imei": imei
-#     })
-
-#     # Try login
-#     loginStatus = None
-#     try:
-#         loginStatus = api.login(
-#             userid=user,
-#             password=password,
-#             twoFA=otp,
-#             vendor_code=vc,
-#             api_secret=app_key,
-#             imei=imei
-#         )
-#     except Exception as e:
-#         log_json("Login Exception", {"error": str(e)})
-
-#     log_json("Raw Login Response", loginStatus)
-
-#     if loginStatus is None:
-#         log_json("Login Failed", {"reason": "Login returned None. Possible token or session error."})
-#         return
-#     elif loginStatus.get("stat") != "Ok":
-#         log_json("Login Failed", loginStatus)
-#         return
-
-#     log_json("Login Successful", loginStatus)
-
-#     # Market Time Setup
-#     current_time = datetime.now()
-#     closing_time = datetime.strptime(market_closing_time, "%H:%M:%S")
-#     closing_time_combined = datetime.combine(current_time.date(), closing_time.time())
-#     closing_time_minus_30_min = closing_time_combined - timedelta(minutes=30)
-#     closing_time_minus_1_min = closing_time_combined - timedelta(minutes=1)
-
-#     # Log the calculated times for debugging
-#     log_json("Market Times", {
-#         "closing_time_combined": str(closing_time_combined),
-#         "closing_time_minus_30_min": str(closing_time_minus_30_min),
-#         "closing_time_minus_1_min": str(closing_time_minus_1_min)
-#     })
-
-#     # Optional: Fetch Market Data
-#     try:
-#         quotes = api.get_quotes(exchange=exch, token=stock_name)  # Use the actual stock token
-#         limits = api.get_limits()
-#         log_json("Market Quote", quotes)
-#         log_json("Cash Limit", limits)
-#     except Exception as e:
-#         log_json("API Error", {"error": str(e)})
-
-#     # Strategy Info
-#     stopLossInRs = entryDiffPrice * (maxOpenPosition + 1)
-#     runtime_info = {
-#         "initialBuyPrice": initialBuyPrice,
-#         "stopLoss": stopLossInRs,
-#         "strategyEndsAt": str(current_time + timedelta(seconds=duration)),
-#         "closingTime": str(closing_time_combined),
-#         "closingTimeMinus30Min": str(closing_time_minus_30_min)
-#     }
-#     log_json("Strategy Runtime Info", runtime_info)
-
-#     # Initialize order parameters
-#     buyOrderParams = {
-#         "buy_or_sell": "B",
-#         "product_type": "C",
-#         "exchange": exch,
-#         "tradingsymbol": stock_name,
-#         'quantity': lotSize,
-#         'discloseqty': 0,
-#         "price_type": price_type,
-#         'price': initialBuyPrice,
-#         'retention': 'DAY',
-#         'remarks': 'By MERN Backend',
-#     }
-
-#     sellOrderParams = {
-#         "buy_or_sell": "S",
-#         "product_type": "C",
-#         "exchange": exch,
-#         "tradingsymbol": stock_name,
-#         'quantity': lotSize,
-#         'discloseqty': 0,
-#         "price_type": "MKT",
-#         'price': 0,
-#         'retention': 'DAY',
-#         'remarks': 'By MERN Backend',
-#     }
-
-#     # Initial cash check
-#     initialLimit = api.get_limits()
-#     log_json("Initial Limits", initialLimit)
-#     initialCash = float(initialLimit['cash'])
-#     log_json("Initial Cash", initialCash)
-
-#     # Check if initial cash is sufficient
-#     if initialCash < initialBuyPrice * lotSize:
-#         log_json("Error", "Insufficient funds to place the initial order.")
-#         return
-
-#     start_time = datetime.now()
-#     EndTime = start_time + timedelta(minutes=duration)
-#     log_json("Strategy End Time", EndTime)
-
-#     netPurchasedQty = 0
-#     LppArray = []  # lastPurchasedPrice
-
-#     # Check any existing position available
-#     position = api.get_positions()
-#     log_json("Initial Positions", position)
-
-#     if position is not None:
-#         for entry in position:
-#             if entry['tsym'] == stock_name:
-#                 daybuyamt = entry['lp']
-#                 netPurchasedQty = entry['netqty']
-#                 nextBuyPrice = float(daybuyamt) - float(entryDiffPrice)
-#                 log_json("Existing Position", {
-#                     "stock_name": stock_name,
-#                     "purchased_at": daybuyamt,
-#                     "netPurchasedQty": netPurchasedQty,
-#                     "nextBuyPrice": nextBuyPrice
-#                 })
-#                 break
-
-#     # If no existing position available then buy at limit price
-#     current_time = datetime.now()
-#     if float(netPurchasedQty) < 1 and current_time < closing_time_minus_30_min:
-#         log_json("Placing Initial Buy Order", buyOrderParams)
-#         orderStatus = api.place_order(**buyOrderParams)
-#         log_json("Initial Buy Order Status", orderStatus)
-
-#         if orderStatus is None:
-#             log_json("Error", "Order placement returned None")
-#             return
-
-#         orderNo = orderStatus.get("norenordno")
-#         if orderNo is None:
-#             log_json("Error", "Order number is None in order status")
-#             return
-
-#         singleOrderStatus = api.single_order_history(orderNo)
-#         log_json("Initial Buy Order History", singleOrderStatus)
-
-#         while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-#             time.sleep(0.5)
-#             log_json("Waiting for Initial Buy Order Execution", {"orderNo": orderNo})
-#             singleOrderStatus = api.single_order_history(orderNo)
-#             log_json("Updated Order Status", singleOrderStatus)
-
-#         if singleOrderStatus and singleOrderStatus[0]["status"] == 'COMPLETE':
-#             LppArray.append(singleOrderStatus[0]["avgprc"])
-#             nextBuyPrice = float(singleOrderStatus[0]["avgprc"]) - float(entryDiffPrice)
-#             log_json("Initial Buy Completed", {"nextBuyPrice": nextBuyPrice})
-#         elif singleOrderStatus and singleOrderStatus[0]["status"] == 'REJECTED':
-#             log_json("Initial Buy Order Rejected", singleOrderStatus)
-#             log_json("Error", "Insufficient funds or margin shortfall.")
-#             return
-#     else:
-#         order_book = api.get_order_book()
-#         log_json("Order Book", order_book)
-#         if order_book is not None:
-#             for item in reversed(order_book):
-#                 if item.get('tsym') == stock_name and item.get('status') == 'COMPLETE':
-#                     trantype = item.get('trantype')
-#                     avgprc = item.get('avgprc')
-#                     if trantype == 'B':
-#                         LppArray.append(avgprc)
-#                     if trantype == 'S':
-#                         if LppArray:
-#                             LppArray.pop()
-
-#     # If no open position then wait till order getting executed
-#     if not LppArray:
-#         while True:
-#             position = api.get_positions()
-#             log_json("Waiting for Position", position)
-#             time.sleep(0.2)
-#             netPurchasedQtyInPos = 0
-#             if position is not None:
-#                 for entry in position:
-#                     if entry['tsym'] == stock_name:
-#                         daybuyamt = entry['daybuyavgprc']
-#                         netPurchasedQtyInPos = entry['netqty']
-#                         if int(netPurchasedQtyInPos) > 0:
-#                             for _ in range(int(netPurchasedQtyInPos)):
-#                                 LppArray.append(daybuyamt)
-#                             log_json("Position Updated", {
-#                                 "stock_name": stock_name,
-#                                 "purchased_at": daybuyamt,
-#                                 "netPurchasedQty": netPurchasedQtyInPos
-#                             })
-#                             break
-#             if netPurchasedQtyInPos > 0:
-#                 break
-
-#     # Start Algo trade
-#     lastSoldPrice = 0
-#     while True:
-#         position = api.get_positions()
-#         log_json("Current Position", position)
-#         time.sleep(0.2)
-
-#         if position is not None:
-#             for entry in position:
-#                 if entry['tsym'] == stock_name:
-#                     daybuyamt = entry['daybuyavgprc']
-#                     netPurchasedQty = entry['netqty']
-#                     break
-
-#         # Fetch LTP data
-#         quotes = api.get_quotes(exch, stock_name)
-#         log_json("Quotes", quotes)
-#         time.sleep(1)
-#         ltp = quotes.get("lp") if quotes else None
-
-#         if ltp is not None:
-#             if LppArray:
-#                 curIndex = int(float(netPurchasedQty) / float(lotSize)) - 1
-#                 if curIndex < 0:
-#                     curIndex = 0
-#                 if curIndex >= len(LppArray):
-#                     curIndex = 0
-
-#                 tp = round(float(LppArray[curIndex]) + float(targetPriceDiff), 2)
-#                 log_json("Position Info", {
-#                     "dayAvgPurPrice": daybuyamt,
-#                     "netQty": netPurchasedQty,
-#                     "nextBuyPrice": nextBuyPrice,
-#                     "LppArraySize": len(LppArray),
-#                     "curIndex": curIndex,
-#                     "LPP": LppArray[curIndex],
-#                     "TP": tp,
-#                     "LTP": ltp
-#                 })
-
-#                 if curIndex < len(LppArray) and float(ltp) < float(LppArray[curIndex]) - float(stopLossInRs):
-#                     slp = float(LppArray[curIndex]) - float(stopLossInRs)
-#                     position = api.get_positions()
-#                     time.sleep(0.2)
-#                     if position is not None:
-#                         for entry in position:
-#                             if entry['tsym'] == stock_name:
-#                                 daybuyamt = entry['daybuyavgprc']
-#                                 netPurchasedQty = entry['netqty']
-#                                 break
-#                     sellOrderParams["quantity"] = netPurchasedQty
-#                     orderStatus = api.place_order(**sellOrderParams)
-#                     log_json("Stop Loss Sell Order Status", orderStatus)
-
-#                     if orderStatus is None:
-#                         log_json("Error", "Order placement returned None")
-#                         return
-
-#                     orderNo = orderStatus.get("norenordno")
-#                     if orderNo is None:
-#                         log_json("Error", "Order number is None in order status")
-#                         return
-
-#                     singleOrderStatus = api.single_order_history(orderNo)
-#                     log_json("Stop Loss Sell Order History", singleOrderStatus)
-
-#                     while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-#                         time.sleep(0.5)
-#                         log_json("Waiting for Stop Loss Sell Order Execution", {"orderNo": orderNo})
-#                         singleOrderStatus = api.single_order_history(orderNo)
-#                         log_json("Updated Order Status", singleOrderStatus)
-
-#                     log_json("Stop Loss Hit", {
-#                         "ltp": ltp,
-#                         "qty": netPurchasedQty,
-#                         "buyAmt": LppArray[curIndex],
-#                         "slp": slp,
-#                         "sl": stopLossInRs
-#                     })
-#                     LppArray = []
-#                     nextBuyPrice = float(ltp) - entryDiffPrice
-#                     break
-
-#                 if curIndex < len(LppArray) and float(ltp) > (float(LppArray[curIndex]) + float(targetPriceDiff)) and (float(netPurchasedQty) > 0):
-#                     tp = float(LppArray[curIndex]) + float(targetPriceDiff)
-#                     tp_order = float(ltp) - 0.05
-#                     sellOrderParamsLMT = {
-#                         "buy_or_sell": "S",
-#                         "product_type": "C",
-#                         "exchange": exch,
-#                         "tradingsymbol": stock_name,
-#                         'quantity': lotSize,
-#                         'discloseqty': 0,
-#                         "price_type": "LMT",
-#                         'price': tp_order,
-#                         'retention': 'DAY',
-#                         'remarks': 'By MERN Backend LMT',
-#                     }
-#                     orderStatus = api.place_order(**sellOrderParams)
-#                     log_json("Profit Booking Sell Order Status", orderStatus)
-
-#                     if orderStatus is None:
-#                         log_json("Error", "Order placement returned None")
-#                         return
-
-#                     orderNo = orderStatus.get("norenordno")
-#                     if orderNo is None:
-#                         log_json("Error", "Order number is None in order status")
-#                         return
-
-#                     singleOrderStatus = api.single_order_history(orderNo)
-#                     log_json("Profit Booking Sell Order History", singleOrderStatus)
-
-#                     while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-#                         time.sleep(0.5)
-#                         log_json("Waiting for Profit Booking Sell Order Execution", {"orderNo": orderNo})
-#                         singleOrderStatus = api.single_order_history(orderNo)
-#                         log_json("Updated Order Status", singleOrderStatus)
-
-#                     sizeOfPArray = len(LppArray)
-#                     lastSoldPrice = singleOrderStatus[0]["avgprc"]
-#                     log_json("Profit Booked", {
-#                         "qtySold": 1,
-#                         "soldAt": lastSoldPrice,
-#                         "buyPrice": LppArray[curIndex],
-#                         "targetPriceDiff": targetPriceDiff,
-#                         "TP": tp,
-#                         "sizeOfPArray": sizeOfPArray
-#                     })
-#                     if len(LppArray) > (int(netPurchasedQty) - 1):
-#                         LppArray.pop(int(netPurchasedQty) - 1)
-#                     nextBuyPrice = float(lastSoldPrice) - float(entryDiffPrice)
-
-#                 current_time = datetime.now()
-#                 if current_time < closing_time_minus_30_min:
-#                     if float(ltp) < float(nextBuyPrice) and float(netPurchasedQty) <= float(maxOpenPosition):
-#                         orderStatus = api.place_order(**buyOrderParams)
-#                         log_json("Buy Order Status", orderStatus)
-
-#                         if orderStatus is None:
-#                             log_json("Error", "Order placement returned None")
-#                             return
-
-#                         orderNo = orderStatus.get("norenordno")
-#                         if orderNo is None:
-#                             log_json("Error", "Order number is None in order status")
-#                             return
-
-#                         singleOrderStatus = api.single_order_history(orderNo)
-#                         log_json("Buy Order History", singleOrderStatus)
-
-#                         while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-#                             time.sleep(0.5)
-#                             log_json("Waiting for Buy Order Execution", {"orderNo": orderNo})
-#                             singleOrderStatus = api.single_order_history(orderNo)
-#                             log_json("Updated Order Status", singleOrderStatus)
-
-#                         if singleOrderStatus and singleOrderStatus[0]["status"] == 'COMPLETE':
-#                             LppArray.append(singleOrderStatus[0]["avgprc"])
-#                             nextBuyPrice = float(nextBuyPrice) - float(entryDiffPrice)
-#                             log_json("Buy Completed", {"nextBuyPrice": nextBuyPrice})
-#                         if singleOrderStatus and singleOrderStatus[0]["status"] == 'REJECTED':
-#                             log_json("Buy Order Rejected", singleOrderStatus)
-#                             return
-#         else:
-#             current_time = datetime.now()
-#             if current_time < closing_time_minus_30_min:
-#                 log_json("Waiting to Buy", {"ltp": ltp, "nextBuyPrice": nextBuyPrice})
-#                 if float(ltp) < float(nextBuyPrice):
-#                     orderStatus = api.place_order(**buyOrderParams)
-#                     log_json("Second Buy Order Status", orderStatus)
-
-#                     if orderStatus is None:
-#                         log_json("Error", "Order placement returned None")
-#                         return
-
-#                     orderNo = orderStatus.get("norenordno")
-#                     if orderNo is None:
-#                         log_json("Error", "Order number is None in order status")
-#                         return
-
-#                     singleOrderStatus = api.single_order_history(orderNo)
-#                     log_json("Second Buy Order History", singleOrderStatus)
-
-#                     while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-#                         time.sleep(0.5)
-#                         log_json("Waiting for Second Buy Order Execution", {"orderNo": orderNo})
-#                         singleOrderStatus = api.single_order_history(orderNo)
-#                         log_json("Updated Order Status", singleOrderStatus)
-
-#                     if singleOrderStatus and singleOrderStatus[0]["status"] == 'COMPLETE':
-#                         LppArray.append(singleOrderStatus[0]["avgprc"])
-#                         nextBuyPrice = float(singleOrderStatus[0]["avgprc"]) - float(entryDiffPrice)
-#                         log_json("Second Buy Completed", {"nextBuyPrice": nextBuyPrice})
-#                     if singleOrderStatus and singleOrderStatus[0]["status"] == 'REJECTED':
-#                         log_json("Second Buy Order Rejected", singleOrderStatus)
-#                         return
-
-#         # Check end time
-#         current_time = datetime.now()
-#         if current_time > EndTime or current_time > closing_time_minus_1_min:
-#             timespent = current_time - start_time
-#             log_json("Time Spent", {
-#                 "timespent": str(timespent),
-#                 "start_time": start_time,
-#                 "current_time": current_time,
-#                 "closing_time_minus_1_min": closing_time_minus_1_min,
-#                 "closing_time": closing_time_combined
-#             })
-
-#             if float(netPurchasedQty) > 0 and current_time < closing_time_combined:
-#                 sellOrderParams["quantity"] = netPurchasedQty
-#                 sellOrderResponse = api.place_order(**sellOrderParams)
-#                 log_json("End Time Sell Order Status", sellOrderResponse)
-
-#                 if sellOrderResponse is None:
-#                     log_json("Error", "Order placement returned None")
-#                     return
-
-#                 orderNo = sellOrderResponse.get("norenordno")
-#                 if orderNo is None:
-#                     log_json("Error", "Order number is None in order status")
-#                     return
-
-#                 singleOrderStatus = api.single_order_history(orderNo)
-#                 log_json("End Time Sell Order History", singleOrderStatus)
-
-#                 while singleOrderStatus and singleOrderStatus[0]["status"] == 'OPEN':
-#                     time.sleep(0.5)
-#                     log_json("Waiting for End Time Sell Order Execution", {"orderNo": orderNo})
-#                     singleOrderStatus = api.single_order_history(orderNo)
-#                     log_json("Updated Order Status", singleOrderStatus)
-
-#                 LppArray = []
-#                 if sellOrderResponse is not None:
-#                     order_id = sellOrderResponse['norenordno']
-#                     log_json("End Time Sell Order Placed", {"order_id": order_id})
-#                 else:
-#                     log_json("End Time Sell Order Failed", {})
-#             else:
-#                 log_json("End Time Reached", {"reason": "No quantity to sell or market closed."})
-#             break
-
-#         time.sleep(1)
-
-#     # Calculate profit
-#     funds = api.get_limits()
-#     balance_cash = float(funds['cash'])
-#     profit = balance_cash - initialCash
-#     log_json("Trading Session Profit", {
-#         "initialCash": initialCash,
-#         "balanceCash": balance_cash,
-#         "profit": profit
-#     })
-
-#     # Logout
-#     def logout(user_id):
-#         ret1 = api.logout()
-#         log_json("Logout Response", ret1)
-#         log_json("User Logged Out", {"user_id": user_id})
-
-#     try:
-#         logout(user)
-#     except Exception as e:
-#         log_json("Logout Error", {"error": str(e)})
-
-# # Main Entry Point
-# if __name__ == "__main__":
-#     try:
-#         input_data = sys.stdin.read()
-#         params = json.loads(input_data)
-#         log_json("Received Params", params)
-#         run_scalping_strategy(params)
-#     except Exception as e:
-#         log_json("Startup Error", {"error": str(e)})
@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import time
+
+# Pay the interpreter and import cost before a strategy is requested, so a
+# pooled worker goes from params to its first API call in milliseconds.
+import requests  # noqa: F401  (pulled in by NorenApi, imported here to warm it explicitly)
+import pyotp  # noqa: F401
+from NorenRestApiPy.NorenApi import NorenApi  # noqa: F401
+from clock import RealClock
+from ipc import claim_stdout, CommandQueue, read_frames
+from quote_service import QuoteService
+from profiler import StackSampler, SAMPLE_INTERVAL
+from scalping_strategy import run_scalping_strategy, log_json, redacted_params
+from pairs_strategy import run_pairs_strategy
+
+# Seconds strategies get to stop once the backend has gone; strategy threads
+# are daemons, so any still running then die with the host (in a cluster
+# they are being restarted on another node and must not keep trading here)
+STOP_GRACE = 5.0
+
+# What a host can run, by params["strategy_type"]
+STRATEGIES = {
+    "scalping": run_scalping_strategy,
+    "pairs": run_pairs_strategy,
+}
+
+
+# Strategy Host
+class StrategyHost:
+    """Runs every strategy the backend assigns to this worker, one thread each.
+
+    Strategies on the same host share a QuoteService, so co-located
+    strategies on one symbol cost a single streamed subscription.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.quote_service = QuoteService()
+        self.sessions = {}  # strategyId -> (thread, CommandQueue)
+        self.lock = threading.Lock()
+        self.profiler = None
+
+    def start(self, strategy_id, params):
+        clock = RealClock()
+        # Wake the clock so a sleeping strategy loop picks commands up immediately
+        commands = CommandQueue(on_command=lambda command: clock.wake())
+        channel = self.channel.bind(strategyId=strategy_id)
+        thread = threading.Thread(
+            target=self._run,
+            args=(strategy_id, params, clock, channel, commands),
+            name=f"strategy-{strategy_id}",
+            daemon=True,
+        )
+        with self.lock:
+            self.sessions[strategy_id] = (thread, commands)
+        thread.start()
+
+    def _run(self, strategy_id, params, clock, channel, commands):
+        code = 0
+        try:
+            log_json("Received Params", redacted_params(params), clock, channel)
+            run = STRATEGIES.get(params.get("strategy_type", "scalping"))
+            if run is None:
+                raise ValueError(f"Unknown strategy type {params.get('strategy_type')!r}")
+            run(params, clock=clock, channel=channel, commands=commands,
+                quote_service=self.quote_service, owner=strategy_id)
+        except Exception as e:
+            log_json("Strategy Error", {"error": str(e)}, clock, channel)
+            code = 1
+        finally:
+            self.quote_service.release(strategy_id)
+            with self.lock:
+                self.sessions.pop(strategy_id, None)
+            channel.send({"type": "exit", "code": code})
+
+    def profile(self, message):
+        """Sample the whole host for a window and send back a "profile" frame."""
+        requestId = message.get("requestId")
+        if self.profiler is not None:
+            self.channel.send({"type": "profile", "requestId": requestId,
+                               "error": "A profile is already being captured"})
+            return
+
+        def done(report):
+            self.profiler = None
+            if "error" in report:
+                self.channel.send({"type": "profile", "requestId": requestId, "error": report["error"]})
+            else:
+                self.channel.send({"type": "profile", "requestId": requestId, "report": report})
+
+        self.profiler = StackSampler(
+            seconds=message.get("seconds", 10),
+            on_done=done,
+            interval=float(message.get("interval_ms", SAMPLE_INTERVAL * 1000)) / 1000,
+            allocations=bool(message.get("allocations")),
+        )
+        self.profiler.start()
+
+    def on_frame(self, message):
+        kind = message.get("type")
+        strategy_id = str(message.get("strategyId"))
+        if kind == "start":
+            self.start(strategy_id, message["params"])
+        elif kind == "profile":
+            self.profile(message)
+        elif kind == "command":
+            with self.lock:
+                session = self.sessions.get(strategy_id)
+            if session:
+                session[1].put(message)
+            else:
+                log_json("Unknown Strategy", message, channel=self.channel)
+
+    def stop_all(self):
+        """Ask every strategy to stop (cancelling its working orders)."""
+        with self.lock:
+            sessions = list(self.sessions.values())
+        for _, commands in sessions:
+            commands.put({"command": "stop"})
+
+    def wait(self, timeout=None):
+        with self.lock:
+            threads = [thread for thread, _ in self.sessions.values()]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+
+# Worker Entrypoint
+if __name__ == "__main__":
+    channel = claim_stdout()
+    channel.send({"type": "ready", "pid": os.getpid()})
+    host = StrategyHost(channel)
+    # Runs until the backend closes stdin: at shutdown for an idle worker,
+    # or once the last strategy on this host has exited. Strategies still
+    # running then have lost their backend (it died), and in a cluster are
+    # being restarted on another node, so they stop.
+    read_frames(sys.stdin, host.on_frame,
+                on_error=lambda error: log_json("Bad Frame", error, channel=channel))
+    host.stop_all()
+    host.wait(STOP_GRACE)
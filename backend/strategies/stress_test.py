@@ -0,0 +1,272 @@
+"""Monte Carlo stress test for the scalping ladder.
+
+Generates synthetic intraday price paths (GBM, Merton jump-diffusion or
+bootstrapped returns) and replays the run_scalping_strategy rules on all of
+them at once: every decision pass is a handful of NumPy operations over a
+batch of paths. Batches are spread over all cores.
+
+    python3 stress_test.py --paths 10000 --model jump --params params.json
+
+A step is one decision pass, --step-seconds apart. The live loop polls
+adaptively (MIN_POLL_INTERVAL near a trigger, MAX_POLL_INTERVAL far from
+all of them), so the default, LOOP_INTERVAL, sits between the two.
+
+`params.json` uses the same keys the backend sends to scalping_strategy.py
+(initial_buy_price, target_price_diff, entry_diff_price, lot_size,
+max_open_position, price_type). The report is one JSON document on stdout.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from pacing import LOOP_INTERVAL, MIN_POLL_INTERVAL, MAX_POLL_INTERVAL
+
+SESSION_MINUTES = 375          # 09:15 - 15:30
+ENTRY_CUTOFF_MINUTES = 30      # no new buys in the last 30 min (closing_time_minus_30_min)
+TICK_SIZE = 0.05
+BATCH_SIZE = 1000
+
+
+# Path generators: each returns an (n_paths, n_steps) array of prices
+def _log_paths_to_prices(s0, log_returns):
+    prices = s0 * np.exp(np.cumsum(log_returns, axis=1))
+    return np.round(prices / TICK_SIZE) * TICK_SIZE
+
+
+def _vol_scale(rng, n_paths, n_steps, spike_prob, spike_mult, spike_steps):
+    """Per-step volatility multiplier with a random spike window on some paths."""
+    scale = np.ones((n_paths, n_steps))
+    if spike_prob <= 0 or spike_mult == 1:
+        return scale
+    spiking = rng.random(n_paths) < spike_prob
+    starts = rng.integers(0, max(1, n_steps - spike_steps), n_paths)
+    steps = np.arange(n_steps)
+    window = (steps >= starts[:, None]) & (steps < starts[:, None] + spike_steps)
+    scale[window & spiking[:, None]] = spike_mult
+    return scale
+
+
+def gbm_paths(rng, n_paths, n_steps, s0, drift, vol, spike_prob=0.0, spike_mult=1.0, spike_steps=0):
+    # drift and vol are per trading day; a step is --step-seconds
+    dt = 1.0 / n_steps
+    sigma = vol * _vol_scale(rng, n_paths, n_steps, spike_prob, spike_mult, spike_steps)
+    shocks = rng.standard_normal((n_paths, n_steps))
+    return _log_paths_to_prices(s0, (drift - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * shocks)
+
+
+def jump_diffusion_paths(rng, n_paths, n_steps, s0, drift, vol, jump_rate, jump_mean, jump_std,
+                         spike_prob=0.0, spike_mult=1.0, spike_steps=0):
+    # Merton: GBM plus Poisson(jump_rate per day) jumps with N(jump_mean, jump_std) log size
+    dt = 1.0 / n_steps
+    sigma = vol * _vol_scale(rng, n_paths, n_steps, spike_prob, spike_mult, spike_steps)
+    shocks = rng.standard_normal((n_paths, n_steps))
+    jumps = rng.poisson(jump_rate * dt, (n_paths, n_steps))
+    jump_sizes = jumps * jump_mean + np.sqrt(jumps) * jump_std * rng.standard_normal((n_paths, n_steps))
+    compensator = jump_rate * (np.exp(jump_mean + 0.5 * jump_std ** 2) - 1)
+    log_returns = (drift - compensator - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * shocks + jump_sizes
+    return _log_paths_to_prices(s0, log_returns)
+
+
+def bootstrap_paths(rng, n_paths, n_steps, s0, returns, block=30):
+    # Stationary block bootstrap of per-step log returns keeps short-range autocorrelation
+    returns = np.asarray(returns, dtype=float)
+    n_blocks = -(-n_steps // block)
+    starts = rng.integers(0, max(1, len(returns) - block), (n_paths, n_blocks))
+    index = (starts[:, :, None] + np.arange(block)).reshape(n_paths, -1)[:, :n_steps]
+    return _log_paths_to_prices(s0, returns[np.minimum(index, len(returns) - 1)])
+
+
+# Vectorised replay of run_scalping_strategy
+def simulate_ladder(prices, params):
+    """Replay the ladder rules over every path; returns per-path results.
+
+    Mirrors the live loop: one decision per step on the step's LTP, market
+    exits at the LTP, stop-loss ends the session, the remaining position is
+    sold at the last step.
+    """
+    n_paths, n_steps = prices.shape
+    initial_buy = float(params["initial_buy_price"])
+    target = float(params["target_price_diff"])
+    entry_diff = float(params["entry_diff_price"])
+    lot = int(params["lot_size"])
+    max_open = int(params["max_open_position"])
+    limit_entry = params.get("price_type", "MKT") != "MKT"
+    stop_loss = entry_diff * (max_open + 1)
+    cutoff = int(n_steps * (SESSION_MINUTES - ENTRY_CUTOFF_MINUTES) / SESSION_MINUTES)
+
+    capacity = max_open // lot + 2
+    ladder = np.zeros((n_paths, capacity))
+    depth = np.zeros(n_paths, dtype=int)
+    next_buy = np.zeros(n_paths)
+    realized = np.zeros(n_paths)
+    entered = np.zeros(n_paths, dtype=bool)
+    active = np.ones(n_paths, dtype=bool)
+    stopped = np.zeros(n_paths, dtype=bool)
+    max_depth = np.zeros(n_paths, dtype=int)
+    trades = np.zeros(n_paths, dtype=int)
+    rows = np.arange(n_paths)
+
+    for step in range(n_steps):
+        ltp = prices[:, step]
+        can_buy = step < cutoff
+
+        # Initial entry: market immediately, limit once LTP trades through it
+        entry = active & ~entered & can_buy & ((ltp <= initial_buy) | (not limit_entry))
+        ladder[entry, 0] = ltp[entry]
+        depth[entry] = 1
+        next_buy[entry] = ltp[entry] - entry_diff
+        entered |= entry
+        trades += entry
+
+        holding = active & entered & (depth > 0)
+        top = ladder[rows, np.maximum(depth - 1, 0)]
+
+        # Stop loss: sell everything and end the session
+        hit = holding & (ltp < top - stop_loss)
+        if hit.any():
+            filled = np.arange(capacity) < depth[:, None]
+            realized[hit] += ((ltp[:, None] - ladder) * filled).sum(axis=1)[hit] * lot
+            depth[hit] = 0
+            active &= ~hit
+            stopped |= hit
+            trades += hit
+            holding &= ~hit
+
+        # Take profit on the most recent lot
+        take = holding & (ltp > top + target)
+        realized[take] += (ltp[take] - top[take]) * lot
+        depth[take] -= 1
+        next_buy[take] = ltp[take] - entry_diff
+        trades += take
+
+        # Average down (or re-enter after the ladder emptied)
+        buy = active & entered & can_buy & (ltp < next_buy)
+        buy &= np.where(depth > 0, depth * lot <= max_open, True) & (depth < capacity)
+        reentry = buy & (depth == 0)
+        ladder[rows[buy], depth[buy]] = ltp[buy]
+        depth[buy] += 1
+        next_buy[buy] = np.where(reentry[buy], ltp[buy], next_buy[buy]) - entry_diff
+        trades += buy
+        np.maximum(max_depth, depth, out=max_depth)
+
+    # End of session: square off what is left at the last price
+    last = prices[:, -1]
+    filled = np.arange(capacity) < depth[:, None]
+    realized += ((last[:, None] - ladder) * filled).sum(axis=1) * lot
+    trades += depth > 0
+
+    return {"pnl": realized, "max_depth": max_depth, "stopped": stopped, "trades": trades}
+
+
+def _run_batch(task):
+    seed, n_paths, n_steps, args, params, returns = task
+    rng = np.random.default_rng(seed)
+    s0 = float(args["s0"] or params["initial_buy_price"])
+    spike = dict(spike_prob=args["spike_prob"], spike_mult=args["spike_mult"], spike_steps=args["spike_steps"])
+    if args["model"] == "gbm":
+        prices = gbm_paths(rng, n_paths, n_steps, s0, args["drift"], args["vol"], **spike)
+    elif args["model"] == "jump":
+        prices = jump_diffusion_paths(rng, n_paths, n_steps, s0, args["drift"], args["vol"],
+                                      args["jump_rate"], args["jump_mean"], args["jump_std"], **spike)
+    else:
+        prices = bootstrap_paths(rng, n_paths, n_steps, s0, returns, args["block"])
+    return simulate_ladder(prices, params)
+
+
+def run_stress_test(params, args, returns=None):
+    n_steps = int(SESSION_MINUTES * 60 / args["step_seconds"])
+    seeds = np.random.SeedSequence(args["seed"]).spawn(-(-args["paths"] // BATCH_SIZE))
+    tasks = []
+    remaining = args["paths"]
+    for seed in seeds:
+        size = min(BATCH_SIZE, remaining)
+        remaining -= size
+        tasks.append((seed, size, n_steps, args, params, returns))
+
+    workers = args["workers"] or os.cpu_count() or 1
+    if workers == 1:
+        batches = [_run_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = list(pool.map(_run_batch, tasks))
+    return {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]}
+
+
+def summarize(results):
+    pnl = results["pnl"]
+    percentiles = [1, 5, 25, 50, 75, 95, 99]
+    var95, var99 = np.percentile(pnl, [5, 1])
+    depth_values, depth_counts = np.unique(results["max_depth"], return_counts=True)
+    return {
+        "paths": int(pnl.size),
+        "pnl": {
+            "mean": round(float(pnl.mean()), 2),
+            "std": round(float(pnl.std()), 2),
+            "min": round(float(pnl.min()), 2),
+            "max": round(float(pnl.max()), 2),
+            "percentiles": {f"p{p}": round(float(v), 2) for p, v in zip(percentiles, np.percentile(pnl, percentiles))},
+            "winRate": round(float((pnl > 0).mean()), 4),
+        },
+        "tail": {
+            "var95": round(float(var95), 2),
+            "var99": round(float(var99), 2),
+            "expectedShortfall95": round(float(pnl[pnl <= var95].mean()), 2),
+            "expectedShortfall99": round(float(pnl[pnl <= var99].mean()), 2),
+            "stopLossRate": round(float(results["stopped"].mean()), 4),
+        },
+        "ladder": {
+            "meanMaxDepth": round(float(results["max_depth"].mean()), 2),
+            "maxDepthDistribution": {int(d): int(c) for d, c in zip(depth_values, depth_counts)},
+        },
+        "meanTrades": round(float(results["trades"].mean()), 2),
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Monte Carlo stress test for the scalping ladder")
+    parser.add_argument("--params", required=True, help="JSON file with strategy params")
+    parser.add_argument("--paths", type=int, default=10000)
+    parser.add_argument("--model", choices=["gbm", "jump", "bootstrap"], default="gbm")
+    parser.add_argument("--s0", type=float, default=None, help="opening price (default initial_buy_price)")
+    parser.add_argument("--drift", type=float, default=0.0, help="log drift per day, e.g. -0.02 for a down day")
+    parser.add_argument("--vol", type=float, default=0.02, help="volatility per day")
+    parser.add_argument("--jump-rate", dest="jump_rate", type=float, default=2.0, help="jumps per day")
+    parser.add_argument("--jump-mean", dest="jump_mean", type=float, default=-0.005)
+    parser.add_argument("--jump-std", dest="jump_std", type=float, default=0.01)
+    parser.add_argument("--spike-prob", dest="spike_prob", type=float, default=0.0,
+                        help="share of paths with a volatility spike window")
+    parser.add_argument("--spike-mult", dest="spike_mult", type=float, default=3.0)
+    parser.add_argument("--spike-minutes", dest="spike_minutes", type=float, default=30.0)
+    parser.add_argument("--returns", help="file with one per-step log return per line (bootstrap model)")
+    parser.add_argument("--block", type=int, default=30, help="bootstrap block length in steps")
+    parser.add_argument("--step-seconds", dest="step_seconds", type=float, default=LOOP_INTERVAL,
+                        help=f"seconds between decisions; the live poller adapts between "
+                             f"{MIN_POLL_INTERVAL:g} and {MAX_POLL_INTERVAL:g} (default {LOOP_INTERVAL:g})")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--workers", type=int, default=0, help="processes (default: all cores)")
+    args = vars(parser.parse_args(argv))
+    if not args["step_seconds"] > 0:
+        parser.error("--step-seconds must be positive")
+    args["spike_steps"] = int(args["spike_minutes"] * 60 / args["step_seconds"])
+    if args["model"] == "bootstrap" and not args["returns"]:
+        parser.error("--returns is required for the bootstrap model")
+    return args
+
+
+# Main Entrypoint
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    with open(args["params"]) as f:
+        params = json.load(f)
+    returns = np.loadtxt(args["returns"]) if args["returns"] else None
+
+    started = time.perf_counter()
+    results = run_stress_test(params, args, returns)
+    report = summarize(results)
+    report["model"] = {key: args[key] for key in ("model", "drift", "vol", "seed")}
+    report["elapsedSeconds"] = round(time.perf_counter() - started, 2)
+    print(json.dumps(report, indent=2))
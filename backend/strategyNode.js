@@ -0,0 +1,79 @@
+// Strategy node: runs strategies on this machine's worker pool for a
+// coordinator (a backend started with STRATEGY_CLUSTER=coordinator, see
+// services/strategyCluster.js).
+//
+//   STRATEGY_COORDINATOR=host:port   coordinator to register with (default 127.0.0.1:7400)
+//   STRATEGY_CLUSTER_SECRET          must match the coordinator's
+//   STRATEGY_NODE_ID                 stable name for this node (default hostname-pid)
+//   STRATEGY_NODE_CAPACITY           strategies this node accepts (default 64)
+//   STRATEGY_CLUSTER_TLS=1           connect over TLS (required for a coordinator
+//                                    on another machine)
+//   STRATEGY_CLUSTER_TLS_CA          CA file to verify the coordinator's certificate
+//                                    (implies TLS; default: the system CAs)
+//
+// Pool sizing and broker endpoints use the same variables as the backend
+// (STRATEGY_POOL_SIZE, STRATEGIES_PER_HOST, SHOONYA_HOST, ...).
+const fs = require("fs");
+const dotenv = require("dotenv");
+dotenv.config();
+
+const { StrategyNode } = require("./services/strategyCluster");
+const { connectTcp } = require("./services/clusterTransport");
+const { startPool, shutdownPool } = require("./services/strategyWorkerPool");
+
+const [COORDINATOR_HOST, COORDINATOR_PORT] = (process.env.STRATEGY_COORDINATOR || "127.0.0.1:7400").split(":");
+const RECONNECT_MS = 2000;
+const MAX_RECONNECT_MS = 30000;
+const SHUTDOWN_GRACE_MS = 6000; // strategies get to cancel working orders
+const TLS_CA = process.env.STRATEGY_CLUSTER_TLS_CA;
+const TLS_OPTIONS =
+  TLS_CA || process.env.STRATEGY_CLUSTER_TLS === "1" ? (TLS_CA ? { ca: fs.readFileSync(TLS_CA) } : {}) : null;
+
+const node = new StrategyNode({
+  nodeId: process.env.STRATEGY_NODE_ID || undefined,
+});
+
+startPool();
+
+let reconnectMs = RECONNECT_MS;
+let shuttingDown = false;
+
+const connect = async () => {
+  try {
+    const link = await connectTcp(COORDINATOR_HOST, Number(COORDINATOR_PORT || 7400), TLS_OPTIONS);
+    reconnectMs = RECONNECT_MS;
+    node.connect(link);
+  } catch (err) {
+    console.error(`Coordinator ${COORDINATOR_HOST}:${COORDINATOR_PORT} unreachable: ${err.message}`);
+    setTimeout(connect, reconnectMs);
+    reconnectMs = Math.min(reconnectMs * 2, MAX_RECONNECT_MS);
+  }
+};
+
+// The node's strategies are already stopped (see StrategyNode.orphan)
+node.on("disconnected", () => {
+  if (!shuttingDown) setTimeout(connect, RECONNECT_MS);
+});
+
+// Retrying will not fix a wrong secret
+node.on("rejected", () => {
+  shuttingDown = true;
+  shutdownPool();
+  process.exit(1);
+});
+
+// Leaving the cluster stops every strategy here; the coordinator restarts
+// them on the other nodes
+process.on("SIGTERM", () => {
+  shuttingDown = true;
+  if (node.link) node.link.close();
+  setTimeout(() => {
+    shutdownPool();
+    process.exit(0);
+  }, SHUTDOWN_GRACE_MS);
+});
+
+console.log(
+  `Strategy node ${node.nodeId} connecting to ${COORDINATOR_HOST}:${COORDINATOR_PORT || 7400}${TLS_OPTIONS ? " (TLS)" : ""}`
+);
+connect();
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The strategies and the broker stub are scripts, imported by module name
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("strategies", "benchmarks"):
+    sys.path.insert(0, os.path.join(BACKEND, directory))
@@ -0,0 +1,119 @@
+// BulkWriter batching: size and interval flushes, one statement in flight,
+// retries, and draining everything on shutdown. config/db is replaced by a
+// pool that records (and, when told to, holds or fails) each INSERT.
+const test = require("node:test");
+const assert = require("node:assert");
+const path = require("path");
+
+const inserts = [];
+const db = {
+  hold: false,
+  fail: false,
+  release: null,
+  query(sql, [rows]) {
+    if (this.fail) return Promise.reject(new Error("connection lost"));
+    const insert = { sql, rows: rows.map((row) => row[0]) };
+    if (!this.hold) {
+      inserts.push(insert);
+      return Promise.resolve([{ affectedRows: rows.length }]);
+    }
+    return new Promise((resolve) => {
+      this.release = () => {
+        inserts.push(insert);
+        resolve([{ affectedRows: rows.length }]);
+      };
+    });
+  },
+};
+const dbPath = require.resolve(path.join(__dirname, "../config/db"));
+require.cache[dbPath] = { id: dbPath, filename: dbPath, loaded: true, exports: db };
+
+const { BulkWriter, BATCH_ROWS, FLUSH_MS } = require("../services/runRecorder");
+
+const settle = () => new Promise((resolve) => setImmediate(resolve));
+const rowsOf = (count, from = 0) => Array.from({ length: count }, (_, i) => [from + i]);
+
+test.beforeEach(() => {
+  inserts.length = 0;
+  Object.assign(db, { hold: false, fail: false, release: null });
+});
+
+test("a full batch is written at once, as one multi-row INSERT", async () => {
+  const writer = new BulkWriter("strategy_fills", ["id"]);
+  for (const row of rowsOf(BATCH_ROWS)) writer.push(row);
+  await settle();
+
+  assert.strictEqual(inserts.length, 1);
+  assert.match(inserts[0].sql, /^INSERT INTO strategy_fills \(id\) VALUES \?$/);
+  assert.strictEqual(inserts[0].rows.length, BATCH_ROWS);
+  assert.strictEqual(writer.timer, null);
+});
+
+test("a partial batch waits for the flush interval", async (t) => {
+  t.mock.timers.enable({ apis: ["setTimeout"] });
+  const writer = new BulkWriter("strategy_fills", ["id"]);
+  for (const row of rowsOf(3)) writer.push(row);
+
+  t.mock.timers.tick(FLUSH_MS - 1);
+  await settle();
+  assert.strictEqual(inserts.length, 0);
+
+  t.mock.timers.tick(1);
+  await settle();
+  assert.deepStrictEqual(inserts.map((insert) => insert.rows), [[0, 1, 2]]);
+});
+
+test("rows pushed while a batch is in flight go in the next statement", async () => {
+  const writer = new BulkWriter("strategy_fills", ["id"]);
+  db.hold = true;
+  for (const row of rowsOf(BATCH_ROWS)) writer.push(row);
+  for (const row of rowsOf(BATCH_ROWS + 2, BATCH_ROWS)) writer.push(row);
+  await settle();
+  assert.strictEqual(inserts.length, 0); // the first statement is still running
+
+  db.hold = false;
+  db.release();
+  await writer.drain();
+
+  assert.deepStrictEqual(inserts.map((insert) => insert.rows.length), [BATCH_ROWS, BATCH_ROWS, 2]);
+  assert.deepStrictEqual(inserts.flatMap((insert) => insert.rows), rowsOf(BATCH_ROWS * 2 + 2).map(([id]) => id));
+});
+
+test("drain writes rows queued behind an in-flight statement (shutdown)", async () => {
+  const writer = new BulkWriter("strategy_snapshots", ["id"]);
+  db.hold = true;
+  for (const row of rowsOf(BATCH_ROWS)) writer.push(row);
+  writer.push([BATCH_ROWS]);
+
+  const drained = writer.drain();
+  db.hold = false;
+  db.release();
+  await drained;
+
+  assert.deepStrictEqual(inserts.map((insert) => insert.rows.length), [BATCH_ROWS, 1]);
+  assert.strictEqual(writer.rows.length, 0);
+  clearTimeout(writer.timer);
+});
+
+test("a failed batch is kept for the next flush, and drain gives up on it", async () => {
+  const writer = new BulkWriter("strategy_fills", ["id"]);
+  for (const row of rowsOf(3)) writer.push(row);
+  db.fail = true;
+  const errors = [];
+  const consoleError = console.error;
+  console.error = (...args) => errors.push(args.join(" "));
+  try {
+    await writer.drain();
+  } finally {
+    console.error = consoleError;
+  }
+  assert.strictEqual(inserts.length, 0);
+  assert.strictEqual(writer.rows.length, 3);
+  assert.strictEqual(writer.failures, 1);
+  assert.match(errors[0], /strategy_fills failed \(3 rows\)/);
+
+  db.fail = false;
+  await writer.drain();
+  assert.deepStrictEqual(inserts.map((insert) => insert.rows), [[0, 1, 2]]);
+  clearTimeout(writer.timer);
+});
@@ -0,0 +1,94 @@
+// Placement and failover of an in-process cluster (createLocalCluster), with
+// the nodes' worker pool replaced by one that only records what it runs
+const test = require("node:test");
+const assert = require("node:assert");
+const { EventEmitter } = require("events");
+
+process.env.STRATEGY_POOL_SIZE = "0"; // no Python workers
+const { createLocalCluster } = require("../services/strategyCluster");
+
+const PARAMS = { exch: "NSE", price_type: "MKT", lot_size: "1" };
+
+// Stands in for strategyWorkerPool: sessions exit as soon as they are stopped
+const fakeWorkers = () => {
+  const workers = { started: [], stopped: [] };
+  workers.startStrategyProcess = (strategyId, params) => {
+    const session = new EventEmitter();
+    session.command = () => true;
+    session.stop = (graceMs, options = {}) => {
+      workers.stopped.push({ strategyId, force: Boolean(options.force) });
+      setImmediate(() => session.emit("exit", 0));
+    };
+    workers.started.push({ strategyId, params });
+    return session;
+  };
+  workers.poolStats = () => ({ hosts: [], idle: [] });
+  return workers;
+};
+
+const until = async (predicate, timeoutMs = 2000) => {
+  const deadline = Date.now() + timeoutMs;
+  while (!predicate()) {
+    if (Date.now() > deadline) throw new Error("Timed out waiting for the cluster");
+    await new Promise((resolve) => setTimeout(resolve, 5));
+  }
+};
+
+const startCluster = async (workers) => {
+  const cluster = createLocalCluster(2, { workers, reassignDelayMs: 20 });
+  await until(() => cluster.coordinator.nodes.size === 2);
+  return cluster;
+};
+
+const nodeOf = (coordinator, strategyId) => coordinator.sessions.get(strategyId).node.id;
+
+test("strategies sharing an account or symbol are placed together", async () => {
+  const workers = fakeWorkers();
+  const { coordinator } = await startCluster(workers);
+  try {
+    coordinator.start("1", { ...PARAMS, user: "A", stock_name: "SBIN-EQ" });
+    coordinator.start("2", { ...PARAMS, user: "A", stock_name: "INFY-EQ" });
+    coordinator.start("3", { ...PARAMS, user: "B", stock_name: "TCS-EQ" });
+    coordinator.start("4", { ...PARAMS, user: "C", stock_name: "SBIN-EQ" });
+    await until(() => workers.started.length === 4);
+
+    assert.strictEqual(nodeOf(coordinator, "2"), nodeOf(coordinator, "1")); // same account
+    assert.strictEqual(nodeOf(coordinator, "4"), nodeOf(coordinator, "1")); // same symbol
+    assert.notStrictEqual(nodeOf(coordinator, "3"), nodeOf(coordinator, "1")); // least loaded
+  } finally {
+    coordinator.close();
+  }
+});
+
+test("a lost node's strategies are force-stopped there and restarted elsewhere", async () => {
+  const workers = fakeWorkers();
+  const { coordinator, nodes } = await startCluster(workers);
+  try {
+    const moved = coordinator.start("1", { ...PARAMS, user: "A", stock_name: "SBIN-EQ" });
+    const stayed = coordinator.start("2", { ...PARAMS, user: "B", stock_name: "TCS-EQ" });
+    await until(() => workers.started.length === 2);
+    const lostId = moved.node.id;
+    const tags = [];
+    moved.on("frame", (frame) => tags.push(frame.tag));
+
+    nodes.find((node) => node.nodeId === lostId).link.close();
+    await until(() => moved.node && moved.node.id !== lostId && workers.started.length === 3);
+
+    assert.deepStrictEqual(workers.stopped, [{ strategyId: "1", force: true }]);
+    assert.deepStrictEqual(workers.started[2], { strategyId: "1", params: moved.params });
+    assert.strictEqual(moved.node.id, stayed.node.id);
+    assert.deepStrictEqual(tags, ["Node Lost", "Strategy Reassigned"]);
+    assert.deepStrictEqual(
+      coordinator.stats().nodes.map((node) => [node.id, node.strategies.sort()]),
+      [[stayed.node.id, ["1", "2"]]]
+    );
+
+    // And it still stops through the coordinator
+    const exited = new Promise((resolve) => moved.once("exit", resolve));
+    moved.stop();
+    assert.strictEqual(await exited, 0);
+    assert.strictEqual(coordinator.sessions.has("1"), false);
+  } finally {
+    coordinator.close();
+  }
+});
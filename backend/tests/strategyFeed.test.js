@@ -0,0 +1,129 @@
+// StrategyFeed: levels, position / ladder state diffs and per-viewer quote
+// coalescing, against a fake session and recording viewer streams
+const test = require("node:test");
+const assert = require("node:assert");
+const { EventEmitter } = require("events");
+
+const { StrategyFeed } = require("../services/strategyFeed");
+
+const fakeSession = () => {
+  const session = new EventEmitter();
+  session.symbol = "NSE|SBIN-EQ";
+  return session;
+};
+
+const viewerStream = () => ({
+  frames: [],
+  ended: false,
+  send(frame) {
+    this.frames.push(frame);
+  },
+  end() {
+    this.ended = true;
+  },
+  of(type) {
+    return this.frames.filter((frame) => frame.type === type);
+  },
+});
+
+const event = (tag, data) => ({ type: "event", tag, data, timestamp: "2026-10-19T09:15:00" });
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+test("viewers get their level and everything below it", () => {
+  const session = fakeSession();
+  const feed = new StrategyFeed(session);
+  const trades = viewerStream();
+  const debug = viewerStream();
+  feed.addViewer(trades, { level: "trades" });
+  feed.addViewer(debug, { level: "debug" });
+
+  session.emit("frame", event("Buy Order Status", { norenordno: "1" }));
+  session.emit("frame", event("Margin Check", {}));
+  session.emit("frame", event("Waiting to Buy", {}));
+
+  assert.deepStrictEqual(trades.frames.map((frame) => frame.tag), ["Buy Order Status"]);
+  // (a debug viewer also gets the state snapshot first)
+  assert.deepStrictEqual(debug.of("event").map((frame) => frame.tag), ["Buy Order Status", "Margin Check", "Waiting to Buy"]);
+});
+
+test("position and ladder frames become diffs of what changed", () => {
+  const session = fakeSession();
+  const feed = new StrategyFeed(session);
+  const state = viewerStream();
+  feed.addViewer(state, { level: "state" });
+  assert.deepStrictEqual(state.frames[0], { type: "snapshot", state: { position: {}, ladder: {}, spread: {} }, quote: null });
+
+  const position = (netqty, avg) => [
+    { tsym: "INFY-EQ", netqty: "7" },
+    { tsym: "SBIN-EQ", netqty, daybuyqty: "2", daybuyavgprc: avg, unused: "x" },
+  ];
+  session.emit("frame", event("Current Position", position("1", "100.00")));
+  session.emit("frame", event("Current Position", position("1", "100.00"))); // unchanged: nothing sent
+  session.emit("frame", event("Current Position", position("2", "99.50")));
+  session.emit("frame", event("Position Info", { netQty: 2, nextBuyPrice: 99, LppArraySize: 2, TP: 99.6, LTP: 99.5 }));
+  session.emit("frame", event("Position Info", { netQty: 2, nextBuyPrice: 98.9, LppArraySize: 2, TP: 99.6, LTP: 99.4 }));
+
+  assert.deepStrictEqual(state.of("state").map((frame) => frame.diff), [
+    { position: { netqty: "1", daybuyqty: "2", daybuyavgprc: "100.00" } },
+    { position: { netqty: "2", daybuyavgprc: "99.50" } },
+    { ladder: { netQty: 2, nextBuyPrice: 99, LppArraySize: 2, TP: 99.6 } },
+    { ladder: { nextBuyPrice: 98.9 } },
+  ]);
+  // Raw per-pass frames are for debug viewers only
+  assert.strictEqual(state.of("event").length, 0);
+
+  // A late viewer starts from the folded state
+  const late = viewerStream();
+  feed.addViewer(late, { level: "state" });
+  assert.deepStrictEqual(late.frames[0].state.ladder, { netQty: 2, nextBuyPrice: 98.9, LppArraySize: 2, TP: 99.6 });
+  assert.strictEqual(late.frames[0].state.position.netqty, "2");
+});
+
+test("quotes are coalesced to each viewer's own rate", async () => {
+  const session = fakeSession();
+  const feed = new StrategyFeed(session, { fps: 20 });
+  const fast = viewerStream();
+  const slow = viewerStream();
+  const trades = viewerStream();
+  feed.addViewer(fast, { level: "state" });
+  feed.addViewer(slow, { level: "state", fps: 4 });
+  feed.addViewer(trades, { level: "trades" });
+
+  const startedAt = Date.now();
+  let lp = 100;
+  while (Date.now() - startedAt < 500) {
+    lp += 0.05;
+    session.emit("frame", event("Quotes", { lp: lp.toFixed(2), bp1: "99.00", junk: "x" }));
+    await sleep(5);
+  }
+  const sent = lp.toFixed(2);
+  // The timer delivers the newest quote to everyone, then goes idle
+  await sleep(400);
+
+  const fastQuotes = fast.of("quote");
+  const slowQuotes = slow.of("quote");
+  // ~20/s and ~4/s over half a second, plus the trailing flush
+  assert.ok(fastQuotes.length >= 5 && fastQuotes.length <= 13, `fast viewer got ${fastQuotes.length}`);
+  assert.ok(slowQuotes.length >= 2 && slowQuotes.length <= 4, `slow viewer got ${slowQuotes.length}`);
+  assert.strictEqual(fastQuotes.at(-1).quote.lp, sent);
+  assert.strictEqual(slowQuotes.at(-1).quote.lp, sent);
+  assert.strictEqual(slowQuotes.at(-1).quote.junk, undefined);
+  assert.strictEqual(trades.of("quote").length, 0);
+  assert.strictEqual(feed.quoteTimer, null);
+});
+
+test("viewers are told when the session exits", () => {
+  const session = fakeSession();
+  const feed = new StrategyFeed(session);
+  const viewer = viewerStream();
+  const detached = viewerStream();
+  feed.addViewer(viewer, { level: "trades" });
+  feed.addViewer(detached, { level: "trades" })();
+
+  session.emit("exit", 0);
+
+  assert.deepStrictEqual(viewer.frames, [{ type: "exit", code: 0 }]);
+  assert.ok(viewer.ended);
+  assert.deepStrictEqual(detached.frames, []);
+  assert.strictEqual(feed.viewers.size, 0);
+});
@@ -0,0 +1,121 @@
+"""FanoutApi per-follower accounting against scripted broker sessions."""
+from datetime import datetime
+
+from clock import SimulatedClock
+from fanout import FanoutApi, SessionPool
+
+TOKEN = "JBSWY3DPEHPK3PXP"
+
+
+class FakeSession:
+    """One account's broker session; `status[orderNo]` is what it reports."""
+
+    def __init__(self):
+        self.placed = []
+        self.status = {}
+
+    def login(self, userid, **_):
+        self.user = userid
+        return {"stat": "Ok"}
+
+    def place_order(self, **orderParams):
+        orderNo = f"{self.user}-{len(self.placed) + 1}"
+        self.placed.append(orderParams)
+        self.status[orderNo] = {"status": "OPEN"}
+        return {"stat": "Ok", "norenordno": orderNo}
+
+    def single_order_history(self, orderNo):
+        return [dict(self.status[orderNo])]
+
+    def logout(self):
+        return {"stat": "Ok"}
+
+
+def fanout(side="long"):
+    sessions = {}
+
+    def factory():
+        session = FakeSession()
+        sessions[len(sessions)] = session
+        return session
+
+    events = []
+    api = FanoutApi([{"user": user, "password": "p", "token": TOKEN, "vc": "v", "app_key": "k", "imei": "i"}
+                     for user in ("F1", "F2", "F3")],
+                    factory, lambda tag, data: events.append((tag, data)),
+                    SimulatedClock(datetime(2026, 10, 19, 9, 15)), sessions=SessionPool(), side=side)
+    api.login(userid="L", password="p", twoFA="123456", vendor_code="v", api_secret="k", imei="i")
+    return api, {session.user: session for session in sessions.values()}, events
+
+
+def order(side, quantity=10):
+    return {"buy_or_sell": side, "product_type": "I", "exchange": "NSE", "tradingsymbol": "SBIN-EQ",
+            "quantity": quantity, "price_type": "MKT", "price": 0}
+
+
+def finish(api, sessions, groupId, outcomes):
+    """Set each account's leg of `groupId` to its outcome and let the fan-out see it."""
+    for user, outcome in outcomes.items():
+        session = sessions[user]
+        session.status[api.orders[groupId].legs[user]["orderNo"]] = dict(outcome, avgprc="100.00")
+    return api.single_order_history(groupId)[0]
+
+
+def test_exits_capped_at_what_each_follower_entered():
+    api, sessions, events = fanout()
+    entry = api.place_order(**order("B", 10))["norenordno"]
+    group = finish(api, sessions, entry, {
+        "L": {"status": "COMPLETE"},
+        "F1": {"status": "COMPLETE"},
+        "F2": {"status": "CANCELED", "fillshares": "4"},  # partly filled, then cancelled
+        "F3": {"status": "REJECTED"},
+    })
+    assert group["status"] == "COMPLETE"
+    assert api.netQty == {"L": 10, "F1": 10, "F2": 4, "F3": 0}
+
+    api.place_order(**order("S", 10))
+
+    assert [placed["quantity"] for placed in sessions["L"].placed] == [10, 10]
+    assert [placed["quantity"] for placed in sessions["F1"].placed] == [10, 10]
+    assert [placed["quantity"] for placed in sessions["F2"].placed] == [10, 4]
+    assert [placed["quantity"] for placed in sessions["F3"].placed] == [10]  # nothing to exit
+    fills = {data["account"]: data["qty"] for tag, data in events if tag == "Fanout Fill"}
+    assert fills == {"L": 10, "F1": 10, "F2": 4, "F3": 0}
+
+
+def test_partial_exit_leaves_the_rest_to_exit_later():
+    api, sessions, _ = fanout()
+    entry = api.place_order(**order("B", 10))["norenordno"]
+    finish(api, sessions, entry, {user: {"status": "COMPLETE"} for user in sessions})
+
+    exit_ = api.place_order(**order("S", 10))["norenordno"]
+    group = finish(api, sessions, exit_, {
+        "L": {"status": "COMPLETE"},
+        "F1": {"status": "CANCELED", "fillshares": "6"},
+        "F2": {"status": "COMPLETE"},
+        "F3": {"status": "CANCELED"},
+    })
+    assert group["fillshares"] == 10
+    assert api.netQty == {"L": 0, "F1": 4, "F2": 0, "F3": 10}
+
+    api.place_order(**order("S", 10))
+    assert sessions["F1"].placed[-1]["quantity"] == 4
+    assert sessions["F3"].placed[-1]["quantity"] == 10
+    assert len(sessions["F2"].placed) == 2
+
+
+def test_short_ladder_caps_buys_at_what_was_sold():
+    api, sessions, _ = fanout(side="short")
+    entry = api.place_order(**order("S", 10))["norenordno"]
+    finish(api, sessions, entry, {
+        "L": {"status": "COMPLETE"},
+        "F1": {"status": "REJECTED", "fillshares": "3"},
+        "F2": {"status": "COMPLETE"},
+        "F3": {"status": "CANCELED"},
+    })
+    assert api.netQty == {"L": -10, "F1": -3, "F2": -10, "F3": 0}
+
+    api.place_order(**order("B", 10))
+    assert sessions["F1"].placed[-1]["quantity"] == 3
+    assert sessions["F2"].placed[-1]["quantity"] == 10
+    assert len(sessions["F3"].placed) == 1
@@ -0,0 +1,122 @@
+"""OrderManager against a scripted broker on a SimulatedClock."""
+from datetime import datetime
+
+from clock import SimulatedClock
+from order_manager import OrderManager, MAX_CHASES
+
+
+class FakeApi:
+    """Broker whose order book the test sets directly: `status[orderNo]` is
+    the history entry single_order_history returns."""
+
+    def __init__(self):
+        self.status = {}
+        self.modified = []
+        self.cancelled = []
+        self.accept = True
+
+    def place_order(self, **orderParams):
+        if not self.accept:
+            return None
+        orderNo = str(len(self.status) + 1)
+        self.status[orderNo] = {"status": "OPEN", "prc": orderParams.get("price")}
+        return {"stat": "Ok", "norenordno": orderNo}
+
+    def single_order_history(self, orderNo):
+        return [dict(self.status[orderNo])]
+
+    def modify_order(self, orderno, newprice, **_):
+        self.modified.append((orderno, newprice))
+        return {"stat": "Ok"}
+
+    def cancel_order(self, orderNo):
+        self.cancelled.append(orderNo)
+        return {"stat": "Ok"}
+
+
+def buy(price=100.0, quantity=10, price_type="LMT"):
+    return {"buy_or_sell": "B", "product_type": "C", "exchange": "NSE", "tradingsymbol": "SBIN-EQ",
+            "quantity": quantity, "discloseqty": 0, "price_type": price_type, "price": price,
+            "trigger_price": None, "retention": "DAY", "remarks": "test"}
+
+
+def manager(timeout=60.0):
+    api, clock, events = FakeApi(), SimulatedClock(datetime(2026, 10, 19, 9, 15)), []
+    orders = OrderManager(api, clock, lambda tag, data: events.append((tag, data)),
+                          chase_ticks=2, timeout=timeout)
+    return api, clock, orders, events
+
+
+def test_chase_reprices_until_max_chases():
+    api, clock, orders, _ = manager()
+    order = orders.submit("Buy", buy(price=100.0))
+
+    # One tick away: left alone
+    orders.poll(100.05)
+    assert api.modified == []
+    # Market keeps running away, past the 2-tick threshold on every pass
+    for step in range(1, MAX_CHASES + 3):
+        clock.advance(1)
+        orders.poll(100.0 + step * 0.2)
+
+    assert len(api.modified) == MAX_CHASES
+    assert api.modified[0] == ("1", 100.2)
+    assert order.chases == MAX_CHASES
+    assert order.price == api.modified[-1][1]
+    assert order.status == "OPEN"
+
+
+def test_timeout_cancels_and_reports_canceled():
+    api, clock, orders, events = manager(timeout=30.0)
+    order = orders.submit("Buy", buy())
+
+    clock.advance(31)
+    assert orders.poll(100.0) == []
+    assert api.cancelled == ["1"]
+    assert order.cancelRequested
+    # Not finished until the broker says so
+    assert orders.working() == [order]
+
+    api.status["1"]["status"] = "CANCELED"
+    assert orders.poll(100.0) == [order]
+    assert order.status == "CANCELED"
+    assert order.filledQty == 0
+    assert orders.working() == []
+    assert "Fill" not in [tag for tag, _ in events]
+
+
+def test_failed_placement_returns_none():
+    api, _, orders, _ = manager()
+    api.accept = False
+
+    assert orders.submit("Buy", buy()) is None
+    assert orders.working() == []
+
+
+def test_partial_fill_before_cancel_is_counted():
+    api, clock, orders, events = manager(timeout=30.0)
+    order = orders.submit("Buy", buy(quantity=10))
+
+    clock.advance(31)
+    orders.poll(100.0)
+    api.status["1"].update(status="CANCELED", fillshares="4", avgprc="99.95")
+    orders.poll(100.0)
+
+    assert order.status == "CANCELED"
+    assert order.filledQty == 4
+    fills = [data for tag, data in events if tag == "Fill"]
+    assert len(fills) == 1
+    assert fills[0]["qty"] == 4
+    assert fills[0]["status"] == "CANCELED"
+    assert fills[0]["price"] == "99.95"
+
+
+def test_complete_fill_reports_the_order_quantity():
+    api, _, orders, events = manager()
+    order = orders.submit("Buy", buy(quantity=10))
+
+    api.status["1"].update(status="COMPLETE", avgprc="100.00")
+    assert orders.poll(100.0) == [order]
+
+    assert order.filledQty == 10
+    assert [data["qty"] for tag, data in events if tag == "Fill"] == [10]
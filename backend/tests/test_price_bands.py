@@ -0,0 +1,90 @@
+"""PriceBands: tick snapping on the passive side and circuit clamping."""
+from datetime import datetime
+
+import pytest
+
+from clock import SimulatedClock
+from price_bands import PriceBands
+
+
+class QuoteApi:
+    def __init__(self, quote):
+        self.quote = quote
+        self.calls = 0
+
+    def get_quotes(self, exch, tradingsymbol):
+        self.calls += 1
+        return dict(self.quote)
+
+
+QUOTE = {"lc": "90.00", "uc": "110.00", "ti": "0.05"}
+
+
+def bands(quote=QUOTE, refresh_after=900.0):
+    api, clock, events = QuoteApi(quote), SimulatedClock(datetime(2026, 10, 19, 9, 15)), []
+    priceBands = PriceBands(api, clock, lambda tag, data: events.append((tag, data)), refresh_after)
+    priceBands.update("NSE", "SBIN-EQ", quote)
+    return priceBands, api, clock, events
+
+
+@pytest.mark.parametrize("side, price, expected", [
+    ("B", 100.03, 100.0),    # buys round down...
+    ("S", 100.03, 100.05),   # ...sells round up
+    ("B", 100.05, 100.05),   # already on the grid: unchanged either way
+    ("S", 100.05, 100.05),
+    ("B", 100.1, 100.1),     # float noise (100.1 / 0.05 = 2001.9999...) is not a tick
+    ("S", 100.1, 100.1),
+])
+def test_limit_price_snaps_to_the_passive_tick(side, price, expected):
+    priceBands, *_ = bands()
+    assert priceBands.limit_price("NSE", "SBIN-EQ", side, price) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("side, price, expected", [
+    ("B", 120.0, 110.0),
+    ("S", 120.0, 110.0),
+    ("B", 80.0, 90.0),
+    ("S", 85.02, 90.0),
+])
+def test_limit_price_clamped_into_the_circuit(side, price, expected):
+    priceBands, *_ = bands()
+    assert priceBands.limit_price("NSE", "SBIN-EQ", side, price) == expected
+
+
+def test_unknown_instrument_passes_through():
+    priceBands, *_ = bands()
+    assert priceBands.limit_price("NSE", "INFY-EQ", "B", 100.03) == 100.03
+
+
+def test_check_adjusts_limit_orders_only():
+    priceBands, _, _, events = bands()
+    order = {"exchange": "NSE", "tradingsymbol": "SBIN-EQ", "buy_or_sell": "S", "price_type": "LMT", "price": 111.02}
+
+    assert priceBands.check("Sell", order)["price"] == 110.0
+    assert order["price"] == 111.02  # the caller's params are not mutated
+    adjusted = [data for tag, data in events if tag == "Order Price Adjusted"]
+    assert adjusted == [{"kind": "Sell", "from": 111.02, "to": 110.0, "lower": 90.0, "upper": 110.0, "tick": 0.05}]
+
+    market = dict(order, price_type="MKT", price=0)
+    assert priceBands.check("Sell", market) is market
+
+
+def test_partial_quote_keeps_the_rest_of_the_band():
+    priceBands, *_ = bands()
+    priceBands.update("NSE", "SBIN-EQ", {"uc": "105.00", "lp": "101.00"})
+    assert priceBands.limit_price("NSE", "SBIN-EQ", "B", 108.0) == 105.0
+    assert priceBands.limit_price("NSE", "SBIN-EQ", "B", 80.0) == 90.0
+    assert priceBands.limit_price("NSE", "SBIN-EQ", "B", 100.03) == pytest.approx(100.0)
+
+
+def test_stale_band_is_refetched_once_per_period():
+    priceBands, api, clock, _ = bands({**QUOTE, "uc": "120.00"}, refresh_after=60.0)
+    clock.advance(30)
+    priceBands.refresh()
+    assert api.calls == 0
+
+    clock.advance(31)
+    priceBands.refresh()
+    priceBands.refresh()
+    assert api.calls == 1
+    assert priceBands.limit_price("NSE", "SBIN-EQ", "B", 130.0) == 120.0
@@ -0,0 +1,42 @@
+"""StackSampler always reports back, and leaves tracemalloc as it found it."""
+import tracemalloc
+
+from profiler import StackSampler
+
+
+def capture(out_dir, allocations=True):
+    reports = []
+    sampler = StackSampler(0.05, reports.append, interval=0.005, allocations=allocations, out_dir=out_dir)
+    sampler.start()
+    sampler._thread.join(5)
+    return reports
+
+
+def test_report_and_tracing_stopped(tmp_path):
+    reports = capture(str(tmp_path))
+
+    assert len(reports) == 1
+    assert reports[0]["file"].startswith(str(tmp_path))
+    assert reports[0]["allocations"] is not None
+    assert not tracemalloc.is_tracing()
+
+
+def test_failure_is_reported_and_tracing_stopped(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+
+    reports = capture(str(blocker / "profiles"))
+
+    assert len(reports) == 1
+    assert "error" in reports[0]
+    assert not tracemalloc.is_tracing()
+
+
+def test_tracing_started_elsewhere_is_left_on(tmp_path):
+    tracemalloc.start()
+    try:
+        reports = capture(str(tmp_path))
+        assert reports[0]["allocations"] is not None
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,129 @@
+"""QuoteService subscription refcounts, staleness and session handoff."""
+import time
+from datetime import datetime
+
+from clock import SimulatedClock
+from quote_service import QuoteService
+
+SBIN = "NSE|3045"
+INFY = "NSE|1594"
+
+
+class FakeSocketApi:
+    """A logged-in session's websocket: the test fires its callbacks."""
+
+    def __init__(self):
+        self.subscribed = []
+        self.unsubscribed = []
+        self.started = 0
+        self.closed = False
+
+    def start_websocket(self, subscribe_callback, socket_open_callback, socket_close_callback):
+        self.started += 1
+        self.tick, self.open, self.close = subscribe_callback, socket_open_callback, socket_close_callback
+
+    def subscribe(self, keys):
+        self.subscribed.append(keys)
+
+    def unsubscribe(self, keys):
+        self.unsubscribed.append(keys)
+
+    def close_websocket(self):
+        self.closed = True
+
+
+def service():
+    return QuoteService(SimulatedClock(datetime(2026, 10, 19, 9, 15)), stale_after=30.0)
+
+
+def tick(api, key, lp):
+    exch, token = key.split("|")
+    api.tick({"e": exch, "tk": token, "lp": lp})
+
+
+def test_one_subscription_per_instrument_until_the_last_release():
+    quotes, api = service(), FakeSocketApi()
+    quotes.attach(api, "s1")
+    quotes.attach(FakeSocketApi(), "s2")
+    first = quotes.subscribe("NSE", "3045", "s1")
+    api.open()
+    second = quotes.subscribe("NSE", "3045", "s2")
+    assert api.subscribed == [[SBIN]]  # the subscription from before the socket opened
+    assert quotes.symbols() == {SBIN: 2}
+
+    tick(api, SBIN, "101.00")
+    assert first.latest() is second.latest()  # one shared snapshot
+
+    quotes.release("s2")
+    assert api.unsubscribed == []
+    assert quotes.symbols() == {SBIN: 1}
+    quotes.subscribe("NSE", "1594", "s1")
+    assert api.subscribed == [[SBIN], INFY]
+
+    quotes.release("s1")
+    assert api.unsubscribed == [[SBIN, INFY]]
+    assert quotes.symbols() == {}
+
+
+def test_stale_or_closed_stream_defers_to_rest():
+    quotes, api = service(), FakeSocketApi()
+    quotes.attach(api, "s1")
+    feed = quotes.subscribe("NSE", "3045", "s1")
+    assert feed.latest() is None  # not connected yet
+    api.open()
+    tick(api, SBIN, "101.00")
+    assert feed.latest()["lp"] == "101.00"
+
+    quotes.clock.advance(31)
+    assert feed.latest() is None  # no tick for longer than stale_after
+    tick(api, SBIN, "101.05")
+    assert feed.latest()["lp"] == "101.05"
+
+    api.close()
+    assert feed.latest() is None
+    api.open()  # NorenApi reconnects and resubscribes
+    assert api.subscribed[-1] == [SBIN]
+
+
+def test_stream_moves_to_another_account_when_its_owner_logs_out():
+    quotes, first, second = service(), FakeSocketApi(), FakeSocketApi()
+    assert quotes.attach(first, "alice-strategy")
+    assert not quotes.attach(second, "bob-strategy")
+    quotes.subscribe("NSE", "3045", "alice-strategy")
+    feed = quotes.subscribe("NSE", "1594", "bob-strategy")
+    first.open()
+    tick(first, INFY, "1500.00")
+    assert second.started == 0
+
+    quotes.release("alice-strategy")
+    assert first.unsubscribed == [[SBIN]]
+    assert second.started == 1
+    # Until the new socket opens the feed is not trusted: REST fallback
+    assert feed.latest() is None
+    # The old session's late close does not touch the new stream
+    first.close()
+    second.open()
+    assert second.subscribed == [[INFY]]
+    tick(second, INFY, "1501.00")
+    assert feed.latest()["lp"] == "1501.00"
+
+    deadline = time.monotonic() + 2
+    while not first.closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert first.closed
+
+
+def test_no_session_left_means_no_stream():
+    quotes, api = service(), FakeSocketApi()
+    quotes.attach(api, "s1")
+    feed = quotes.subscribe("NSE", "3045", "s1")
+    api.open()
+    tick(api, SBIN, "101.00")
+
+    quotes.release("s1")
+    assert not quotes.connected
+    assert feed.latest() is None
+    # The next strategy to attach starts the stream again
+    other = FakeSocketApi()
+    assert quotes.attach(other, "s2")
+    assert other.started == 1
@@ -0,0 +1,23 @@
+"""The "Received Params" frame reaches viewers and run logs, so it must not carry credentials."""
+from scalping_strategy import redacted_params
+
+from test_simulated_day import PARAMS
+
+
+def test_credentials_are_masked():
+    safe = redacted_params(PARAMS)
+
+    for key in ("password", "token", "app_key"):
+        assert safe[key] == "***"
+    assert safe["user"] == PARAMS["user"]
+    assert safe["stock_name"] == PARAMS["stock_name"]
+    assert PARAMS["password"] == "p"  # the params themselves are untouched
+
+
+def test_fanout_accounts_reduced_to_user_ids():
+    accounts = [dict(PARAMS, user="SIM1"), dict(PARAMS, user="SIM2")]
+
+    safe = redacted_params(dict(PARAMS, accounts=accounts))
+
+    assert safe["accounts"] == ["SIM1", "SIM2"]
+    assert "password" not in str(safe["accounts"])
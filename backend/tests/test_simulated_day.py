@@ -0,0 +1,168 @@
+"""A scalping session against the local broker stub on a SimulatedClock.
+
+The stub's REST API is served for real (NorenApi talks HTTP to it), but its
+market only moves when the strategy sleeps, one step per STEP simulated
+seconds, so a session of DURATION minutes runs in a few seconds.
+"""
+import io
+import json
+import threading
+from datetime import datetime
+
+import pytest
+from NorenRestApiPy.NorenApi import NorenApi
+
+from clock import SimulatedClock
+from ipc import EventChannel, CommandQueue
+import scalping_strategy
+from poll_scheduler import BudgetPool, RequestBudget
+from scalping_strategy import run_scalping_strategy
+from shoonya_stub import Market, StubServer, make_handler
+
+STEP = 1.0          # simulated seconds per market step
+DURATION = 20       # minutes
+REQUEST_BUDGET = 120
+
+PARAMS = {
+    "token": "JBSWY3DPEHPK3PXP",
+    "user": "SIM1",
+    "password": "p",
+    "vc": "v",
+    "app_key": "k",
+    "imei": "i",
+    "exch": "NSE",
+    "stock_name": "SBIN-EQ",
+    "price_type": "MKT",
+    "initial_buy_price": "100",
+    "target_price_diff": "0.1",
+    "entry_diff_price": "0.1",
+    "lot_size": "1",
+    "max_open_position": "5",
+    "duration": str(DURATION),
+    "market_closing_time": "15:30:00",
+    "debug_on": "False",
+    "request_budget": str(REQUEST_BUDGET),
+}
+
+
+class MarketClock(SimulatedClock):
+    """SimulatedClock that steps the stub's market as simulated time passes.
+
+    `on_step`, if given, is called after every market step (e.g. to send the
+    strategy commands at a chosen point in the session).
+    """
+
+    def __init__(self, market, start, on_step=None):
+        super().__init__(start)
+        self.market = market
+        self.on_step = on_step
+        self.stepped = 0.0
+
+    def sleep_until(self, deadline):
+        super().sleep_until(deadline)
+        while self.stepped + STEP <= self.monotonic():
+            self.stepped += STEP
+            self.market.step()
+            if self.on_step:
+                self.on_step()
+
+
+@pytest.fixture(autouse=True)
+def budgets(monkeypatch):
+    # Budgets are per account and per host; each session here has its own
+    # SimulatedClock, so it must not inherit the last session's bucket
+    monkeypatch.setattr(scalping_strategy, "BUDGETS", BudgetPool())
+
+
+@pytest.fixture
+def stub():
+    market = Market(volatility=2, seed=7)
+    server = StubServer(("127.0.0.1", 0), make_handler(market))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield market, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def run_session(market, host, commands=None, on_step=None):
+    clock = MarketClock(market, datetime.now().replace(hour=9, minute=15, second=0, microsecond=0), on_step)
+    out = io.StringIO()
+    api = NorenApi(host=host, websocket="ws://127.0.0.1:1/")
+    run_scalping_strategy(dict(PARAMS), api=api, clock=clock,
+                          channel=EventChannel(out), commands=commands or CommandQueue())
+    return clock, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_simulated_day_trades_and_ends_flat(stub):
+    market, host = stub
+    clock, frames = run_session(market, host)
+    tags = [frame["tag"] for frame in frames]
+
+    assert "Login Successful" in tags
+    assert "Initial Buy Completed" in tags
+    assert "Profit Booked" in tags
+    assert tags[-1] == "User Logged Out"
+    # Squared off at the end of the session
+    assert "End Time Sell Order Placed" in tags
+    positions = market.position_book(PARAMS["user"])
+    assert [int(position["netqty"]) for position in positions] == [0]
+    assert clock.monotonic() >= DURATION * 60
+
+
+def test_simulated_day_stays_within_request_budget(stub):
+    market, host = stub
+    clock, _ = run_session(market, host)
+
+    minutes = clock.monotonic() / 60
+    metered = sum(count for route, count in market.calls.items()
+                  if route not in ("QuickAuth", "Logout"))
+    # The per-minute rate plus the burst a full bucket allows
+    burst = RequestBudget(REQUEST_BUDGET, clock).capacity
+    assert metered <= REQUEST_BUDGET * minutes + burst
+
+
+def test_update_params_apply_whole_or_not_at_all(stub):
+    market, host = stub
+    commands = CommandQueue()
+    updates = [
+        # Applied
+        {"version": 1, "params": {"target_price_diff": "0.2", "max_open_position": "4"}},
+        # One unparseable field: nothing in it is applied, not even target_price_diff
+        {"version": 2, "params": {"target_price_diff": "0.3", "duration": "soon"}},
+        # Each ladder rung is one lot, so lot_size is refused while one is held
+        {"version": 3, "params": {"lot_size": "2"}},
+        # Still at v1's 0.2: an update to the same value changes nothing
+        {"version": 4, "params": {"target_price_diff": "0.2"}},
+    ]
+
+    def send_updates():
+        # Once the initial buy has filled
+        held = [int(position["netqty"]) for position in market.position_book(PARAMS["user"])]
+        if updates and held and held[0] > 0:
+            while updates:
+                commands.put(dict(updates.pop(0), command="update_params"))
+
+    _, frames = run_session(market, host, commands, send_updates)
+    acks = {frame["data"]["version"]: frame for frame in frames
+            if frame["tag"] in ("Params Updated", "Params Rejected")}
+
+    assert acks[1]["tag"] == "Params Updated"
+    assert acks[1]["data"]["changes"] == {
+        "target_price_diff": {"from": 0.1, "to": 0.2},
+        "max_open_position": {"from": 5, "to": 4},
+    }
+    assert acks[1]["data"]["stopLoss"] == pytest.approx(0.1 * (4 + 1))
+    assert acks[2]["tag"] == "Params Rejected"
+    assert acks[3]["tag"] == "Params Rejected"
+    assert "lot_size" in acks[3]["data"]["reason"]
+    assert acks[4]["tag"] == "Params Updated"
+    assert acks[4]["data"]["changes"] == {}
+
+    # Exits after the update are taken at the new target
+    applied = frames.index(acks[1])
+    booked = [frame["data"] for frame in frames[applied:] if frame["tag"] == "Profit Booked"]
+    assert booked
+    assert all(data["targetPriceDiff"] == 0.2 for data in booked)
+    # lot_size stayed at 1: every entry bought one lot
+    buys = [frame["data"] for frame in frames if frame["tag"] == "Fill" and frame["data"]["side"] == "B"]
+    assert {int(data["qty"]) for data in buys} == {1}
@@ -0,0 +1,56 @@
+"""The Monte Carlo harness: the vectorised ladder rules on hand-made paths,
+and a seeded run reproducing the same report whatever the worker count."""
+import numpy as np
+import pytest
+
+from stress_test import parse_args, run_stress_test, simulate_ladder, summarize
+
+PARAMS = {
+    "initial_buy_price": "100",
+    "target_price_diff": "1",
+    "entry_diff_price": "1",
+    "lot_size": "1",
+    "max_open_position": "3",
+    "price_type": "MKT",
+}
+
+
+def test_ladder_rules_on_known_paths():
+    prices = np.array([
+        # buy 100, add 98.5, sell 98.5 at 99.6, sell 100 at 101.5, re-enter at 100
+        [100, 98.5, 99.6, 101.5] + [100] * 6,
+        # buy 100, then 95.9 is beyond the 4.0 stop loss (entry_diff * (max_open + 1))
+        [100, 95.9] + [95.9] * 8,
+    ])
+
+    results = simulate_ladder(prices, PARAMS)
+
+    assert results["pnl"] == pytest.approx([1.1 + 1.5, -4.1])
+    assert results["max_depth"].tolist() == [2, 1]
+    assert results["stopped"].tolist() == [False, True]
+    # entries, exits and the final square-off of the re-entry
+    assert results["trades"].tolist() == [6, 2]
+
+
+def stress_args(*extra):
+    return parse_args(["--params", "unused.json", "--paths", "2500", "--step-seconds", "60", *extra])
+
+
+def test_seeded_run_is_reproducible():
+    first = summarize(run_stress_test(PARAMS, stress_args("--workers", "1")))
+    again = summarize(run_stress_test(PARAMS, stress_args("--workers", "1")))
+    parallel = summarize(run_stress_test(PARAMS, stress_args("--workers", "2")))
+    other = summarize(run_stress_test(PARAMS, stress_args("--workers", "1", "--seed", "7")))
+
+    assert first == again == parallel
+    assert first != other
+    assert first["paths"] == 2500
+    assert sum(first["ladder"]["maxDepthDistribution"].values()) == 2500
+
+
+def test_step_seconds_sets_the_path_length():
+    args = stress_args("--spike-minutes", "30")
+    assert args["step_seconds"] == 60
+    assert args["spike_steps"] == 30
+    with pytest.raises(SystemExit):
+        stress_args("--step-seconds", "0")
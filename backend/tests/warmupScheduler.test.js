@@ -0,0 +1,49 @@
+// nextWarmup: the next trading day's warmup, across weekends and holidays,
+// and "now" when the server comes up between the warmup and the open
+const test = require("node:test");
+const assert = require("node:assert");
+
+process.env.STRATEGY_WARMUP_AT = "09:05:00";
+process.env.MARKET_OPEN_AT = "09:15:00";
+process.env.MARKET_HOLIDAYS = "2026-10-20, 2026-10-26";
+const { nextWarmup } = require("../services/warmupScheduler");
+
+// Local time, like the schedule itself
+const at = (date, time) => new Date(`${date}T${time}`);
+
+test("before the warmup on a trading day: that day's warmup", () => {
+  // Monday
+  assert.deepStrictEqual(nextWarmup(at("2026-10-19", "07:30:00")), at("2026-10-19", "09:05:00"));
+});
+
+test("between the warmup and the open: right away", () => {
+  const restartedAt = at("2026-10-19", "09:10:30");
+  assert.deepStrictEqual(nextWarmup(restartedAt), restartedAt);
+});
+
+test("at or after the open: the next trading day", () => {
+  // Wednesday -> Thursday
+  assert.deepStrictEqual(nextWarmup(at("2026-10-21", "09:15:00")), at("2026-10-22", "09:05:00"));
+  assert.deepStrictEqual(nextWarmup(at("2026-10-21", "15:45:00")), at("2026-10-22", "09:05:00"));
+});
+
+test("weekends roll over to Monday", () => {
+  // Friday after the open, Saturday and Sunday
+  for (const from of [at("2026-10-16", "10:00:00"), at("2026-10-17", "08:00:00"), at("2026-10-18", "23:59:00")]) {
+    assert.deepStrictEqual(nextWarmup(from), at("2026-10-19", "09:05:00"));
+  }
+});
+
+test("holidays are skipped", () => {
+  // Monday after the open -> Tuesday is a holiday -> Wednesday
+  assert.deepStrictEqual(nextWarmup(at("2026-10-19", "12:00:00")), at("2026-10-21", "09:05:00"));
+  // On the holiday itself, even inside the warmup window
+  assert.deepStrictEqual(nextWarmup(at("2026-10-20", "09:10:00")), at("2026-10-21", "09:05:00"));
+  // Friday -> weekend -> Monday holiday -> Tuesday
+  assert.deepStrictEqual(nextWarmup(at("2026-10-23", "16:00:00")), at("2026-10-27", "09:05:00"));
+});
+
+test("month and year ends roll over", () => {
+  // Thursday 31 Dec -> Friday 1 Jan
+  assert.deepStrictEqual(nextWarmup(at("2026-12-31", "10:00:00")), at("2027-01-01", "09:05:00"));
+});